@@ -0,0 +1,147 @@
+import io
+import logging
+import subprocess
+
+import numpy as np
+from moviepy.config import get_setting
+
+from disk_cache import DiskCache
+
+AUDIO_FPS = 44100
+AUDIO_CHANNELS = 2
+INT16_SCALE = 32767.0
+
+
+def decode_audio(path, fps=AUDIO_FPS, nchannels=AUDIO_CHANNELS):
+    """Decodifica um arquivo de áudio inteiro (uma única chamada ao ffmpeg) para PCM float32 (amostras x canais)."""
+    cmd = [get_setting("FFMPEG_BINARY"), "-hide_banner", "-loglevel", "error", "-i", path,
+           "-vn", "-f", "f32le", "-acodec", "pcm_f32le", "-ar", str(fps), "-ac", str(nchannels), "-"]
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg não conseguiu decodificar '{path}': {result.stderr.decode('utf-8', errors='replace')[-500:]}")
+    return np.frombuffer(result.stdout, dtype=np.float32).reshape(-1, nchannels)
+
+
+def convert_pcm(data, input_fps, input_channels, sample_format="s16le", fps=AUDIO_FPS, nchannels=AUDIO_CHANNELS):
+    """Converte PCM cru em memória (ex.: saída de um TTS local) para float32 no formato da trilha, numa chamada ao ffmpeg."""
+    cmd = [get_setting("FFMPEG_BINARY"), "-hide_banner", "-loglevel", "error",
+           "-f", sample_format, "-ar", str(input_fps), "-ac", str(input_channels), "-i", "-",
+           "-f", "f32le", "-acodec", "pcm_f32le", "-ar", str(fps), "-ac", str(nchannels), "-"]
+    result = subprocess.run(cmd, input=data, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg não conseguiu converter o PCM: {result.stderr.decode('utf-8', errors='replace')[-500:]}")
+    return np.frombuffer(result.stdout, dtype=np.float32).reshape(-1, nchannels)
+
+
+def to_int16(pcm):
+    """PCM float32 em [-1, 1] como int16: metade do espaço em disco (.npy) e na memória."""
+    return np.round(np.clip(pcm, -1.0, 1.0) * INT16_SCALE).astype(np.int16)
+
+
+def to_float32(pcm):
+    """PCM no formato da trilha (float32); int16 é convertido, float32 volta como está (sem cópia)."""
+    return pcm.astype(np.float32) / np.float32(INT16_SCALE) if pcm.dtype == np.int16 else pcm
+
+
+def assemble_track(segments, slide_samples, nchannels=AUDIO_CHANNELS):
+    """
+    Monta a trilha de narração num único buffer pré-alocado: cada segmento PCM é copiado
+    no início do seu slide e o restante do slide fica em silêncio (zeros do buffer).
+    """
+    total = int(sum(slide_samples))
+    track = np.zeros((total, nchannels), dtype=np.float32)
+    offset = 0
+    for pcm, n_samples in zip(segments, slide_samples):
+        n_copy = min(len(pcm), n_samples)
+        track[offset:offset + n_copy] = pcm[:n_copy]
+        offset += n_samples
+    return track
+
+
+def load_music_pcm(path, cache=None, fps=AUDIO_FPS, nchannels=AUDIO_CHANNELS):
+    """
+    PCM int16 (amostras x canais) de uma música. Com cache, cada arquivo é decodificado uma única vez
+    (chave = hash do conteúdo) e as execuções seguintes só mapeiam o .npy em memória, sem ffmpeg.
+    """
+    key = DiskCache.make_key(DiskCache.file_digest(path), fps=fps, channels=nchannels, dtype="int16") if cache else None
+    if cache:
+        cached = cache.get(key)
+        if cached:
+            try:
+                return np.load(cached, mmap_mode="r")
+            except (ValueError, OSError) as e_load:
+                logging.warning(f"PCM da música corrompido no cache ({e_load}); decodificando de novo.")
+    pcm = decode_audio(path, fps, nchannels)
+    # int16 ocupa metade do float32 no cache; a conversão volta a float32 no ganho do mix
+    pcm = to_int16(pcm)
+    if cache:
+        buffer = io.BytesIO()
+        np.save(buffer, pcm)
+        try:
+            return np.load(cache.put_bytes(key, buffer.getvalue()), mmap_mode="r")
+        except Exception as e_cache:
+            logging.warning(f"Falha ao gravar o PCM da música no cache: {e_cache}")
+    return pcm
+
+
+def loop_to_length(pcm, n_samples):
+    """Repete (ou corta) o PCM até exatamente n_samples copiando fatias inteiras, sem array de índices."""
+    if len(pcm) == 0:
+        return np.zeros((n_samples, pcm.shape[1]), dtype=np.float32)
+    if len(pcm) >= n_samples:
+        return pcm[:n_samples]
+    looped = np.empty((n_samples, pcm.shape[1]), dtype=pcm.dtype)
+    for start in range(0, n_samples, len(pcm)):
+        count = min(len(pcm), n_samples - start)
+        looped[start:start + count] = pcm[:count]
+    return looped
+
+
+def ducking_envelope(n_samples, speech_spans, duck_gain=0.5, attack=0.08, release=0.4, fps=AUDIO_FPS, control_rate=100):
+    """
+    Ganho (n_samples,) float32 da música: 1 fora da fala, duck_gain sob a narração, com rampa de `attack`
+    segundos antes de cada trecho e de `release` depois. Calculado numa grade de controle (control_rate Hz)
+    pela distância até a fala mais próxima (acumulados de índices, sem laço por amostra) e interpolado.
+    """
+    hop = fps / control_rate
+    n_control = int(np.ceil(n_samples / hop)) + 1
+    speech = np.zeros(n_control, dtype=bool)
+    for start, end in speech_spans:
+        speech[int(start // hop):int(np.ceil(end / hop)) + 1] = True
+    if not speech.any():
+        return np.ones(n_samples, dtype=np.float32)
+    index = np.arange(n_control, dtype=np.float64)
+    last_speech = np.maximum.accumulate(np.where(speech, index, -np.inf))
+    next_speech = np.minimum.accumulate(np.where(speech, index, np.inf)[::-1])[::-1]
+    after = 1.0 - (index - last_speech) / max(1.0, release * control_rate)
+    before = 1.0 - (next_speech - index) / max(1.0, attack * control_rate)
+    duck = np.clip(np.fmax(after, before), 0.0, 1.0)
+    control = 1.0 - (1.0 - duck_gain) * duck
+    return np.interp(np.arange(n_samples) / hop, index, control).astype(np.float32)
+
+
+def mix_music(track, music_pcm, volume, envelope=None):
+    """
+    Soma a música (em loop até a duração do vídeo) à trilha, in-place. Volume, conversão do int16
+    e o envelope de ducking viram um único ganho por amostra, aplicado numa só multiplicação vetorizada.
+    """
+    music = loop_to_length(music_pcm, len(track))
+    scale = np.float32(volume / INT16_SCALE if music.dtype == np.int16 else volume)
+    gain = scale if envelope is None else (envelope * scale)[:, None]
+    track += music * gain
+    np.clip(track, -1.0, 1.0, out=track)
+    return track
+
+
+def write_pcm_audio(track, output_path, fps=AUDIO_FPS, bitrate="192k"):
+    """Codifica o buffer PCM final em AAC enviando-o pelo stdin do ffmpeg."""
+    nchannels = track.shape[1]
+    cmd = [get_setting("FFMPEG_BINARY"), "-hide_banner", "-loglevel", "error", "-y",
+           "-f", "f32le", "-ar", str(fps), "-ac", str(nchannels), "-i", "-",
+           "-c:a", "aac", "-b:a", bitrate, output_path]
+    result = subprocess.run(cmd, input=np.ascontiguousarray(track, dtype=np.float32).tobytes(),
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg falhou ao codificar o áudio: {result.stderr.decode('utf-8', errors='replace')[-500:]}")
+    logging.info(f"Trilha de áudio ({len(track) / fps:.2f}s) codificada em {output_path}")
+    return output_path
@@ -0,0 +1,77 @@
+import os
+import sys
+import json
+import time
+import logging
+import datetime
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+def _run_channel(channel_name):
+    """Executa o pipeline completo de um canal dentro de um processo do pool, isolando falhas."""
+    import main as pipeline
+    for handler in logging.getLogger().handlers:
+        handler.setFormatter(logging.Formatter(f'%(asctime)s - [{channel_name}] %(levelname)s - %(message)s'))
+    started = time.time()
+    result = {"channel": channel_name, "status": "ok", "exit_code": 0, "error": None}
+    try:
+        pipeline.main(channel_name)
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        result["exit_code"] = code
+        if code != 0:
+            result["status"] = "failed"
+            result["error"] = f"Pipeline encerrado com código {code}"
+    except Exception as e:
+        logging.error(f"Erro inesperado no canal '{channel_name}': {e}", exc_info=True)
+        result.update(status="failed", exit_code=2, error=f"{type(e).__name__}: {e}")
+    result["duration_seconds"] = round(time.time() - started, 2)
+    return result
+
+
+def run_batch(channel_names, max_workers=None, report_path=None):
+    """
+    Roda vários canais em paralelo num pool de processos (um pipeline por processo).
+    Os caches em disco (TTS, imagens) ficam em cache/ e são compartilhados por todos os workers;
+    com o contexto 'fork' os módulos já importados também são herdados sem novo cold start.
+    Retorna o relatório combinado (dict) e o grava em report_path, se informado.
+    """
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(channel_names)))
+    logging.info(f"--- Batch: {len(channel_names)} canal(is) com {workers} processo(s): {', '.join(channel_names)} ---")
+    started_at = datetime.datetime.now().isoformat(timespec="seconds")
+    start = time.time()
+
+    ctx = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as executor:
+        futures = {executor.submit(_run_channel, name): name for name in channel_names}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                result = future.result()
+            except Exception as e: # Ex.: processo do worker morreu (BrokenProcessPool)
+                result = {"channel": name, "status": "failed", "exit_code": 3, "error": f"{type(e).__name__}: {e}", "duration_seconds": None}
+            logging.info(f"Batch: canal '{name}' terminou com status '{result['status']}'.")
+            results.append(result)
+
+    results.sort(key=lambda r: channel_names.index(r["channel"]))
+    report = {
+        "started_at": started_at,
+        "finished_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "duration_seconds": round(time.time() - start, 2),
+        "workers": workers,
+        "succeeded": sum(1 for r in results if r["status"] == "ok"),
+        "failed": sum(1 for r in results if r["status"] != "ok"),
+        "channels": results,
+    }
+    if report_path:
+        os.makedirs(os.path.dirname(report_path), exist_ok=True)
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        logging.info(f"Relatório do batch salvo em {report_path}")
+    print(f"PRINT: Batch concluído: {report['succeeded']} ok, {report['failed']} falha(s) em {report['duration_seconds']}s.")
+    for r in results:
+        print(f"PRINT:   {r['channel']}: {r['status']}" + (f" ({r['error']})" if r["error"] else ""))
+    sys.stdout.flush()
+    return report
@@ -0,0 +1,214 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import logging
+import platform
+import resource
+import tempfile
+import datetime
+import subprocess
+
+from moviepy.config import get_setting
+
+import main as pipeline
+from youtube_stub_server import YouTubeStubServer, build_stub_youtube_service
+
+DEFAULT_SLIDE_COUNTS = [15, 45, 100]
+# Métricas em que "maior é melhor"; as demais (segundos, RSS) são "menor é melhor" na comparação
+HIGHER_IS_BETTER = ("slides_per_sec", "encode_fps", "upload_mb_per_sec", "tts_per_sec")
+
+SYNTHETIC_WORDS = ("curioso fato planeta animal oceano história ciência cérebro energia luz tempo "
+                   "estrela floresta química montanha inseto música número corpo").split()
+
+
+class LocalTTS:
+    """Substituto offline do gTTS: gera um tom com duração proporcional ao número de palavras."""
+
+    def __init__(self, text, lang="pt-br", slow=False):
+        self.text = text
+        self.duration = max(1.5, len(text.split()) * 0.35)
+
+    def save(self, path):
+        subprocess.run([get_setting("FFMPEG_BINARY"), "-hide_banner", "-loglevel", "error", "-y",
+                        "-f", "lavfi", "-i", f"sine=frequency=440:duration={self.duration:.2f}",
+                        "-ac", "2", "-ar", "44100", "-b:a", "64k", path], check=True)
+
+
+def synthetic_facts(count, seed=1234):
+    rng = random.Random(seed)
+    return [f"Fato sintético {i + 1}: " + " ".join(rng.choice(SYNTHETIC_WORDS) for _ in range(rng.randint(12, 28))) + "."
+            for i in range(count)]
+
+
+def peak_rss_mb():
+    # ru_maxrss é em KiB no Linux. Os processos ffmpeg não entram aqui: o RSS máximo dos filhos
+    # reportado pelo kernel inclui as páginas herdadas no fork e não seria comparável entre execuções.
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def bench_slides(facts, work_dir):
+    start = time.perf_counter()
+    for fact in facts:
+        pipeline.generate_dynamic_image_placeholder(fact, 1080, 1920, None, 7, pipeline.FPS_VIDEO)
+    elapsed = time.perf_counter() - start
+    return {"slides": len(facts), "seconds": round(elapsed, 3), "slides_per_sec": round(len(facts) / elapsed, 2)}
+
+
+def bench_tts(facts, work_dir, config):
+    audio_dir = os.path.join(work_dir, "audio"); os.makedirs(audio_dir, exist_ok=True)
+    engine = pipeline.get_tts_engine(config)
+    start = time.perf_counter()
+    paths = pipeline.synthesize_narrations(
+        facts,
+        lambda text, path: pipeline.generate_audio_from_text(text, config["gtts_language"], path, engine=engine),
+        lambda i: os.path.join(audio_dir, f"bench_fact_{i + 1}{engine.extension}"),
+        max_workers=config.get("tts_max_workers", 4),
+        requests_per_second=None,
+        max_retries=0
+    )
+    elapsed = time.perf_counter() - start
+    return paths, {"facts": len(facts), "seconds": round(elapsed, 3), "tts_per_sec": round(len(facts) / elapsed, 2),
+                   "engine": engine.name}
+
+
+def bench_render(facts, audio_paths, config, work_dir):
+    start = time.perf_counter()
+    video_path = pipeline.create_video_from_content(facts, audio_paths, config, channel_title="benchmark",
+                                                    video_output_path=os.path.join(work_dir, "benchmark.mp4"))
+    elapsed = time.perf_counter() - start
+    if not video_path:
+        raise RuntimeError("create_video_from_content não gerou vídeo.")
+    frames = int(round(float(_probe_duration(video_path)) * pipeline.FPS_VIDEO))
+    return video_path, {"seconds": round(elapsed, 3), "frames": frames, "encode_fps": round(frames / elapsed, 2),
+                        "video_mb": round(os.path.getsize(video_path) / 1024 / 1024, 2),
+                        "render_mode": config.get("render_mode", "still")}
+
+
+def _probe_duration(video_path):
+    result = subprocess.run([get_setting("FFMPEG_BINARY"), "-hide_banner", "-i", video_path],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    for line in result.stderr.decode("utf-8", errors="replace").splitlines():
+        if "Duration:" in line:
+            h, m, sec = line.split("Duration:")[1].split(",")[0].strip().split(":")
+            return int(h) * 3600 + int(m) * 60 + float(sec)
+    return 0.0
+
+
+def bench_upload(video_path, config):
+    with YouTubeStubServer() as server:
+        service = build_stub_youtube_service(server.base_url)
+        start = time.perf_counter()
+        video_id = pipeline.upload_video(service, video_path, "Benchmark", "Benchmark", ["bench"],
+                                         config.get("category_id"), "private",
+                                         chunksize=config.get("upload_chunk_size", pipeline.UPLOAD_CHUNK_SIZE))
+        elapsed = time.perf_counter() - start
+    size_mb = os.path.getsize(video_path) / 1024 / 1024
+    return {"ok": bool(video_id), "seconds": round(elapsed, 3), "mb": round(size_mb, 2),
+            "upload_mb_per_sec": round(size_mb / elapsed, 2) if elapsed else None}
+
+
+def run_benchmark(slide_counts, channel="fizzquirk", render_mode=None, keep_outputs=False, tts_engine=None):
+    base_config = dict(pipeline.CHANNEL_CONFIGS[channel])
+    base_config["selected_music_path"] = None
+    if render_mode: base_config["render_mode"] = render_mode
+    if tts_engine: base_config["tts_engine"] = tts_engine
+
+    # Tudo offline: TTS local (tom sintético no lugar do gTTS, ou o motor local escolhido), sem Vertex AI,
+    # caches e saídas em diretório temporário
+    pipeline.gTTS = LocalTTS
+    pipeline.VERTEX_AI_SDK_AVAILABLE = False
+    work_root = tempfile.mkdtemp(prefix="bench_")
+    pipeline.GENERATED_VIDEOS_DIR = os.path.join(work_root, "videos")
+    pipeline.LEGENDAS_DIR = os.path.join(work_root, "legendas")
+    pipeline.IMAGE_CACHE_DIR = os.path.join(work_root, "cache_imagen")
+    # Slides normalizados e músicas decodificadas também: entradas de execuções anteriores distorceriam os tempos
+    pipeline.SLIDE_CACHE_DIR = os.path.join(work_root, "cache_slides")
+    pipeline.MUSIC_CACHE_DIR = os.path.join(work_root, "cache_music")
+
+    results = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "host": {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()},
+        "render_mode": base_config.get("render_mode", "still"),
+        "runs": {},
+    }
+    try:
+        for count in slide_counts:
+            logging.info(f"=== Benchmark com {count} slides ===")
+            work_dir = os.path.join(work_root, f"slides_{count}"); os.makedirs(work_dir)
+            facts = synthetic_facts(count)
+            run = {"slides": bench_slides(facts, work_dir)}
+            audio_paths, run["tts"] = bench_tts(facts, work_dir, base_config)
+            valid = [(f, p) for f, p in zip(facts, audio_paths) if p]
+            video_path, run["render"] = bench_render([f for f, _ in valid], [p for _, p in valid], base_config, work_dir)
+            run["upload"] = bench_upload(video_path, base_config)
+            run["peak_rss_mb"] = peak_rss_mb()
+            results["runs"][str(count)] = run
+            if not keep_outputs: shutil.rmtree(work_dir, ignore_errors=True)
+    finally:
+        if not keep_outputs: shutil.rmtree(work_root, ignore_errors=True)
+    return results
+
+
+def _flatten(results):
+    flat = {}
+    for count, run in results.get("runs", {}).items():
+        for stage, metrics in run.items():
+            if isinstance(metrics, dict):
+                for key, value in metrics.items():
+                    if isinstance(value, (int, float)) and not isinstance(value, bool):
+                        flat[f"{count}.{stage}.{key}"] = value
+            elif isinstance(metrics, (int, float)):
+                flat[f"{count}.{stage}"] = metrics
+    return flat
+
+
+def compare_results(current, baseline, tolerance=0.15):
+    """Lista as métricas que pioraram mais que `tolerance` em relação ao baseline."""
+    regressions = []
+    cur, base = _flatten(current), _flatten(baseline)
+    for key, old in base.items():
+        new = cur.get(key)
+        if new is None or not old:
+            continue
+        metric = key.rsplit(".", 1)[-1]
+        if metric not in HIGHER_IS_BETTER and not (metric == "seconds" or key.endswith("peak_rss_mb")):
+            continue
+        change = (new - old) / old
+        worse = change < -tolerance if metric in HIGHER_IS_BETTER else change > tolerance
+        if worse:
+            regressions.append({"metric": key, "baseline": old, "current": new, "change_pct": round(change * 100, 1)})
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark offline dos estágios do pipeline (slides, TTS, render, upload).")
+    parser.add_argument("--slides", default=",".join(str(c) for c in DEFAULT_SLIDE_COUNTS), help="Quantidades de slides, separadas por vírgula.")
+    parser.add_argument("--channel", default="fizzquirk", help="Canal cuja configuração será usada.")
+    parser.add_argument("--render-mode", choices=["still", "pipe", "parallel", "moviepy"], default=None)
+    parser.add_argument("--tts-engine", choices=["gtts", "espeak", "piper"], default=None,
+                        help="Motor de TTS medido (gtts = tom sintético offline no lugar do gTTS).")
+    parser.add_argument("--output", default=os.path.join(pipeline.LOGS_DIR, "benchmark_results.json"), help="Arquivo JSON de resultados.")
+    parser.add_argument("--compare", default=None, help="JSON de um benchmark anterior para detectar regressões.")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Piora relativa tolerada na comparação (0.15 = 15%%).")
+    parser.add_argument("--keep-outputs", action="store_true")
+    args = parser.parse_args()
+
+    counts = [int(c) for c in args.slides.split(",") if c.strip()]
+    bench = run_benchmark(counts, channel=args.channel, render_mode=args.render_mode, keep_outputs=args.keep_outputs,
+                          tts_engine=args.tts_engine)
+    exit_code = 0
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            bench["regressions"] = compare_results(bench, json.load(f), args.tolerance)
+        for reg in bench["regressions"]:
+            logging.error(f"REGRESSÃO: {reg['metric']}: {reg['baseline']} -> {reg['current']} ({reg['change_pct']:+.1f}%)")
+        exit_code = 1 if bench["regressions"] else 0
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(bench, f, indent=2, ensure_ascii=False)
+    print(json.dumps(bench, indent=2, ensure_ascii=False))
+    sys.exit(exit_code)
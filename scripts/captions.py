@@ -0,0 +1,133 @@
+import os
+import logging
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image as PILImage, ImageDraw as PILImageDraw
+
+from text_layout import fit_text, draw_layout
+
+CAPTION_FORMATS = ("srt", "vtt")
+CAPTION_BOX_COLOR = (0, 0, 0, 150)
+CAPTION_TEXT_COLOR = (255, 255, 255)
+CAPTION_STROKE_COLOR = (0, 0, 0)
+# Faixa da legenda queimada, em frações da altura: acima da área que a interface do Shorts cobre
+CAPTION_BOTTOM = 0.80
+CAPTION_MAX_HEIGHT = 0.16
+CAPTION_MARGIN_X = 0.08
+
+
+def format_timestamp(seconds, decimal_separator=","):
+    millis = int(round(max(0.0, seconds) * 1000))
+    hours, rest = divmod(millis, 3600000)
+    minutes, rest = divmod(rest, 60000)
+    secs, millis = divmod(rest, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{decimal_separator}{millis:03d}"
+
+
+def split_caption(text, max_chars=84):
+    """
+    Quebra o texto nos espaços em trechos de tamanho parecido, de até max_chars cada
+    (um trecho = uma legenda na tela), sem deixar uma sobra curta no final.
+    """
+    n_chunks = -(-len(text) // max_chars)
+    target = min(max_chars, -(-len(text) // max(1, n_chunks)) + 8)
+    chunks, current = [], ""
+    for word in text.split():
+        if current and len(current) + 1 + len(word) > target:
+            chunks.append(current); current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def balance_lines(text, max_line=42):
+    """Até duas linhas de tamanho parecido, quebrando no espaço mais próximo do meio."""
+    if len(text) <= max_line or " " not in text:
+        return text
+    middle = len(text) // 2
+    spaces = [i for i, c in enumerate(text) if c == " "]
+    cut = min(spaces, key=lambda i: abs(i - middle))
+    return text[:cut] + "\n" + text[cut + 1:]
+
+
+def build_cues(facts, slide_starts, narration_durations, max_chars=84):
+    """
+    Legendas a partir da linha do tempo já conhecida (sem reconhecimento de fala): cada fato
+    ocupa o trecho narrado do seu slide, dividido entre os trechos proporcionalmente aos caracteres.
+    Retorna [(início, fim, texto)] em segundos.
+    """
+    cues = []
+    for fact, start, duration in zip(facts, slide_starts, narration_durations):
+        chunks = split_caption(" ".join(fact.split()), max_chars)
+        total_chars = sum(len(c) for c in chunks) or 1
+        cursor = start
+        for chunk in chunks:
+            end = cursor + duration * len(chunk) / total_chars
+            cues.append((cursor, end, balance_lines(chunk, max_chars // 2)))
+            cursor = end
+    return cues
+
+
+def to_srt(cues):
+    return "\n".join(f"{i}\n{format_timestamp(start)} --> {format_timestamp(end)}\n{text}\n"
+                     for i, (start, end, text) in enumerate(cues, 1))
+
+
+def to_vtt(cues):
+    return "WEBVTT\n\n" + "\n".join(f"{format_timestamp(start, '.')} --> {format_timestamp(end, '.')}\n{text}\n"
+                                    for start, end, text in cues)
+
+
+def caption_path(directory, video_path, fmt):
+    return os.path.join(directory, os.path.splitext(os.path.basename(video_path))[0] + "." + fmt)
+
+
+def write_captions(cues, directory, video_path, formats=CAPTION_FORMATS):
+    """Grava as legendas do vídeo (mesmo nome-base) em cada formato. Retorna {formato: caminho}."""
+    os.makedirs(directory, exist_ok=True)
+    writers = {"srt": to_srt, "vtt": to_vtt}
+    paths = {}
+    for fmt in formats:
+        path = caption_path(directory, video_path, fmt)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(writers[fmt](cues))
+        paths[fmt] = path
+    logging.info(f"Legendas ({', '.join(formats)}) com {len(cues)} trecho(s) gravadas em {directory}")
+    return paths
+
+
+@lru_cache(maxsize=64)
+def caption_overlay(text, width, height, font_path):
+    """
+    Faixa RGBA da legenda queimada (caixa semitransparente + texto), renderizada uma vez por fato.
+    Retorna (overlay, y): o array (altura da faixa x largura x 4) e a linha onde ele começa no quadro.
+    """
+    margin_x = int(width * CAPTION_MARGIN_X)
+    max_height = int(height * CAPTION_MAX_HEIGHT)
+    padding = int(height * 0.01)
+    layout = fit_text(text, font_path, width - 2 * margin_x - 2 * padding, max_height - 2 * padding,
+                      max_size=int(height / 30), min_size=int(height / 64))
+    band_height = int(layout.height) + 2 * padding
+    band = PILImage.new("RGBA", (width, band_height), (0, 0, 0, 0))
+    draw = PILImageDraw.Draw(band)
+    box_width = int(layout.width) + 2 * padding
+    left = (width - box_width) // 2
+    draw.rounded_rectangle((left, 0, left + box_width, band_height - 1), radius=padding, fill=CAPTION_BOX_COLOR)
+    draw_layout(draw, layout, (left, 0, left + box_width, band_height), CAPTION_TEXT_COLOR, CAPTION_STROKE_COLOR)
+    overlay = np.asarray(band)
+    overlay.setflags(write=False)
+    return overlay, int(height * CAPTION_BOTTOM) - band_height
+
+
+def burn_caption(frame, text, font_path):
+    """Compõe a legenda sobre uma cópia do quadro (alpha blending vetorizado só na faixa da legenda)."""
+    height, width = frame.shape[:2]
+    overlay, y = caption_overlay(text, width, height, font_path)
+    result = np.array(frame[:, :, :3], dtype=np.uint8, copy=True)
+    region = result[y:y + overlay.shape[0]]
+    alpha = overlay[:, :, 3:4].astype(np.float32) / 255.0
+    region[:] = (overlay[:, :, :3] * alpha + region * (1.0 - alpha)).astype(np.uint8)
+    return result
@@ -0,0 +1,105 @@
+import os
+import time
+import shutil
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from moviepy.editor import concatenate_videoclips
+
+from audio_mix import AUDIO_FPS, write_pcm_audio
+from still_encoder import concat_and_mux
+from workspace import temp_dir
+
+DEFAULT_CHUNK_PRESET = "ultrafast"
+
+# Clipes de cada chunk, herdados pelos workers via fork (clipes do moviepy não são serializáveis com pickle)
+_CHUNK_CLIPS = []
+
+
+def split_at_slide_boundaries(durations, n_chunks):
+    """
+    Divide a sequência de slides em até `n_chunks` grupos contíguos de duração parecida,
+    sempre cortando entre slides. Retorna uma lista de listas de índices.
+    """
+    n_chunks = max(1, min(n_chunks, len(durations)))
+    total = sum(durations)
+    chunks, current, elapsed = [], [], 0.0
+    for i, duration in enumerate(durations):
+        current.append(i)
+        elapsed += duration
+        remaining_slides = len(durations) - i - 1
+        remaining_chunks = n_chunks - len(chunks) - 1
+        # Fecha o chunk ao atingir sua fatia proporcional do tempo total, garantindo ao menos um slide para cada chunk restante
+        if remaining_chunks > 0 and (elapsed >= total * (len(chunks) + 1) / n_chunks or remaining_slides == remaining_chunks):
+            chunks.append(current)
+            current = []
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _encode_chunk(index, output_path, fps, preset, threads):
+    start = time.perf_counter()
+    clip = concatenate_videoclips(_CHUNK_CLIPS[index], method="compose").set_fps(fps)
+    # Parâmetros idênticos em todos os chunks: é o que permite juntá-los depois com cópia de stream
+    clip.without_audio().write_videofile(
+        output_path, codec="libx264", fps=fps, preset=preset, audio=False, threads=threads,
+        ffmpeg_params=["-pix_fmt", "yuv420p"], logger=None
+    )
+    return index, time.perf_counter() - start
+
+
+def render_parallel_chunks(slide_clips, audio_pcm, output_path, fps, preset=DEFAULT_CHUNK_PRESET, max_workers=None,
+                           audio_fps=AUDIO_FPS, movflags="+faststart"):
+    """
+    Divide a linha do tempo em chunks nos limites dos slides e codifica cada chunk num processo
+    separado (o moviepy gera quadros de forma serial, então um único write_videofile usa só um núcleo).
+    Os chunks são unidos com cópia de stream e o áudio é multiplexado na mesma passada.
+    """
+    global _CHUNK_CLIPS
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(slide_clips)))
+    groups = split_at_slide_boundaries([clip.duration for clip in slide_clips], workers)
+    threads_per_chunk = max(1, (os.cpu_count() or 1) // len(groups))
+    logging.info(f"Render paralelo: {len(slide_clips)} slides em {len(groups)} chunk(s), "
+                 f"{threads_per_chunk} thread(s) do x264 por chunk.")
+
+    work_dir = temp_dir("chunked_render_")
+    _CHUNK_CLIPS = [[slide_clips[i] for i in group] for group in groups]
+    try:
+        chunk_paths = [os.path.join(work_dir, f"chunk_{i:04d}.mp4") for i in range(len(groups))]
+        jobs = [(i, path, fps, preset, threads_per_chunk) for i, path in enumerate(chunk_paths)]
+        fork_available = "fork" in multiprocessing.get_all_start_methods()
+        # Fork a partir de uma thread secundária (ex.: render do upload em streaming) copiaria locks
+        # de outras threads (logging, uploader) possivelmente travados: nesse caso, chunks em sequência
+        on_main_thread = threading.current_thread() is threading.main_thread()
+        if len(groups) > 1 and fork_available and on_main_thread:
+            with ProcessPoolExecutor(max_workers=len(groups), mp_context=multiprocessing.get_context("fork")) as executor:
+                futures = [executor.submit(_encode_chunk, *job) for job in jobs]
+                # O áudio é codificado no processo principal enquanto os chunks de vídeo são gerados
+                audio_path = _write_audio(audio_pcm, work_dir, audio_fps)
+                for future in futures:
+                    index, elapsed = future.result()
+                    logging.info(f"Chunk {index + 1}/{len(groups)} codificado em {elapsed:.1f}s.")
+        else:
+            if len(groups) > 1 and not on_main_thread:
+                logging.warning("Render fora da thread principal; chunks serão codificados em sequência (sem fork).")
+            elif len(groups) > 1:
+                logging.warning("Start method 'fork' indisponível; chunks serão codificados em sequência.")
+            for job in jobs:
+                _encode_chunk(*job)
+            audio_path = _write_audio(audio_pcm, work_dir, audio_fps)
+        concat_and_mux(chunk_paths, audio_path, output_path, work_dir, movflags=movflags)
+        return output_path
+    finally:
+        _CHUNK_CLIPS = []
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _write_audio(audio_pcm, work_dir, audio_fps):
+    if audio_pcm is None:
+        return None
+    audio_path = os.path.join(work_dir, "audio.m4a")
+    write_pcm_audio(audio_pcm, audio_path, fps=audio_fps)
+    return audio_path
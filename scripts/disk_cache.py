@@ -0,0 +1,204 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+
+
+class DiskCache:
+    """
+    Cache persistente em disco, endereçado pelo hash do conteúdo da chave.
+    Cada entrada é um arquivo; a recência é o mtime (atualizado a cada acerto),
+    o que permite despejo LRU entre execuções sem índice separado.
+    O total em bytes é mantido em memória entre gravações; o diretório só é varrido quando
+    esse total passa de max_bytes ou a cada RESCAN_EVERY gravações (outros processos podem gravar no mesmo cache).
+    O TTL conta da criação da entrada (marcador "<entrada>.ctime"), não do último acesso: uma entrada
+    lida o tempo todo nunca é despejada pelo LRU, mas ainda assim expira ttl_seconds depois de gravada.
+    """
+
+    RESCAN_EVERY = 64
+
+    def __init__(self, cache_dir, max_bytes, extension="", ttl_seconds=None, name="cache"):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.extension = extension
+        self.ttl_seconds = ttl_seconds
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._total_bytes = None # Desconhecido até a primeira varredura
+        self._puts_since_scan = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(*parts, **settings):
+        payload = json.dumps([parts, settings], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def file_digest(path, block_size=1 << 20):
+        """Hash do conteúdo de um arquivo, para chaves que dependem do arquivo e não do seu nome."""
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(block_size), b""):
+                h.update(block)
+        return h.hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + self.extension)
+
+    def _count(self, hit):
+        with self._lock:
+            if hit: self.hits += 1
+            else: self.misses += 1
+
+    def _demote_hit(self):
+        # A entrada sumiu entre o stat e a leitura (despejo concorrente): conta como falha
+        with self._lock:
+            self.hits -= 1; self.misses += 1
+
+    def get(self, key):
+        """Retorna o caminho da entrada em cache (ou None), marcando-a como usada recentemente."""
+        path = self.path_for(key)
+        try:
+            st = os.stat(path)
+        except OSError:
+            self._count(False)
+            return None
+        if self.ttl_seconds and time.time() - self._created_at(path, st) > self.ttl_seconds:
+            self._remove(path)
+            self._count(False)
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        self._count(True)
+        return path
+
+    def _created_at(self, path, st):
+        # O mtime é usado para LRU; a data de criação fica no marcador "<entrada>.ctime" quando há TTL.
+        marker = path + ".ctime"
+        try:
+            with open(marker, "r", encoding="utf-8") as f:
+                return float(f.read().strip())
+        except (OSError, ValueError):
+            pass
+        # Entrada gravada sem TTL: o mtime muda a cada acerto, então o prazo passa a contar de agora
+        try:
+            with open(marker, "w", encoding="utf-8") as f:
+                f.write(str(time.time()))
+        except OSError:
+            return st.st_mtime
+        return time.time()
+
+    def fetch_to(self, key, dest_path):
+        """Copia a entrada em cache para dest_path. Retorna dest_path em caso de acerto, senão None."""
+        cached = self.get(key)
+        if not cached:
+            return None
+        try:
+            os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+            shutil.copyfile(cached, dest_path)
+        except OSError as e:
+            logging.warning(f"Cache '{self.name}': entrada ilegível ou despejada durante a leitura ({e}); tratando como falha.")
+            self._demote_hit()
+            return None
+        return dest_path
+
+    def read_bytes(self, key):
+        """Conteúdo da entrada em cache, ou None (inclusive se ela for despejada entre o stat e a leitura)."""
+        cached = self.get(key)
+        if not cached:
+            return None
+        try:
+            with open(cached, "rb") as f:
+                return f.read()
+        except OSError as e:
+            logging.warning(f"Cache '{self.name}': entrada ilegível ou despejada durante a leitura ({e}); tratando como falha.")
+            self._demote_hit()
+            return None
+
+    def put_file(self, key, src_path):
+        with open(src_path, "rb") as f:
+            return self.put_bytes(key, f.read())
+
+    def put_bytes(self, key, data):
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try: previous_size = os.stat(path).st_size
+        except OSError: previous_size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path): os.remove(tmp_path)
+            raise
+        if self.ttl_seconds:
+            with open(path + ".ctime", "w", encoding="utf-8") as f:
+                f.write(str(time.time()))
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += len(data) - previous_size
+            self._puts_since_scan += 1
+            due = bool(self.max_bytes) and (self._total_bytes is None or self._total_bytes > self.max_bytes
+                                            or self._puts_since_scan >= self.RESCAN_EVERY)
+        if due:
+            self.evict()
+        return path
+
+    def _remove(self, path):
+        for p in (path, path + ".ctime"):
+            try: os.remove(p)
+            except OSError: pass
+
+    def _entries(self):
+        entries = []
+        for root, _dirs, files in os.walk(self.cache_dir):
+            for fname in files:
+                if fname.endswith((".tmp", ".ctime")):
+                    continue
+                path = os.path.join(root, fname)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def evict(self):
+        """Remove as entradas menos usadas recentemente até o total caber em max_bytes."""
+        if not self.max_bytes:
+            return
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _mtime, size, _path in entries)
+            self._puts_since_scan = 0
+            if total <= self.max_bytes:
+                self._total_bytes = total
+                return
+            for _mtime, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+                self.evictions += 1
+            self._total_bytes = total
+        logging.info(f"Cache '{self.name}': despejo LRU concluído ({total / 1024 / 1024:.1f} MB em uso).")
+
+    def stats(self):
+        with self._lock:
+            return {"name": self.name, "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def log_stats(self):
+        st = self.stats()
+        total = st["hits"] + st["misses"]
+        ratio = (st["hits"] / total * 100) if total else 0.0
+        logging.info(f"Cache '{self.name}': {st['hits']} acertos, {st['misses']} falhas ({ratio:.0f}% de acerto), {st['evictions']} despejos.")
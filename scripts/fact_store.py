@@ -0,0 +1,242 @@
+import os
+import csv
+import sys
+import json
+import time
+import random
+import hashlib
+import logging
+import argparse
+
+from sqlite_util import attach, connect, immediate_transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS facts (
+    id INTEGER PRIMARY KEY,
+    fact_key TEXT NOT NULL UNIQUE,
+    topic TEXT NOT NULL,
+    language TEXT NOT NULL,
+    text TEXT NOT NULL,
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_facts_topic_language ON facts(topic, language);
+CREATE VIRTUAL TABLE IF NOT EXISTS facts_fts USING fts5(text, topic, content='facts', content_rowid='id');
+CREATE TABLE IF NOT EXISTS fact_topics (
+    id INTEGER PRIMARY KEY,
+    topic TEXT NOT NULL,
+    language TEXT NOT NULL,
+    UNIQUE (topic, language)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS fact_topics_fts USING fts5(topic, content='fact_topics', content_rowid='id');
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+USAGE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {schema}.fact_usage (
+    channel TEXT NOT NULL,
+    fact_key TEXT NOT NULL,
+    used_at REAL NOT NULL,
+    PRIMARY KEY (channel, fact_key)
+) WITHOUT ROWID;
+"""
+
+SOURCE_EXTENSIONS = (".jsonl", ".csv")
+
+
+def fact_key(text, language):
+    """Identidade estável do fato (idioma + texto normalizado), independente do id no banco."""
+    normalized = " ".join(text.lower().split())
+    return hashlib.sha1(f"{language}\0{normalized}".encode("utf-8")).hexdigest()[:20]
+
+
+def read_fact_file(path):
+    """Lê fatos de um JSONL ({"topic", "language", "text"} por linha) ou CSV com cabeçalho topic,language,text."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        rows = (json.loads(line) for line in f if line.strip()) if path.endswith(".jsonl") else csv.DictReader(f)
+        for row in rows:
+            text = (row.get("text") or "").strip()
+            if text and row.get("topic") and row.get("language"):
+                yield row["topic"].strip(), row["language"].strip(), text
+
+
+class FactStore:
+    """
+    Fatos por tema e idioma num SQLite com índice full-text (FTS5).
+    Os fatos já publicados por canal ficam em `fact_usage`, que pode morar em outro banco
+    (history_db_path, anexado com ATTACH) para o acervo ser reconstruível sem perder o histórico.
+    """
+
+    def __init__(self, db_path, history_db_path=None, timeout=30.0, read_only=False):
+        self.conn = connect(db_path, timeout, read_only=read_only)
+        self.usage_schema = "main"
+        if history_db_path:
+            attach(self.conn, history_db_path, "history", read_only=read_only)
+            self.usage_schema = "history"
+        if not read_only: # Somente leitura (--plan): consultas apenas, sem criar tabelas
+            self.conn.executescript(SCHEMA)
+            self.conn.executescript(USAGE_SCHEMA.format(schema=self.usage_schema))
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def import_facts(self, rows, source=None):
+        """Importa (topic, language, text) em lote numa única transação; fatos repetidos são ignorados."""
+        with immediate_transaction(self.conn) as conn:
+            before = conn.total_changes
+            last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM facts").fetchone()[0]
+            last_topic_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM fact_topics").fetchone()[0]
+            conn.executemany("INSERT OR IGNORE INTO facts(fact_key, topic, language, text, source) VALUES (?, ?, ?, ?, ?)",
+                             ((fact_key(text, language), topic, language, text, source) for topic, language, text in rows))
+            inserted = conn.total_changes - before
+            # Índices full-text (fatos e temas) atualizados só com as linhas novas
+            conn.execute("INSERT INTO facts_fts(rowid, text, topic) SELECT id, text, topic FROM facts WHERE id > ?", (last_id,))
+            conn.execute("INSERT OR IGNORE INTO fact_topics(topic, language) SELECT DISTINCT topic, language FROM facts WHERE id > ?", (last_id,))
+            conn.execute("INSERT INTO fact_topics_fts(rowid, topic) SELECT id, topic FROM fact_topics WHERE id > ?", (last_topic_id,))
+        return inserted
+
+    def import_file(self, path):
+        inserted = self.import_facts(read_fact_file(path), source=os.path.basename(path))
+        logging.info(f"{inserted} fato(s) novo(s) importado(s) de {path}.")
+        return inserted
+
+    def sync_sources(self, source_dir):
+        """Importa os arquivos .jsonl/.csv de source_dir que mudaram desde a última sincronização."""
+        if not os.path.isdir(source_dir):
+            return 0
+        inserted = 0
+        for name in sorted(os.listdir(source_dir)):
+            path = os.path.join(source_dir, name)
+            if not name.endswith(SOURCE_EXTENSIONS) or not os.path.isfile(path):
+                continue
+            st = os.stat(path)
+            fingerprint = f"{st.st_size}:{int(st.st_mtime)}"
+            meta_key = f"source:{name}"
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (meta_key,)).fetchone()
+            if row and row[0] == fingerprint:
+                continue
+            inserted += self.import_file(path)
+            self.conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", (meta_key, fingerprint))
+        return inserted
+
+    def sample_unused(self, topic, language, n, channel=None):
+        """
+        Até `n` fatos do tema/idioma ainda não usados pelo canal, numa única consulta pelo índice (topic, language).
+        Sem fatos cadastrados para o tema exato, usa os temas mais parecidos (busca full-text nos nomes dos temas).
+        """
+        facts = self._sample_topic(topic, language, n, channel)
+        if not facts:
+            for related in self.related_topics(topic, language):
+                facts += self._sample_topic(related, language, n - len(facts), channel)
+                if len(facts) >= n:
+                    break
+            if facts:
+                logging.info(f"Sem fatos para o tema exato '{topic}'; usados temas relacionados do banco de fatos.")
+        return facts
+
+    def _probe_query(self, channel):
+        """Primeiro fato do tema/idioma com id em [início, fim], fora dos já escolhidos e (com canal) dos já usados."""
+        unused = "" if not channel else f"""
+              AND NOT EXISTS (SELECT 1 FROM {self.usage_schema}.fact_usage u WHERE u.channel = :channel AND u.fact_key = f.fact_key)"""
+        return f"""
+            SELECT f.id, f.text FROM facts f
+            WHERE f.topic = :topic AND f.language = :language AND f.id BETWEEN :low AND :high
+              AND f.id NOT IN (SELECT value FROM json_each(:picked)) {unused}
+            ORDER BY f.id LIMIT 1"""
+
+    def _sample_topic(self, topic, language, n, channel):
+        """
+        Sorteio por buscas no índice (topic, language, id): cada fato sai de um id aleatório dentro da faixa
+        do tema, lendo para frente até o primeiro não usado e dando a volta no início da faixa se preciso.
+        O custo é O(n log fatos), sem percorrer nem ordenar todos os fatos do tema.
+        """
+        if n <= 0:
+            return []
+        low, high = self.conn.execute("""
+            SELECT (SELECT MIN(id) FROM facts WHERE topic = :topic AND language = :language),
+                   (SELECT MAX(id) FROM facts WHERE topic = :topic AND language = :language)""",
+            {"topic": topic, "language": language}).fetchone()
+        if low is None:
+            return []
+        query = self._probe_query(channel)
+        params = {"topic": topic, "language": language, "channel": channel}
+        picked, facts = [], []
+        while len(facts) < n:
+            start = random.randint(low, high)
+            row = None
+            for params["low"], params["high"] in ((start, high), (low, start - 1)):
+                params["picked"] = json.dumps(picked)
+                row = self.conn.execute(query, params).fetchone()
+                if row:
+                    break
+            if row is None:
+                break # Todos os fatos do tema já usados ou escolhidos
+            picked.append(row[0]); facts.append(row[1])
+        return facts
+
+    def related_topics(self, topic, language, limit=5):
+        query = fts_query(topic)
+        if not query:
+            return []
+        return [r[0] for r in self.conn.execute("""
+            SELECT t.topic FROM fact_topics_fts JOIN fact_topics t ON t.id = fact_topics_fts.rowid
+            WHERE fact_topics_fts MATCH ? AND t.language = ?
+            ORDER BY fact_topics_fts.rank LIMIT ?""", (query, language, limit))]
+
+    def search(self, query, language=None, limit=20):
+        sql = "SELECT f.topic, f.language, f.text FROM facts_fts JOIN facts f ON f.id = facts_fts.rowid WHERE facts_fts MATCH ?"
+        params = [query]
+        if language:
+            sql += " AND f.language = ?"; params.append(language)
+        return self.conn.execute(sql + " ORDER BY facts_fts.rank LIMIT ?", params + [limit]).fetchall()
+
+    def mark_used(self, channel, texts, language):
+        now = time.time()
+        with immediate_transaction(self.conn) as conn:
+            conn.executemany(f"INSERT OR REPLACE INTO {self.usage_schema}.fact_usage(channel, fact_key, used_at) VALUES (?, ?, ?)",
+                             ((channel, fact_key(text, language), now) for text in texts))
+
+    def stats(self):
+        facts = self.conn.execute("SELECT COUNT(*) FROM facts").fetchone()[0]
+        topics = self.conn.execute("SELECT COUNT(DISTINCT topic) FROM facts").fetchone()[0]
+        used = dict(self.conn.execute(f"SELECT channel, COUNT(*) FROM {self.usage_schema}.fact_usage GROUP BY channel"))
+        return {"facts": facts, "topics": topics, "used_by_channel": used}
+
+
+def fts_query(topic):
+    """Palavras relevantes do tema como consulta FTS5 (OR entre termos, cada um entre aspas)."""
+    words = ["".join(c for c in w if c.isalnum()) for w in topic.split()]
+    words = [w for w in words if len(w) > 3]
+    return " OR ".join(f'"{w}"' for w in words)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, stream=sys.stdout, format='%(asctime)s - %(levelname)s - %(message)s')
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Manutenção do banco de fatos.")
+    parser.add_argument("--db", default=os.path.join(base_dir, "cache", "facts.db"))
+    parser.add_argument("--history-db", default=os.path.join(base_dir, "topics.db"))
+    sub = parser.add_subparsers(dest="command", required=True)
+    import_parser = sub.add_parser("import", help="Importa fatos de arquivos JSONL/CSV (colunas topic, language, text).")
+    import_parser.add_argument("files", nargs="+")
+    search_parser = sub.add_parser("search", help="Busca full-text nos fatos.")
+    search_parser.add_argument("query")
+    search_parser.add_argument("--language", default=None)
+    sub.add_parser("stats")
+    args = parser.parse_args()
+
+    with FactStore(args.db, history_db_path=args.history_db) as store:
+        if args.command == "import":
+            start = time.perf_counter()
+            total = sum(store.import_file(path) for path in args.files)
+            print(f"{total} fato(s) novo(s) em {time.perf_counter() - start:.1f}s.")
+        elif args.command == "search":
+            for topic, language, text in store.search(args.query, args.language):
+                print(f"[{language}] {topic}: {text}")
+        else:
+            print(store.stats())
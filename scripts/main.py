@@ -5,42 +5,27 @@ import json
 import sys
 import time
 import random
-import numpy as np
+import threading
 import datetime 
 
-# Para geração de áudio
-from gtts import gTTS
-
-# Para edição de vídeo
-from moviepy.editor import (AudioFileClip, TextClip, CompositeVideoClip,
-                            ColorClip, ImageClip, CompositeAudioClip,
-                            concatenate_videoclips, concatenate_audioclips, AudioClip)
-from moviepy.config import change_settings
-import moviepy.config as MOPY_CONFIG
-
-# Para o placeholder de imagem e manipulação
-from PIL import Image as PILImage, ImageDraw as PILImageDraw, ImageFont as PILImageFont
-
-# Para API do YouTube
-from googleapiclient.discovery import build
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from googleapiclient.http import MediaFileUpload
-
-# Tenta importar a biblioteca do Vertex AI (para Imagen)
-try:
-    from google.cloud import aiplatform
-    VERTEX_AI_SDK_AVAILABLE = True
-    logging.info("Biblioteca google-cloud-aiplatform encontrada e importada.")
-except ImportError:
-    VERTEX_AI_SDK_AVAILABLE = False
-    logging.warning("Biblioteca google-cloud-aiplatform não encontrada. Geração de imagem com Vertex AI Imagen estará desabilitada.")
-    logging.warning("Para habilitar, adicione 'google-cloud-aiplatform' ao requirements.txt e instale.")
+# Só módulos leves no topo. moviepy, numpy, PIL, gTTS e as bibliotecas do Google são importados
+# dentro dos estágios que os usam, para que --plan e o modo batch não paguem esse custo de inicialização.
+from narration import synthesize_narrations
+from disk_cache import DiskCache
+from batch_runner import run_batch
+from run_manifest import RunManifest
+from upload_session import load_session, save_session, clear_session, backoff_delay, classify_status
+from metrics import METRICS
+
+# Carregados sob demanda (ver load_gtts / load_vertex_ai); podem ser substituídos em testes e no benchmark
+gTTS = None
+aiplatform = None
+VERTEX_AI_SDK_AVAILABLE = None # None = ainda não verificado
 
 
 logging.basicConfig(level=logging.INFO, stream=sys.stdout, format='%(asctime)s - %(levelname)s - %(message)s')
 SCOPES = ['https://www.googleapis.com/auth/youtube.upload']
+CAPTION_SCOPES = ['https://www.googleapis.com/auth/youtube.force-ssl'] # Exigido por captions.insert (upload_captions)
 
 # --- Constantes e Configurações ---
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -51,13 +36,32 @@ CLIENT_SECRET_FILE = os.path.join(CREDENTIALS_DIR, 'client_secret.json')
 TOKEN_FILE = os.path.join(CREDENTIALS_DIR, 'token.json')
 
 GENERATED_VIDEOS_DIR = os.path.join(BASE_DIR, 'generated_videos')
-GENERATED_IMAGES_DIR = os.path.join(BASE_DIR, 'generated_images') 
-GENERATED_AUDIO_DIR = os.path.join(BASE_DIR, 'temp_audio') 
 ASSETS_DIR = os.path.join(BASE_DIR, 'assets')
-TOPIC_FILE_PATH = os.path.join(BASE_DIR, 'topics.txt') # Arquivo com lista de temas
-HISTORY_FILE_PATH = os.path.join(BASE_DIR, 'topic_history.txt') # Arquivo para histórico de temas
+LOGS_DIR = os.path.join(BASE_DIR, 'logs')
+LEGENDAS_DIR = os.path.join(BASE_DIR, 'legendas') # Legendas SRT/WebVTT geradas a partir da linha do tempo do vídeo
+RUNS_DIR = os.path.join(BASE_DIR, 'runs') # Um diretório + manifest.json por execução (permite --resume)
+TOPIC_FILE_PATH = os.path.join(BASE_DIR, 'topics.txt') # Arquivo com lista de temas (novos temas são importados para o topics.db)
+HISTORY_FILE_PATH = os.path.join(BASE_DIR, 'topic_history.txt') # Histórico legado, importado uma vez para o topics.db
+TOPIC_DB_PATH = os.path.join(BASE_DIR, 'topics.db') # Temas e histórico por canal (SQLite)
+FACTS_SOURCE_DIR = os.path.join(BASE_DIR, 'facts') # Fatos em JSONL/CSV (topic, language, text), importados para o facts.db
+CACHE_DIR = os.path.join(BASE_DIR, 'cache') # Caches persistentes entre execuções (preservado pelo workflow)
+TTS_CACHE_DIR = os.path.join(CACHE_DIR, 'tts')
+TTS_CACHE_MAX_BYTES = int(os.environ.get("TTS_CACHE_MAX_MB", "200")) * 1024 * 1024
+IMAGE_CACHE_DIR = os.path.join(CACHE_DIR, 'imagen')
+IMAGE_CACHE_MAX_BYTES = int(os.environ.get("IMAGE_CACHE_MAX_MB", "1024")) * 1024 * 1024
+FACTS_DB_PATH = os.path.join(CACHE_DIR, 'facts.db') # Acervo de fatos indexado (reconstruível a partir de facts/)
+DEDUP_DB_PATH = os.path.join(CACHE_DIR, 'dedup.db') # Índice LSH de quase-duplicatas (reconstruível a partir dos textos publicados no topics.db)
+NEAR_DUPLICATE_THRESHOLD = 0.7 # Similaridade (Jaccard estimada) a partir da qual fato/título conta como já publicado
+SLIDE_CACHE_DIR = os.path.join(CACHE_DIR, 'slides') # Imagens já normalizadas para 1080x1920 (e fontes maiores do Ken Burns)
+SLIDE_CACHE_MAX_BYTES = int(os.environ.get("SLIDE_CACHE_MAX_MB", "512")) * 1024 * 1024
+MUSIC_CACHE_DIR = os.path.join(CACHE_DIR, 'music') # Músicas já decodificadas (PCM .npy, mapeado em memória)
+MUSIC_CACHE_MAX_BYTES = int(os.environ.get("MUSIC_CACHE_MAX_MB", "256")) * 1024 * 1024
+IMAGE_CACHE_TTL_SECONDS = float(os.environ["IMAGE_CACHE_TTL_DAYS"]) * 86400 if os.environ.get("IMAGE_CACHE_TTL_DAYS") else None # Sem TTL por padrão
 HISTORY_LENGTH = 10 # Não repetir os últimos X temas (ajuste se sua lista de tópicos for pequena)
 
+UPLOAD_CHUNK_SIZE = 16 * 1024 * 1024 # Múltiplo de 256 KiB; cada chunk confirmado é um ponto de retomada
+STREAMING_RENDER_MODES = ("pipe", "moviepy") # Modos que escrevem o MP4 fragmentado à medida que codificam
+
 FPS_VIDEO = 24
 MAX_WORDS_PER_LINE_TTS = 10 
 MAX_CHARS_PER_LINE_IMAGE = 40
@@ -73,25 +77,77 @@ CHANNEL_CONFIGS = {
         ],
         "default_music_if_list_empty": None,
         "music_volume": 0.07,
+        "music_ducking": True, # Abaixa a música enquanto há narração e volta nas pausas entre os fatos
+        "music_duck_gain": 0.5, # Fração do volume da música durante a fala
         "gtts_language": "pt-br", 
         "text_font_path_for_image_placeholder": None, 
         "num_facts_per_video": 15, # Ajuste para duração: 15 fatos * ~9s/fato = ~2.25 min. Para 3-7 min, use 20-45.
         "duration_per_fact_slide_min": 7, 
         "pause_after_fact": 1.2, 
+        "tts_max_workers": 4, # Narrações sintetizadas em paralelo
+        "tts_requests_per_second": 3.0, # Limite de requisições ao gTTS (None = sem limite)
+        "tts_max_retries": 2, # Retentativas por fato antes de descartá-lo
+        "tts_engine": "gtts", # "gtts" (rede), "espeak" (espeak-ng local, offline) ou "piper" (Piper local, offline; exige piper_model_path)
+        "tts_voice": None, # Voz do espeak-ng (None = gtts_language) ou id do locutor do Piper
+        "piper_model_path": None, # Modelo .onnx do Piper (o .onnx.json deve estar ao lado)
+        "narration_mode": "per_fact", # "per_fact" (um áudio por fato, em paralelo), "script" (roteiro inteiro numa síntese, fatos separados pelas pausas) ou "batch" (motor local sintetiza todos os fatos de uma vez direto em PCM)
+        "render_mode": "still", # "still" (segmento por imagem, sem composição quadro a quadro), "pipe" (quadros crus direto no stdin do ffmpeg, com transições), "parallel" (chunks do moviepy em vários processos; não combina com stream_upload) ou "moviepy"
+        "slide_transition": 0.0, # Segundos de crossfade entre slides (só no modo "pipe"; 0 = corte seco)
+        "parallel_encode_workers": None, # Processos do modo "parallel" (None = número de núcleos)
+        "still_encoder_preset": "ultrafast", # "veryfast" gera arquivos bem menores (upload mais rápido) a um custo de CPU maior
+        "upload_chunk_size": 16 * 1024 * 1024, # Tamanho do chunk do upload resumable (múltiplo de 256 KiB)
+        "upload_max_retries": 10, # Falhas seguidas toleradas por chunk (backoff exponencial com jitter)
+        "write_captions": True, # Gera legendas/<vídeo>.srt e .vtt a partir dos tempos de cada fato (sem reconhecimento de fala)
+        "burn_captions": False, # True = legenda queimada nos slides com imagem (os placeholders já mostram o texto)
+        "upload_captions": False, # True = envia o .srt junto com o vídeo (o token.json precisa do escopo youtube.force-ssl)
+        "caption_max_chars": 84, # Caracteres por legenda na tela (até duas linhas)
+        "ken_burns": False, # True = zoom/pan lento em cada slide (exige codificar os quadros; mais lento que slides estáticos)
+        "ken_burns_zoom": 1.12, # Fonte do Ken Burns = slide x zoom (amplitude máxima do movimento)
+        "stream_upload": False, # True = envia o vídeo ao YouTube enquanto ele ainda está sendo codificado (MP4 fragmentado). Só "pipe" e "moviepy" escrevem o arquivo durante a codificação; com "still" ou "parallel" o render em streaming usa "pipe"
+        "topic_selection": "weighted", # "weighted" (sorteio proporcional ao peso do tema) ou "lru" (tema usado há mais tempo)
+        "metrics_prometheus": False, # True = além do JSON, grava logs/metrics_<run_id>.prom (formato texto do Prometheus)
         "category_id": "27", 
         "youtube_privacy_status": "public", 
         "gcp_project_id": os.environ.get("GCP_PROJECT_ID"),
         "gcp_location": os.environ.get("GCP_LOCATION", "us-central1"),
-        "imagen_model_name": "imagegeneration@006" 
+        "imagen_model_name": "imagegeneration@006",
+        "imagen_aspect_ratio": "9:16"
     },
 }
 
-def get_authenticated_service(client_secrets_path, token_path):
+def load_gtts():
+    global gTTS
+    if gTTS is None:
+        from gtts import gTTS as gtts_class
+        gTTS = gtts_class
+    return gTTS
+
+def load_vertex_ai():
+    """Importa o SDK do Vertex AI (Imagen) na primeira geração de imagem; retorna None se indisponível."""
+    global aiplatform, VERTEX_AI_SDK_AVAILABLE
+    if VERTEX_AI_SDK_AVAILABLE is None:
+        try:
+            from google.cloud import aiplatform as aiplatform_module
+            aiplatform = aiplatform_module
+            VERTEX_AI_SDK_AVAILABLE = True
+            logging.info("Biblioteca google-cloud-aiplatform encontrada e importada.")
+        except ImportError:
+            VERTEX_AI_SDK_AVAILABLE = False
+            logging.warning("Biblioteca google-cloud-aiplatform não encontrada. Geração de imagem com Vertex AI Imagen estará desabilitada.")
+            logging.warning("Para habilitar, adicione 'google-cloud-aiplatform' ao requirements.txt e instale.")
+    return aiplatform if VERTEX_AI_SDK_AVAILABLE else None
+
+def get_authenticated_service(client_secrets_path, token_path, scopes=SCOPES):
+    from googleapiclient.discovery import build
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+
     logging.info(f"DEBUG_PRINT: [FUNC_AUTH] Tentando autenticar com token: {token_path} e client_secrets: {client_secrets_path}")
     creds = None
     if os.path.exists(token_path):
         try:
-            creds = Credentials.from_authorized_user_file(token_path, SCOPES)
+            creds = Credentials.from_authorized_user_file(token_path, scopes)
             logging.info(f"Credenciais carregadas de {token_path}")
         except Exception as e:
             logging.warning(f"Não foi possível carregar token de {token_path}: {e}. Tentando fluxo de autorização.")
@@ -113,7 +169,7 @@ def get_authenticated_service(client_secrets_path, token_path):
                 return None
             logging.info("Executando novo fluxo de autorização (pode ser interativo para ambiente local)...")
             try:
-                flow = InstalledAppFlow.from_client_secrets_file(client_secrets_path, SCOPES)
+                flow = InstalledAppFlow.from_client_secrets_file(client_secrets_path, scopes)
                 if "GITHUB_ACTIONS" in os.environ: 
                      logging.error("ERRO: Novo fluxo de autorização interativo não é suportado em CI. Pré-autorize o token.json.")
                      return None
@@ -138,56 +194,69 @@ def get_authenticated_service(client_secrets_path, token_path):
     logging.info("Serviço YouTube autenticado com sucesso.")
     return build('youtube', 'v3', credentials=creds)
 
-def choose_topic(topic_file, history_file, history_len):
-    if not os.path.exists(topic_file):
-        logging.error(f"Arquivo de tópicos '{topic_file}' não encontrado!")
-        return "Curiosidades Gerais" 
-    
-    with open(topic_file, 'r', encoding='utf-8') as f:
-        all_topics = [line.strip() for line in f if line.strip()]
-    
-    if not all_topics:
-        logging.error(f"Arquivo de tópicos '{topic_file}' está vazio!")
-        return "Curiosidades Aleatórias" 
-
-    recent_history = []
-    if os.path.exists(history_file):
-        with open(history_file, 'r', encoding='utf-8') as hf:
-            recent_history = [line.strip() for line in hf]
-            # Pega apenas os N últimos para evitar repetição recente
-            recent_history = recent_history[-history_len:] 
-            
-    available_topics = [topic for topic in all_topics if topic not in recent_history]
-    
-    selected_topic = None
-    if not available_topics: 
-        logging.warning(f"Todos os {len(all_topics)} tópicos foram usados nos últimos {history_len} vídeos. Reciclando da lista completa.")
-        if all_topics: # Garante que all_topics não está vazio
-            selected_topic = random.choice(all_topics)
-        else: # Caso extremo: all_topics está vazio (embora já verificado acima)
-            selected_topic = "Fatos Diversos" 
-    else:
-        selected_topic = random.choice(available_topics)
-        
-    # Atualiza o histórico
+def choose_topic(channel_name, history_len, strategy="weighted", record_history=True):
+    """
+    Escolhe o tema no topics.db (ver topic_store.py). record_history=False (modo --plan) abre o banco
+    somente leitura: não consome o tema, não sincroniza topics.txt nem importa o histórico legado.
+    """
+    from topic_store import TopicStore
+    if not record_history and not os.path.exists(TOPIC_DB_PATH):
+        logging.warning(f"Banco de temas '{TOPIC_DB_PATH}' ainda não existe (é criado na primeira execução; --plan não o cria).")
+        return "Curiosidades Gerais"
     try:
-        with open(history_file, 'a', encoding='utf-8') as hf:
-            hf.write(f"{selected_topic}\n")
-        # Opcional: Limpa o histórico antigo para não crescer indefinidamente demais
-        with open(history_file, 'r', encoding='utf-8') as hf:
-            lines = hf.readlines()
-        # Mantém um histórico um pouco maior que o usado para verificação, para dar margem
-        if len(lines) > max(history_len * 2, 20): # Ex: mantém no máximo 20 ou 2x o history_len
-            with open(history_file, 'w', encoding='utf-8') as hf:
-                hf.writelines(lines[-(max(history_len * 2, 20)):])
+        with TopicStore(TOPIC_DB_PATH, read_only=not record_history) as store:
+            if record_history:
+                store.sync_topics_file(TOPIC_FILE_PATH)
+                store.import_history_file(HISTORY_FILE_PATH, channel_name)
+            selected_topic = store.choose(channel_name, history_len, strategy=strategy, record=record_history)
     except Exception as e:
-        logging.error(f"Erro ao atualizar o arquivo de histórico '{history_file}': {e}")
-        
-    logging.info(f"Tópico escolhido: {selected_topic}")
+        logging.error(f"Erro ao acessar o banco de temas '{TOPIC_DB_PATH}': {e}", exc_info=True)
+        return "Curiosidades Gerais"
+    if not selected_topic:
+        logging.error(f"Nenhum tema ativo no banco de temas (importe '{TOPIC_FILE_PATH}').")
+        return "Curiosidades Aleatórias"
+    logging.info(f"Tópico escolhido{'' if record_history else ' (sem registrar no histórico)'}: {selected_topic}")
     return selected_topic
 
-def get_facts_for_video(topic, language, num_facts=1):
+def open_fact_store(read_only=False):
+    # read_only (--plan): só lê o facts.db já existente, sem importar facts/ (FileNotFoundError se ele não existir)
+    from fact_store import FactStore
+    store = FactStore(FACTS_DB_PATH, history_db_path=TOPIC_DB_PATH, read_only=read_only)
+    if not read_only:
+        store.sync_sources(FACTS_SOURCE_DIR)
+    return store
+
+def open_dedup_index(read_only=False):
+    # Só os textos publicados (fatos e títulos) ficam no topics.db; assinaturas e buckets ficam no cache
+    from near_duplicates import NearDuplicateIndex
+    return NearDuplicateIndex(DEDUP_DB_PATH, history_db_path=TOPIC_DB_PATH, threshold=NEAR_DUPLICATE_THRESHOLD,
+                              read_only=read_only)
+
+def get_facts_for_video(topic, language, num_facts=1, channel=None, read_only=False):
     logging.info(f"Obtendo {num_facts} fatos para o TEMA: '{topic}' (Idioma: {language})")
+
+    # Banco de fatos (ver fact_store.py): só fatos que o canal ainda não publicou, sem repetição
+    try:
+        with open_fact_store(read_only) as store:
+            stored_facts = store.sample_unused(topic, language, num_facts * 2, channel=channel)
+    except Exception as e:
+        logging.warning(f"Banco de fatos indisponível ({FACTS_DB_PATH}): {e}")
+        stored_facts = []
+    if stored_facts:
+        # Descarta quase-duplicatas de fatos já publicados (por qualquer canal) e repetições dentro do próprio lote
+        try:
+            with open_dedup_index(read_only) as index:
+                candidates = len(stored_facts)
+                stored_facts = index.filter_new(stored_facts, "fact", limit=num_facts)
+            if len(stored_facts) < min(candidates, num_facts):
+                logging.info(f"{candidates - len(stored_facts)} fato(s) descartado(s) como quase-duplicata.")
+        except Exception as e:
+            logging.warning(f"Índice de quase-duplicatas indisponível: {e}")
+            stored_facts = stored_facts[:num_facts]
+    if stored_facts:
+        if len(stored_facts) < num_facts:
+            logging.warning(f"Só {len(stored_facts)} fato(s) inédito(s) para '{topic}' (pedidos: {num_facts}). O vídeo terá menos fatos.")
+        return stored_facts
     
     # ----- INÍCIO DO PLACEHOLDER DE FATOS -----
     # Esta seção ainda é um placeholder. Para conteúdo real, você precisará:
@@ -254,112 +323,87 @@ def get_facts_for_video(topic, language, num_facts=1):
     return selected_facts
 
 
-def generate_audio_from_text(text, lang, audio_file_path):
-    # ... (código mantido) ...
-    logging.info(f"Gerando áudio para: '{text[:50]}...' (Idioma: {lang})")
+def get_tts_engine(config):
+    from tts_engines import build_engine
+    return build_engine(config, load_gtts)
+
+def generate_audio_from_text(text, lang, audio_file_path, cache=None, engine=None):
+    engine = engine or get_tts_engine({})
+    cache_key = DiskCache.make_key(text, lang=lang, engine=engine.name, slow=False, **engine.cache_params()) if cache else None
+    if cache and cache.fetch_to(cache_key, audio_file_path):
+        logging.info(f"Áudio obtido do cache para: '{text[:50]}...' -> {audio_file_path}")
+        return audio_file_path
+    logging.info(f"Gerando áudio para: '{text[:50]}...' (Idioma: {lang}, motor: {engine.name})")
     try:
-        tts = gTTS(text=text, lang=lang, slow=False)
-        os.makedirs(os.path.dirname(audio_file_path), exist_ok=True)
-        tts.save(audio_file_path)
+        with METRICS.span("tts.request", chars=len(text), engine=engine.name):
+            os.makedirs(os.path.dirname(audio_file_path), exist_ok=True)
+            engine.save(text, lang, audio_file_path)
+        METRICS.incr("tts.requests")
         if os.path.exists(audio_file_path) and os.path.getsize(audio_file_path) > 0:
             logging.info(f"Áudio salvo em: {audio_file_path}")
+            if cache:
+                try: cache.put_file(cache_key, audio_file_path)
+                except Exception as e_cache: logging.warning(f"Falha ao gravar áudio no cache: {e_cache}")
             return audio_file_path
         logging.error(f"Falha ao salvar áudio ou arquivo vazio: {audio_file_path}")
     except Exception as e:
-        logging.error(f"Erro em gTTS para '{lang}': {e}", exc_info=True)
+        logging.error(f"Erro no TTS '{engine.name}' para '{lang}': {e}", exc_info=True)
     return None
 
 def generate_dynamic_image_placeholder(fact_text, width, height, font_path_config, duration, fps_value):
-    # ... (código mantido) ...
+    import numpy as np
+    from moviepy.editor import ColorClip, ImageClip
+    from slide_renderer import render_fact_slide, resolve_font_path
+    from slide_assets import SlideImage
     logging.info(f"Gerando imagem PLACEHOLDER para: '{fact_text[:30]}...'")
-    temp_img_path = None 
     try:
         r1, g1, b1 = random.randint(40, 120), random.randint(40, 120), random.randint(40, 120)
         r2, g2, b2 = min(255, r1 + random.randint(40,80)), min(255, g1 + random.randint(40,80)), min(255, b1 + random.randint(40,80))
-        
-        img = PILImage.new("RGB", (width, height))
-        draw = PILImageDraw.Draw(img)
-        for y_grad in range(height):
-            r_curr = int(r1 + (r2 - r1) * y_grad / height); g_curr = int(g1 + (g2 - g1) * y_grad / height); b_curr = int(b1 + (b2 - b1) * y_grad / height)
-            draw.line([(0, y_grad), (width, y_grad)], fill=(r_curr, g_curr, b_curr))
-
-        padding = int(width * 0.08); max_text_width = width - 2 * padding
-        font_to_use = None; current_font_size = int(height / 17) 
-        try:
-            if font_path_config and os.path.exists(font_path_config):
-                font_to_use = PILImageFont.truetype(font_path_config, current_font_size)
-                logging.info(f"Usando fonte customizada para placeholder: {font_path_config} com tamanho {current_font_size}")
-            else:
-                if font_path_config: logging.warning(f"Fonte '{font_path_config}' não encontrada.")
-                try:
-                    arial_path = os.path.join(ASSETS_DIR, "fonts", "arial.ttf") 
-                    if os.path.exists(arial_path):
-                        font_to_use = PILImageFont.truetype(arial_path, current_font_size)
-                        logging.info(f"Usando fonte Arial de '{arial_path}' para placeholder.")
-                    else: 
-                        logging.warning(f"Arial não encontrada em '{arial_path}'. Usando fonte padrão Pillow.")
-                        font_to_use = PILImageFont.load_default(size=current_font_size)
-                except IOError: 
-                    logging.warning(f"Erro ao carregar Arial. Usando fonte padrão Pillow.")
-                    font_to_use = PILImageFont.load_default(size=current_font_size)
-        except Exception as e_font: 
-            logging.warning(f"Erro geral ao carregar fonte '{font_path_config}': {e_font}. Usando padrão Pillow.")
-            current_font_size = max(15, int(height / 22)) 
-            font_to_use = PILImageFont.load_default(size=current_font_size)
-
-
-        lines = []; words = fact_text.split(); current_line = ""
-        for word in words:
-            try: 
-                bbox_test = draw.textbbox((0,0), current_line + word + " ", font=font_to_use)
-                text_w = bbox_test[2] - bbox_test[0]
-            except AttributeError: text_w = draw.textlength(current_line + word + " ", font=font_to_use) 
 
-            if text_w <= max_text_width: current_line += word + " "
-            else: lines.append(current_line.strip()); current_line = word + " "
-        lines.append(current_line.strip())
-        
-        line_heights = []
-        for line in lines:
-            try: bbox_line = draw.textbbox((0,0), line, font=font_to_use); line_h = bbox_line[3] - bbox_line[1]
-            except AttributeError: ascent, descent = font_to_use.getmetrics(); line_h = ascent + descent
-            line_heights.append(line_h)
-
-        spacing = int(current_font_size * 0.2) 
-        total_text_height = sum(line_heights) + (len(lines) - 1) * spacing
-        
-        y_text_start = (height - total_text_height) / 2
-        text_color=(255, 255, 255); stroke_color=(0,0,0); stroke_width_val=max(1, int(current_font_size/20))
-        
-        current_y = y_text_start
-        for i, line in enumerate(lines):
-            try: bbox_line = draw.textbbox((0,0), line, font=font_to_use); line_w = bbox_line[2] - bbox_line[0]
-            except AttributeError: line_w = draw.textlength(line, font=font_to_use)
-            x_text = (width - line_w) / 2
-            for dx_s in range(-stroke_width_val, stroke_width_val + 1):
-                for dy_s in range(-stroke_width_val, stroke_width_val + 1):
-                    if dx_s*dx_s + dy_s*dy_s <= stroke_width_val*stroke_width_val :
-                         draw.text((x_text + dx_s, current_y + dy_s), line, font=font_to_use, fill=stroke_color, align="center")
-            draw.text((x_text, current_y), line, font=font_to_use, fill=text_color, align="center")
-            current_y += line_heights[i] + spacing
-
-        temp_img_dir = GENERATED_IMAGES_DIR; os.makedirs(temp_img_dir, exist_ok=True)
-        temp_img_path = os.path.join(temp_img_dir, f"placeholder_{random.randint(1000,9999)}_{int(time.time()*1000)}.png")
-        img.save(temp_img_path)
-        image_clip = ImageClip(temp_img_path).set_duration(duration).set_fps(fps_value) 
-        return image_clip, temp_img_path
+        # Gradiente vetorizado, fonte e paleta em cache (ver slide_renderer.py)
+        font_path = resolve_font_path(font_path_config, os.path.join(ASSETS_DIR, "fonts", "arial.ttf"))
+        img = render_fact_slide(fact_text, width, height, font_path, (r1, g1, b1), (r2, g2, b2))
+
+        # O slide vai direto da memória para o ImageClip, sem PNG intermediário
+        image_clip = ImageClip(np.asarray(img)).set_duration(duration).set_fps(fps_value)
+        return image_clip, SlideImage("placeholder", img)
     except Exception as e:
         logging.error(f"Erro ao gerar imagem placeholder: {e}", exc_info=True)
-        return ColorClip(size=(width, height), color=(random.randint(50,100),random.randint(50,100),random.randint(50,100)), duration=duration).set_fps(fps_value), None
+        return ColorClip(size=(width, height), color=(random.randint(50,100),random.randint(50,100),random.randint(50,100)), duration=duration).set_fps(fps_value), SlideImage("placeholder", None)
+
+def build_imagen_prompt(fact_text):
+    return (
+        f"A visually stunning and captivating image (9:16 aspect ratio for YouTube Shorts) "
+        f"that creatively illustrates the interesting fact: \"{fact_text}\". "
+        f"Style: digital art, cinematic lighting, eye-catching, vibrant. Avoid text overlays on the image itself."
+    )
 
-def generate_image_with_vertex_ai_imagen(fact_text, duration, config, font_path_for_fallback, fps_value):
-    # ... (código mantido) ...
+def _image_clip_for_shorts(image, duration, fps_value, slide_cache=None):
+    # Redimensiona e corta uma única vez (e guarda em cache); o ImageClip resultante é estático
+    from moviepy.editor import ImageClip
+    from slide_assets import normalize_slide
+    return ImageClip(normalize_slide(image, 1080, 1920, cache=slide_cache)).set_duration(duration).set_fps(fps_value)
+
+def generate_image_with_vertex_ai_imagen(fact_text, duration, config, font_path_for_fallback, fps_value, cache=None, slide_cache=None):
     logging.info(f"Tentando gerar imagem com Vertex AI para: '{fact_text[:30]}...'")
     project_id = config.get("gcp_project_id")
     location = config.get("gcp_location")
     imagen_model_name = config.get("imagen_model_name", "imagegeneration@006") 
+    aspect_ratio = config.get("imagen_aspect_ratio", "9:16")
+    prompt = build_imagen_prompt(fact_text)
+
+    # O cache é consultado antes de qualquer chamada ao SDK (e funciona mesmo sem ele instalado);
+    # a imagem segue em memória (bytes), sem cópia para um arquivo temporário
+    from slide_assets import SlideImage
+    cache_key = DiskCache.make_key(prompt, model=imagen_model_name, aspect_ratio=aspect_ratio) if cache else None
+    if cache:
+        image_bytes = cache.read_bytes(cache_key)
+        if image_bytes:
+            logging.info(f"Imagem Vertex AI obtida do cache ({len(image_bytes) // 1024} KiB).")
+            return _image_clip_for_shorts(image_bytes, duration, fps_value, slide_cache), SlideImage("cache", image_bytes)
 
-    if not VERTEX_AI_SDK_AVAILABLE:
+    aiplatform = load_vertex_ai()
+    if aiplatform is None:
         logging.warning("SDK Vertex AI (`google-cloud-aiplatform`) não disponível. Usando placeholder de imagem.")
         return generate_dynamic_image_placeholder(fact_text, 1080, 1920, font_path_for_fallback, duration, fps_value)
 
@@ -372,38 +416,75 @@ def generate_image_with_vertex_ai_imagen(fact_text, duration, config, font_path_
     try:
         aiplatform.init(project=project_id, location=location)
         model = aiplatform.ImageGenerationModel.from_pretrained(imagen_model_name)
-        prompt = (
-            f"A visually stunning and captivating image (9:16 aspect ratio for YouTube Shorts) "
-            f"that creatively illustrates the interesting fact: \"{fact_text}\". "
-            f"Style: digital art, cinematic lighting, eye-catching, vibrant. Avoid text overlays on the image itself."
-        )
         logging.info(f"Prompt para Imagen: {prompt}")
-        response = model.generate_images(prompt=prompt, number_of_images=1)
+        response = model.generate_images(prompt=prompt, number_of_images=1, aspect_ratio=aspect_ratio)
         
         if response.images:
             image_obj = response.images[0]
-            temp_img_dir = GENERATED_IMAGES_DIR; os.makedirs(temp_img_dir, exist_ok=True)
-            gen_img_path = os.path.join(temp_img_dir, f"vertex_img_{int(time.time()*1000)}.png")
-            
-            if hasattr(image_obj, '_image_bytes') and image_obj._image_bytes:
-                 with open(gen_img_path, "wb") as f: f.write(image_obj._image_bytes)
-            elif hasattr(image_obj, 'save'): image_obj.save(location=gen_img_path)
-            else:
-                logging.error("Não foi possível salvar a imagem do Vertex AI."); return generate_dynamic_image_placeholder(fact_text, 1080, 1920, font_path_for_fallback, duration, fps_value)
-
-            logging.info(f"Imagem gerada com Vertex AI e salva em: {gen_img_path}")
-            img_clip = ImageClip(gen_img_path).set_duration(duration).set_fps(fps_value)
-            final_img_clip = img_clip.resize(height=1920) 
-            if final_img_clip.w > 1080: final_img_clip = final_img_clip.crop(x_center=final_img_clip.w/2, width=1080)
-            elif final_img_clip.w < 1080: final_img_clip = final_img_clip.resize(width=1080)
-            if final_img_clip.h > 1920: final_img_clip = final_img_clip.crop(y_center=final_img_clip.h/2, height=1920)
-            return final_img_clip, gen_img_path 
+            image_bytes = getattr(image_obj, '_image_bytes', None)
+            if not image_bytes and hasattr(image_obj, 'save'):
+                # SDK sem acesso aos bytes: salva no workspace da execução e lê de volta
+                from workspace import scratch_dir
+                with scratch_dir("vertex_img_") as img_dir:
+                    gen_img_path = os.path.join(img_dir, "image.png")
+                    image_obj.save(location=gen_img_path)
+                    with open(gen_img_path, "rb") as f: image_bytes = f.read()
+            if not image_bytes:
+                logging.error("Não foi possível obter a imagem do Vertex AI."); return generate_dynamic_image_placeholder(fact_text, 1080, 1920, font_path_for_fallback, duration, fps_value)
+
+            logging.info(f"Imagem gerada com Vertex AI ({len(image_bytes) // 1024} KiB, mantida em memória).")
+            if cache:
+                try: cache.put_bytes(cache_key, image_bytes)
+                except Exception as e_cache: logging.warning(f"Falha ao gravar imagem no cache: {e_cache}")
+            return _image_clip_for_shorts(image_bytes, duration, fps_value, slide_cache), SlideImage("vertex", image_bytes)
         else:
             logging.error("Vertex AI Imagen API não retornou imagens."); return generate_dynamic_image_placeholder(fact_text, 1080, 1920, font_path_for_fallback, duration, fps_value)
     except Exception as e:
         logging.error(f"Erro ao gerar imagem com Vertex AI Imagen: {e}", exc_info=True); return generate_dynamic_image_placeholder(fact_text, 1080, 1920, font_path_for_fallback, duration, fps_value)
 
-def create_video_from_content(facts, narration_audio_files, channel_config, channel_title="Video"):
+def load_narration_segments(narration_audio_files, narration_offsets=None):
+    """
+    PCM da narração de cada fato (None quando inválida). Com offsets, os segmentos são fatias
+    de um único áudio (modos "script" e "batch"), decodificado uma vez; sem eles, um arquivo por fato.
+    """
+    from audio_mix import decode_audio, to_float32
+    if narration_offsets:
+        try:
+            if narration_audio_files[0].endswith(".npy"): # PCM já decodificado (modos "script" e "batch"), mapeado sem cópia
+                import numpy as np
+                script_pcm = np.load(narration_audio_files[0], mmap_mode="r")
+            else:
+                script_pcm = decode_audio(narration_audio_files[0])
+        except Exception as e_decode:
+            logging.error(f"Falha ao decodificar a narração do roteiro: {e_decode}")
+            return [None] * len(narration_offsets)
+        return [to_float32(script_pcm[start:end]) for start, end in narration_offsets]
+    segments = []
+    for narration_file in narration_audio_files:
+        if not (narration_file and os.path.exists(narration_file) and os.path.getsize(narration_file) > 0):
+            segments.append(None); continue
+        try:
+            segments.append(decode_audio(narration_file))
+        except Exception as e_decode:
+            logging.warning(f"Falha ao decodificar narração '{narration_file}': {e_decode}.")
+            segments.append(None)
+    return segments
+
+def create_video_from_content(facts, narration_audio_files, channel_config, channel_title="Video",
+                              video_output_path=None, fragmented_output=False, narration_offsets=None):
+    # Intermediários dos slides (ex.: fontes do Ken Burns) num diretório do workspace, apagado mesmo se o render falhar
+    from workspace import scratch_dir
+    with scratch_dir("slides_") as slides_dir:
+        return _render_video_from_content(facts, narration_audio_files, channel_config, channel_title, video_output_path,
+                                          fragmented_output, narration_offsets, slides_dir)
+
+def _render_video_from_content(facts, narration_audio_files, channel_config, channel_title, video_output_path,
+                               fragmented_output, narration_offsets, slides_dir):
+    from moviepy.editor import concatenate_videoclips
+    from moviepy.audio.AudioClip import AudioArrayClip
+    from audio_mix import AUDIO_FPS, assemble_track, load_music_pcm, ducking_envelope, mix_music
+    from still_encoder import render_still_slides
+    from streaming_upload import FRAGMENTED_MP4_MOVFLAGS
     logging.info(f"--- Criando vídeo para '{channel_title}' com {len(facts)} fatos ---")
     W, H = 1080, 1920; FPS_VIDEO = 24
     default_slide_duration = channel_config.get("duration_per_fact_slide_min", 6)
@@ -414,100 +495,148 @@ def create_video_from_content(facts, narration_audio_files, channel_config, chan
 
     video_slide_clips = []
     audio_slide_segments = [] 
-    temp_image_paths_to_clean = []
+    slide_sample_counts = []
+    speech_spans = [] # (início, fim) da narração de cada slide na trilha, em amostras
+    caption_facts, caption_starts, caption_durations = [], [], []
+    timeline_position = 0.0
+    burn_captions = channel_config.get("burn_captions", False)
+    image_cache = DiskCache(IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_BYTES, extension=".png",
+                            ttl_seconds=IMAGE_CACHE_TTL_SECONDS, name="imagen")
+    slide_cache = DiskCache(SLIDE_CACHE_DIR, SLIDE_CACHE_MAX_BYTES, extension=".png", name="slides")
+    ken_burns = channel_config.get("ken_burns", False)
     
+    narration_segments = load_narration_segments(narration_audio_files, narration_offsets)
     for i, fact_text in enumerate(facts):
-        narration_file = narration_audio_files[i]
-        if not (narration_file and os.path.exists(narration_file) and os.path.getsize(narration_file) > 0):
+        narration_pcm = narration_segments[i]
+        if narration_pcm is None or not len(narration_pcm):
             logging.warning(f"Narração inválida para '{fact_text[:30]}...'. Pulando."); continue
+        narration_duration = len(narration_pcm) / AUDIO_FPS
+        slide_duration = max(narration_duration + pause_after_fact, default_slide_duration)
+        slide_duration = round(slide_duration * FPS_VIDEO) / FPS_VIDEO # Alinha ao quadro para áudio e vídeo ficarem sincronizados
         
-        narration_clip_instance = AudioFileClip(narration_file)
-        slide_duration = max(narration_clip_instance.duration + pause_after_fact, default_slide_duration)
-        
-        image_clip_result, temp_img_path = generate_image_with_vertex_ai_imagen(
-            fact_text, slide_duration, channel_config,
-            font_for_placeholder, FPS_VIDEO
-        )
-        if temp_img_path: temp_image_paths_to_clean.append(temp_img_path)
+        with METRICS.span("image.generate", slide=i) as image_span:
+            image_clip_result, slide_image = generate_image_with_vertex_ai_imagen(
+                fact_text, slide_duration, channel_config,
+                font_for_placeholder, FPS_VIDEO, cache=image_cache, slide_cache=slide_cache
+            )
+            image_span["source"] = slide_image.source
+        METRICS.incr(f"images.{image_span['source']}")
         if image_clip_result is None: 
             logging.error(f"Imagem nula para '{fact_text[:30]}...'. Pulando."); continue
 
+        caption = (fact_text, font_for_placeholder) if burn_captions and image_span["source"] != "placeholder" else None
+        if ken_burns and slide_image.data is not None:
+            # Zoom/pan recortando uma fonte normalizada ~12% maior (gerada uma vez, em cache para imagens do Imagen)
+            from slide_assets import normalize_slide_file, ken_burns_clip
+            zoom = channel_config.get("ken_burns_zoom", 1.12)
+            motion_source = os.path.join(slides_dir, f"slide_{i:03d}_kb.png")
+            normalize_slide_file(slide_image.data, motion_source, int(round(W * zoom)), int(round(H * zoom)),
+                                 cache=slide_cache if image_span["source"] != "placeholder" else None)
+            image_clip_result = ken_burns_clip(motion_source, slide_duration, FPS_VIDEO, slide_index=len(video_slide_clips),
+                                               width=W, height=H, caption=caption)
+        elif caption:
+            # Legenda composta uma única vez sobre o quadro do slide, que continua estático
+            from moviepy.editor import ImageClip
+            from captions import burn_caption
+            image_clip_result = ImageClip(burn_caption(image_clip_result.get_frame(0), *caption))
+
         image_clip_result = image_clip_result.set_duration(slide_duration).set_fps(FPS_VIDEO)
+        caption_facts.append(fact_text)
+        caption_starts.append(timeline_position)
+        caption_durations.append(narration_duration)
+        timeline_position += slide_duration
         video_slide_clips.append(image_clip_result) 
 
-        narration_part_for_slide = narration_clip_instance.subclip(0, min(narration_clip_instance.duration, slide_duration))
-        current_segment_audio = None
-        if narration_part_for_slide.duration < slide_duration:
-            silence_needed = slide_duration - narration_part_for_slide.duration
-            n_channels = getattr(narration_part_for_slide, 'nchannels', 2)
-            audio_fps_val = getattr(narration_part_for_slide, 'fps', 44100)
-            make_frame_silent = lambda t: np.zeros(n_channels)
-            padding = AudioClip(make_frame_silent, duration=silence_needed, fps=audio_fps_val)
-            current_segment_audio = concatenate_audioclips([narration_part_for_slide, padding])
-        else:
-            current_segment_audio = narration_part_for_slide
-        
-        audio_slide_segments.append(current_segment_audio)
+        audio_slide_segments.append(narration_pcm)
+        slide_start_sample = sum(slide_sample_counts)
+        slide_sample_counts.append(int(round(slide_duration * AUDIO_FPS)))
+        speech_spans.append((slide_start_sample, slide_start_sample + min(len(narration_pcm), slide_sample_counts[-1])))
         
+    image_cache.log_stats()
+    record_cache_stats(image_cache)
+    slide_cache.log_stats()
+    record_cache_stats(slide_cache)
     if not video_slide_clips: logging.error("Nenhum slide de vídeo foi gerado."); return None
 
-    final_visual_part = concatenate_videoclips(video_slide_clips, method="compose").set_fps(FPS_VIDEO)
-    final_narration_audio = concatenate_audioclips(audio_slide_segments)
-    
-    total_video_duration_actual = final_visual_part.duration
-
-    if final_narration_audio.duration > total_video_duration_actual:
-        final_narration_audio = final_narration_audio.subclip(0, total_video_duration_actual)
-    elif final_narration_audio.duration < total_video_duration_actual:
-        silence_needed = total_video_duration_actual - final_narration_audio.duration
-        if silence_needed > 0.01: 
-            n_channels = getattr(final_narration_audio, 'nchannels', 2)
-            audio_fps_val = getattr(final_narration_audio, 'fps', 44100)
-            make_frame_silent = lambda t: np.zeros(n_channels)
-            padding = AudioClip(make_frame_silent, duration=silence_needed, fps=audio_fps_val)
-            final_narration_audio = concatenate_audioclips([final_narration_audio, padding])
-
-    final_video_with_narration = final_visual_part.set_audio(final_narration_audio)
-    
+    # Narração montada num único buffer PCM pré-alocado, com a música mixada por ganho vetorizado
+    final_audio_pcm = assemble_track(audio_slide_segments, slide_sample_counts)
+    total_video_duration_actual = sum(clip.duration for clip in video_slide_clips)
+
     selected_music_path = channel_config.get("selected_music_path")
     music_volume = channel_config.get("music_volume", 0.08)
-    final_product_video = final_video_with_narration
 
     if selected_music_path and os.path.exists(selected_music_path):
         try:
-            music_clip = AudioFileClip(selected_music_path).volumex(music_volume)
-            if music_clip.duration < total_video_duration_actual:
-                music_final = music_clip.loop(duration=total_video_duration_actual)
-            else:
-                music_final = music_clip.subclip(0, total_video_duration_actual)
-            
-            current_audio = final_product_video.audio 
-            if current_audio:
-                final_audio_track = CompositeAudioClip([current_audio, music_final])
-                final_product_video = final_product_video.set_audio(final_audio_track)
-            else: 
-                final_product_video = final_product_video.set_audio(music_final)
-            logging.info(f"Música '{os.path.basename(selected_music_path)}' adicionada.")
+            with METRICS.span("audio.music"):
+                music_cache = DiskCache(MUSIC_CACHE_DIR, MUSIC_CACHE_MAX_BYTES, extension=".npy", name="music")
+                music_pcm = load_music_pcm(selected_music_path, cache=music_cache)
+                envelope = None
+                if channel_config.get("music_ducking", True):
+                    envelope = ducking_envelope(len(final_audio_pcm), speech_spans, channel_config.get("music_duck_gain", 0.5))
+                mix_music(final_audio_pcm, music_pcm, music_volume, envelope)
+                record_cache_stats(music_cache)
+            logging.info(f"Música '{os.path.basename(selected_music_path)}' adicionada{' (com ducking sob a narração)' if envelope is not None else ''}.")
         except Exception as e_music:
             logging.warning(f"Erro ao adicionar música '{selected_music_path}': {e_music}.")
     
     os.makedirs(GENERATED_VIDEOS_DIR, exist_ok=True)
-    video_fname = f"{channel_title.replace(' ', '_').lower()}_{int(time.time())}.mp4"
-    video_output_path = os.path.join(GENERATED_VIDEOS_DIR, video_fname)
+    if not video_output_path:
+        video_output_path = build_video_output_path(channel_title)
+    # MP4 fragmentado é escrito só para frente, permitindo enviar chunks enquanto o encoder ainda escreve
+    movflags = FRAGMENTED_MP4_MOVFLAGS if fragmented_output else "+faststart"
     
-    logging.info(f"Escrevendo vídeo final: {video_output_path} (Duração: {final_product_video.duration:.2f}s)")
-    final_product_video.write_videofile(video_output_path, codec='libx264', audio_codec='aac', 
-                                     fps=FPS_VIDEO, preset='ultrafast', threads=(os.cpu_count() or 2), logger='bar')
+    render_mode = channel_config.get("render_mode", "still")
+    logging.info(f"Escrevendo vídeo final: {video_output_path} (Duração: {total_video_duration_actual:.2f}s, modo: {render_mode})")
+    if render_mode in ("still", "pipe", "parallel"):
+        try:
+            with METRICS.span("render.encode", mode=render_mode, slides=len(video_slide_clips)):
+                if render_mode == "pipe":
+                    # Um único ffmpeg recebe quadros crus; só as janelas de crossfade são compostas, num buffer pré-alocado
+                    from pipe_renderer import render_piped
+                    render_piped(video_slide_clips, final_audio_pcm, video_output_path, FPS_VIDEO,
+                                 transition=channel_config.get("slide_transition", 0.0),
+                                 preset=channel_config.get("still_encoder_preset", "ultrafast"), movflags=movflags)
+                elif render_mode == "still":
+                    # Slides estáticos: um segmento por imagem + concatenação por cópia de stream + mux do áudio
+                    render_still_slides(video_slide_clips, final_audio_pcm, video_output_path, FPS_VIDEO,
+                                        preset=channel_config.get("still_encoder_preset", "ultrafast"), movflags=movflags)
+                else:
+                    # Chunks nos limites dos slides codificados em paralelo (um processo por chunk) e unidos por cópia de stream
+                    from chunked_encoder import render_parallel_chunks
+                    render_parallel_chunks(video_slide_clips, final_audio_pcm, video_output_path, FPS_VIDEO,
+                                           max_workers=channel_config.get("parallel_encode_workers"), movflags=movflags)
+        except Exception as e_render:
+            if fragmented_output and os.path.exists(video_output_path):
+                # O upload em streaming já pode ter enviado bytes deste arquivo; não dá para reescrevê-lo.
+                logging.error(f"Falha no modo de render '{render_mode}' durante streaming: {e_render}", exc_info=True)
+                return None
+            logging.error(f"Falha no modo de render '{render_mode}': {e_render}. Usando composição do moviepy.", exc_info=True)
+            render_mode = "moviepy"
+    if render_mode not in ("still", "pipe", "parallel"):
+        final_visual_part = concatenate_videoclips(video_slide_clips, method="compose").set_fps(FPS_VIDEO)
+        final_product_video = final_visual_part.set_audio(AudioArrayClip(final_audio_pcm, fps=AUDIO_FPS))
+        with METRICS.span("render.encode", mode="moviepy", slides=len(video_slide_clips)):
+            final_product_video.write_videofile(video_output_path, codec='libx264', audio_codec='aac', 
+                                             fps=FPS_VIDEO, preset='ultrafast', threads=(os.cpu_count() or 2), logger='bar',
+                                             ffmpeg_params=['-movflags', movflags])
     logging.info("Vídeo final escrito.")
+    METRICS.incr("render.frames", int(round(total_video_duration_actual * FPS_VIDEO)))
+    METRICS.incr("render.slides", len(video_slide_clips))
 
-    for img_path in temp_image_paths_to_clean:
-        if os.path.exists(img_path):
-            try: os.remove(img_path); logging.info(f"Imagem temp removida: {img_path}")
-            except Exception as e: logging.warning(f"Falha ao remover img temp {img_path}: {e}")
-            
+    if channel_config.get("write_captions", True):
+        from captions import build_cues, write_captions
+        try:
+            cues = build_cues(caption_facts, caption_starts, caption_durations, channel_config.get("caption_max_chars", 84))
+            write_captions(cues, LEGENDAS_DIR, video_output_path)
+        except Exception as e_captions:
+            logging.warning(f"Falha ao gerar legendas: {e_captions}")
     return video_output_path
 
-def generate_video_title(facts, topic_title, channel_name="default"):
+def build_video_output_path(channel_title):
+    video_fname = f"{channel_title.replace(' ', '_').lower()}_{int(time.time())}.mp4"
+    return os.path.join(GENERATED_VIDEOS_DIR, video_fname)
+
+def generate_video_title(facts, topic_title, channel_name="default", preview_fact=None):
     if not facts:
         timestamp = datetime.date.today().strftime('%Y-%m-%d')
         # Usa o nome do canal se o tópico for muito genérico ou não existir
@@ -515,11 +644,12 @@ def generate_video_title(facts, topic_title, channel_name="default"):
         return f"{title_base} - Curiosidades do Dia {timestamp}"
 
     # Tenta usar o tópico no título de forma mais proeminente
-    if topic_title and topic_title.lower() not in ["curiosidades gerais", "curiosidades aleatórias", "fatos diversos"]:
+    if preview_fact is None and topic_title and topic_title.lower() not in ["curiosidades gerais", "curiosidades aleatórias", "fatos diversos"]:
         title_base = topic_title
-    else: # Se o tópico for genérico, usa parte do primeiro fato
-        first_fact_preview = " ".join(facts[0].split()[:5]) # Menos palavras do fato
-        if len(facts[0].split()) > 5: first_fact_preview += "..."
+    else: # Se o tópico for genérico (ou o título simples já foi publicado), usa parte de um fato
+        fact_for_title = preview_fact or facts[0]
+        first_fact_preview = " ".join(fact_for_title.split()[:5]) # Menos palavras do fato
+        if len(fact_for_title.split()) > 5: first_fact_preview += "..."
         title_base = f"{topic_title}: {first_fact_preview}"
     
     # Remove pontuação final comum para títulos
@@ -564,22 +694,76 @@ def generate_video_description(facts, config, channel_name_arg, topic_title):
     logging.info(f"Descrição gerada (primeiros 250 chars): '{description[:250]}...'")
     return description
 
-def upload_video(youtube_service, video_path, title, description, tags, category_id, privacy_status="public"):
+def generate_unpublished_title(facts, topic_title, channel_name, read_only=False):
+    """Título do vídeo; se um quase igual já foi publicado, tenta variações com o início de cada fato."""
+    title = generate_video_title(facts, topic_title, channel_name=channel_name)
+    try:
+        with open_dedup_index(read_only) as index:
+            if not index.is_duplicate(title, "title"):
+                return title
+            for fact in facts:
+                candidate = generate_video_title(facts, topic_title, channel_name=channel_name, preview_fact=fact)
+                if not index.is_duplicate(candidate, "title"):
+                    logging.info(f"Título '{title}' já publicado; usando variação '{candidate}'.")
+                    return candidate
+        logging.warning(f"Todas as variações do título '{title}' já foram publicadas. Mantendo o original.")
+    except Exception as e:
+        logging.warning(f"Índice de quase-duplicatas indisponível: {e}")
+    return title
+
+def record_used_facts(channel_name, facts, language, title=None):
+    """Marca os fatos (e o título) publicados para que não se repitam em vídeos futuros."""
+    try:
+        with open_fact_store() as store:
+            store.mark_used(channel_name, facts, language)
+    except Exception as e:
+        logging.warning(f"Falha ao registrar fatos usados no banco de fatos: {e}")
+    try:
+        with open_dedup_index() as index:
+            # Só entra o que ainda não tem quase-duplicata indexada (ex.: fatos placeholder repetidos)
+            index.add(index.filter_new(facts, "fact"), "fact", channel=channel_name)
+            if title: index.add(index.filter_new([title], "title"), "title", channel=channel_name)
+    except Exception as e:
+        logging.warning(f"Falha ao atualizar o índice de quase-duplicatas: {e}")
+
+def build_video_tags(config, chosen_topic):
+    # Prepara a lista de tags final
+    final_tags = list(config.get("video_tags_list", [])) 
+    topic_hashtag_clean = "".join(c for c in chosen_topic if c.isalnum()).lower()
+    if topic_hashtag_clean and topic_hashtag_clean not in final_tags:
+        final_tags.append(topic_hashtag_clean)
+    # Adiciona tags baseadas nos primeiros fatos, se desejar (exemplo)
+    # for fact in actual_facts_with_audio[:2]: # Pega palavras dos 2 primeiros fatos
+    #     words = fact.lower().split()
+    #     for word in words:
+    #         if len(word) > 4 and word.isalnum() and word not in final_tags and word not in ['sobre', 'fatos', 'curiosidades', topic_hashtag_clean]:
+    #             final_tags.append(word)
+    #             if len(final_tags) > 15: break # Limita o número de tags
+    #     if len(final_tags) > 15: break
+    return final_tags
+
+def upload_video(youtube_service, video_path, title, description, tags, category_id, privacy_status="public", media=None,
+                 chunksize=UPLOAD_CHUNK_SIZE, max_retries=10):
+    from googleapiclient.http import MediaFileUpload
+    from googleapiclient.errors import HttpError
+    from httplib2 import HttpLib2Error
+    from streaming_upload import StreamProducerError
     logging.info(f"--- Upload INICIADO para: '{title}', Status: '{privacy_status}' ---")
     print(f"PRINT: Iniciando upload para o vídeo: {title}") 
     sys.stdout.flush() 
     response_final_upload = None 
     try:
-        if not video_path or not os.path.exists(video_path):
+        if media is None and (not video_path or not os.path.exists(video_path)):
             logging.error(f"ERRO Upload: Arquivo de vídeo NÃO encontrado em {video_path}")
             print(f"PRINT ERROR: Arquivo de vídeo NÃO encontrado em {video_path}")
             sys.stderr.flush()
             return None
         
         logging.info(f"Caminho do vídeo para upload: {video_path}")
-        media = MediaFileUpload(video_path, mimetype='video/mp4', resumable=True)
-        logging.info("MediaFileUpload objeto criado.")
-        print("PRINT: MediaFileUpload objeto criado.")
+        if media is None:
+            media = MediaFileUpload(video_path, mimetype='video/mp4', chunksize=chunksize, resumable=True)
+        logging.info(f"{type(media).__name__} objeto criado.")
+        print(f"PRINT: {type(media).__name__} objeto criado.")
         sys.stdout.flush()
 
         request_body = {
@@ -594,36 +778,85 @@ def upload_video(youtube_service, video_path, title, description, tags, category
         logging.info("Objeto de requisição de upload do YouTube criado.")
         print("PRINT: Objeto de requisição de upload do YouTube criado.")
         sys.stdout.flush()
+
+        # Sessão resumable persistida em disco: uma execução reiniciada continua do último offset confirmado
+        persist_session = isinstance(media, MediaFileUpload)
+        session_created_at = None
+        if persist_session:
+            saved_uri, saved_offset = load_session(video_path, title)
+            if saved_uri:
+                logging.info(f"Retomando sessão de upload salva a partir do byte {saved_offset}: {saved_uri[:80]}...")
+                request.resumable_uri = saved_uri
+                request.resumable_progress = saved_offset
+                request._in_error_state = True # Faz o googleapiclient consultar o offset real no servidor antes de enviar
+                session_created_at = time.time()
         
         done = False
         upload_progress_counter = 0
-        max_retries_no_progress = 10 # Número de vezes que tentaremos next_chunk sem progresso aparente
+        consecutive_failures = 0
         
         while not done:
             upload_progress_counter += 1
             logging.info(f"Tentativa de next_chunk #{upload_progress_counter}")
-            print(f"PRINT: Tentativa de next_chunk #{upload_progress_counter}")
-            sys.stdout.flush()
             status, chunk_response = None, None # Resetar antes de cada chamada
+            offset_before = request.resumable_progress
             try:
-                status, chunk_response = request.next_chunk() 
-            except Exception as e_chunk:
-                logging.error(f"ERRO em request.next_chunk(): {e_chunk}", exc_info=True)
-                print(f"PRINT ERROR em next_chunk(): {e_chunk}")
+                with METRICS.span("upload.chunk", attempt=upload_progress_counter, offset=offset_before):
+                    status, chunk_response = request.next_chunk() 
+            except StreamProducerError as e_stream:
+                logging.error(f"Upload em streaming abortado: {e_stream}")
+                return None
+            except HttpError as e_http:
+                http_status = getattr(e_http.resp, 'status', None)
+                action = classify_status(http_status)
+                logging.error(f"HTTP {http_status} em next_chunk() ({action}): {e_http}")
+                print(f"PRINT ERROR em next_chunk(): HTTP {http_status} ({action})")
                 sys.stderr.flush()
-                # Considerar um número limitado de retentativas para erros de chunk aqui
-                if upload_progress_counter > max_retries_no_progress: # Exemplo, se falhar X vezes seguidas
-                    logging.error("Muitas falhas em next_chunk. Abortando upload.")
+                METRICS.incr("upload.errors")
+                if action == "fatal":
+                    if persist_session: clear_session(video_path)
                     return None
-                time.sleep(5 * upload_progress_counter) # Backoff exponencial simples
-                continue # Tenta o próximo chunk
-            
-            logging.info(f"next_chunk retornou: status={status}, chunk_response é None? {chunk_response is None}")
-            print(f"PRINT: next_chunk retornou: status={status}, chunk_response é None? {chunk_response is None}")
-            sys.stdout.flush()
+                if action == "restart":
+                    logging.warning("Sessão de upload expirada/inválida. Reiniciando upload do zero.")
+                    if persist_session: clear_session(video_path)
+                    request.resumable_uri = None; request.resumable_progress = 0; request._in_error_state = False
+                    session_created_at = None
+                consecutive_failures += 1
+                if consecutive_failures > max_retries:
+                    logging.error(f"Muitas falhas seguidas em next_chunk ({consecutive_failures}). Abortando upload.")
+                    return None
+                delay = backoff_delay(consecutive_failures)
+                logging.info(f"Nova tentativa de upload em {delay:.1f}s.")
+                time.sleep(delay)
+                continue
+            except (HttpLib2Error, ConnectionError, TimeoutError, OSError) as e_net:
+                # Falha de rede: o googleapiclient marca a requisição em estado de erro e consulta o offset na próxima chamada
+                logging.error(f"Erro de rede em next_chunk(): {e_net}", exc_info=True)
+                print(f"PRINT ERROR em next_chunk(): {e_net}")
+                sys.stderr.flush()
+                METRICS.incr("upload.errors")
+                consecutive_failures += 1
+                if consecutive_failures > max_retries:
+                    logging.error(f"Muitas falhas seguidas em next_chunk ({consecutive_failures}). Abortando upload.")
+                    return None
+                delay = backoff_delay(consecutive_failures)
+                logging.info(f"Nova tentativa de upload em {delay:.1f}s.")
+                time.sleep(delay)
+                continue
+
+            consecutive_failures = 0
+            # Bytes confirmados neste chunk; no último chunk o progresso não é atualizado, então usa o tamanho total
+            total_size = None
+            if chunk_response is not None:
+                total_size = media.size() or (os.path.getsize(video_path) if os.path.exists(video_path) else None)
+            METRICS.incr("upload.bytes", (total_size or request.resumable_progress) - offset_before)
+            METRICS.incr("upload.chunks")
+            if persist_session and request.resumable_uri and chunk_response is None:
+                session_created_at = session_created_at or time.time()
+                save_session(video_path, title, request.resumable_uri, request.resumable_progress, created_at=session_created_at)
 
             if status: 
-                logging.info(f"Upload: {int(status.progress() * 100)}%")
+                logging.info(f"Upload: {int(status.progress() * 100)}% ({request.resumable_progress} bytes confirmados)")
                 print(f"PRINT: Upload: {int(status.progress() * 100)}%")
                 sys.stdout.flush()
             if chunk_response is not None: 
@@ -632,13 +865,7 @@ def upload_video(youtube_service, video_path, title, description, tags, category
                 sys.stdout.flush()
                 done = True
                 response_final_upload = chunk_response
-            # Verifica se o upload está travado (sem status e sem resposta por muitas tentativas)
-            elif status is None and upload_progress_counter > max_retries_no_progress : 
-                logging.error(f"Muitas tentativas de next_chunk ({upload_progress_counter}) sem progresso ou resposta final. Abortando upload.")
-                print(f"PRINT ERROR: Muitas tentativas de next_chunk ({upload_progress_counter}) sem progresso ou resposta final.")
-                sys.stderr.flush()
-                done = True # Força a saída do loop
-                response_final_upload = None # Garante que seja None
+                if persist_session: clear_session(video_path)
         
         logging.info(f"Loop de upload concluído. response_final_upload é None? {response_final_upload is None}")
         print(f"PRINT: Loop de upload concluído. response_final_upload é None? {response_final_upload is None}")
@@ -670,73 +897,119 @@ def upload_video(youtube_service, video_path, title, description, tags, category
         sys.stderr.flush()
         return None
 
-def main(channel_name_arg):
-    logging.info(f"--- Iniciando para canal: {channel_name_arg} ---")
-    config = CHANNEL_CONFIGS.get(channel_name_arg)
-    if not config:
-        logging.error(f"Configuração para o canal '{channel_name_arg}' não encontrada."); sys.exit(1)
-
-    os.makedirs(GENERATED_VIDEOS_DIR, exist_ok=True)
-    os.makedirs(GENERATED_IMAGES_DIR, exist_ok=True)
-    os.makedirs(GENERATED_AUDIO_DIR, exist_ok=True)
-    os.makedirs(ASSETS_DIR, exist_ok=True)
-    os.makedirs(os.path.join(ASSETS_DIR, "fonts"), exist_ok=True)
-    os.makedirs(os.path.join(ASSETS_DIR, "music"), exist_ok=True)
+def save_narration_pcm(pcm, audio_dir, channel_name):
+    """
+    PCM da narração (modos "script" e "batch") em int16, para o render mapear sem decodificar de novo.
+    Fica no diretório da execução para o --resume; é apagado quando o render é registrado no manifest.
+    """
+    import numpy as np
+    from audio_mix import to_int16
+    pcm_path = os.path.join(audio_dir, f"{channel_name}_narration.npy")
+    np.save(pcm_path, to_int16(pcm))
+    return pcm_path
 
-    chosen_topic = choose_topic(TOPIC_FILE_PATH, HISTORY_FILE_PATH, HISTORY_LENGTH)
-    logging.info(f"Tema selecionado para o vídeo: {chosen_topic}")
-    if not chosen_topic or "Gerais" in chosen_topic or "Aleatórias" in chosen_topic: # Se o fallback foi usado
-        logging.warning(f"Usando tema de fallback '{chosen_topic}'. Certifique-se que 'topics.txt' existe e tem conteúdo.")
-
-    selected_music_path = None
-    music_choices = config.get("music_options", [])
-    if music_choices: 
-        music_file_name = random.choice(music_choices)
-        potential_music_path = os.path.join(ASSETS_DIR, "music", music_file_name) 
-        if os.path.exists(potential_music_path):
-            selected_music_path = potential_music_path
-            logging.info(f"Música selecionada: {selected_music_path}")
-        else:
-            logging.warning(f"Arquivo de música '{music_file_name}' não encontrado em '{os.path.join(ASSETS_DIR, 'music')}'. Prosseguindo sem música.")
-            selected_music_path = None 
-    config["selected_music_path"] = selected_music_path 
+def narrate_facts(facts, config, audio_dir, channel_name, narration_span=None):
+    """
+    Sintetiza a narração dos fatos conforme narration_mode/tts_engine do canal.
+    Retorna (fatos com áudio, arquivos de áudio, offsets). Com offsets (modos "script" e "batch"),
+    há um único arquivo e offsets[i] = [início, fim] em amostras do fato i; sem eles, um arquivo por fato.
+    """
+    narration_span = narration_span if narration_span is not None else {}
+    language = config["gtts_language"]
+    try:
+        engine = get_tts_engine(config)
+    except Exception as e_engine:
+        logging.error(f"Motor de TTS '{config.get('tts_engine')}' indisponível: {e_engine}. Usando gTTS.")
+        engine = get_tts_engine({})
+        narration_span["engine_fallback"] = True
+    narration_span["engine"] = engine.name
+    narration_mode = config.get("narration_mode", "per_fact")
 
-    client_secrets_path = CLIENT_SECRET_FILE
-    token_path = TOKEN_FILE
-    
-    youtube_service = get_authenticated_service(client_secrets_path, token_path)
-    if not youtube_service: logging.error("Falha YouTube auth."); sys.exit(1)
+    if narration_mode == "batch" and engine.supports_batch:
+        # Motor local: todos os fatos numa chamada, direto para PCM (sem um arquivo por fato)
+        from audio_mix import AUDIO_FPS
+        try:
+            with METRICS.span("tts.batch", engine=engine.name, facts=len(facts)):
+                pcm, offsets = engine.synthesize_batch(facts, language)
+            METRICS.incr("tts.requests")
+            pcm_path = save_narration_pcm(pcm, audio_dir, channel_name)
+            logging.info(f"Narração em lote ({engine.name}): {len(facts)} fatos, {len(pcm) / AUDIO_FPS:.1f}s em {pcm_path}")
+            return list(facts), [pcm_path], [list(offset) for offset in offsets]
+        except Exception as e_batch:
+            logging.warning(f"Síntese em lote com '{engine.name}' falhou: {e_batch}. Sintetizando fato a fato.", exc_info=True)
+            narration_span["fallback"] = True
+    elif narration_mode == "batch":
+        logging.warning(f"O motor '{engine.name}' não sintetiza em lote. Sintetizando fato a fato.")
 
-    num_facts = config.get("num_facts_per_video", 15) # Aumentado para vídeos mais longos
-    facts_list = get_facts_for_video(chosen_topic, config["gtts_language"], num_facts)
-    if not facts_list: logging.error(f"Nenhum fato obtido para o tema '{chosen_topic}'. Encerrando."); sys.exit(1)
+    tts_cache = DiskCache(TTS_CACHE_DIR, TTS_CACHE_MAX_BYTES, extension=engine.extension, name="tts")
+    synth_fn = lambda text, path: generate_audio_from_text(text, language, path, cache=tts_cache, engine=engine)
+    try:
+        if narration_mode == "script":
+            # Roteiro inteiro numa síntese: um áudio só, com o trecho de cada fato recuperado pelas pausas
+            from script_narration import narrate_script
+            script_path = os.path.join(audio_dir, f"{channel_name}_script{engine.extension}")
+            script_result = narrate_script(facts, synth_fn, script_path,
+                                           requests_per_second=config.get("tts_requests_per_second"),
+                                           max_retries=config.get("tts_max_retries", 2))
+            if script_result:
+                # PCM já decodificado salvo como no modo "batch": o render mapeia o .npy em vez de decodificar de novo
+                script_pcm, offsets = script_result
+                pcm_path = save_narration_pcm(script_pcm, audio_dir, channel_name)
+                if os.path.exists(script_path): os.remove(script_path) # o MP3 do roteiro já está no cache do TTS
+                return list(facts), [pcm_path], [list(offset) for offset in offsets]
+            logging.warning("Narração em roteiro único falhou. Sintetizando fato a fato.")
+            narration_span["fallback"] = True
 
-    narration_audio_files = []
-    actual_facts_with_audio = [] 
+        narration_paths = synthesize_narrations(
+            facts, synth_fn,
+            lambda i: os.path.join(audio_dir, f"{channel_name}_fact_{i+1}{engine.extension}"),
+            max_workers=config.get("tts_max_workers", 4),
+            requests_per_second=config.get("tts_requests_per_second"),
+            max_retries=config.get("tts_max_retries", 2)
+        )
+    finally:
+        tts_cache.log_stats()
+        record_cache_stats(tts_cache)
 
-    for i, fact in enumerate(facts_list):
-        audio_fname = f"{channel_name_arg}_fact_{i+1}_{int(time.time()*1000)}_{random.randint(0,1000)}.mp3"
-        audio_file_path = os.path.join(GENERATED_AUDIO_DIR, audio_fname)
-        path = generate_audio_from_text(fact, config["gtts_language"], audio_file_path)
+    facts_with_audio, audio_files = [], []
+    for fact, path in zip(facts, narration_paths):
         if path: 
-            narration_audio_files.append(path)
-            actual_facts_with_audio.append(fact)
+            audio_files.append(path)
+            facts_with_audio.append(fact)
         else: 
             logging.warning(f"Falha áudio para fato: '{fact[:30]}...'.")
-    
-    if not narration_audio_files or len(narration_audio_files) != len(actual_facts_with_audio) or not actual_facts_with_audio :
-         logging.error(f"Geração de áudio inconsistente ou falhou. Fatos válidos: {len(actual_facts_with_audio)}, Áudios: {len(narration_audio_files)}. Abortando.")
-         for audio_f in narration_audio_files: 
-             if os.path.exists(audio_f): os.remove(audio_f)
-         sys.exit(1)
-
-    video_output_path = create_video_from_content(
-        facts=actual_facts_with_audio, 
-        narration_audio_files=narration_audio_files, 
-        channel_config=config, 
-        channel_title=channel_name_arg
-    )
-    
+    return facts_with_audio, audio_files, None
+
+def youtube_language_code(language):
+    """'pt-br' -> 'pt-BR' (BCP-47, como a API de legendas espera)."""
+    parts = language.replace("_", "-").split("-")
+    return "-".join([parts[0].lower()] + [p.upper() for p in parts[1:]])
+
+def upload_captions(youtube_service, video_id, caption_file, language, name=""):
+    """Envia a legenda (.srt) do vídeo já publicado. Uma falha aqui só gera aviso: o vídeo já está no ar."""
+    from googleapiclient.http import MediaFileUpload
+    from googleapiclient.errors import HttpError
+    if not caption_file or not os.path.exists(caption_file):
+        logging.warning(f"Arquivo de legenda não encontrado: {caption_file}. Upload de legendas ignorado.")
+        return None
+    body = {"snippet": {"videoId": video_id, "language": youtube_language_code(language), "name": name, "isDraft": False}}
+    try:
+        with METRICS.span("upload.captions", video_id=video_id):
+            response = youtube_service.captions().insert(
+                part="snippet", body=body,
+                media_body=MediaFileUpload(caption_file, mimetype="application/octet-stream", resumable=False)
+            ).execute()
+        logging.info(f"Legendas enviadas para o vídeo {video_id} (id: {response.get('id')}).")
+        return response.get("id")
+    except HttpError as e_http:
+        http_status = getattr(e_http.resp, 'status', None)
+        hint = " O token.json precisa do escopo youtube.force-ssl." if http_status in (401, 403) else ""
+        logging.warning(f"Falha ao enviar legendas (HTTP {http_status}): {e_http}.{hint}")
+    except Exception as e:
+        logging.warning(f"Falha ao enviar legendas: {e}")
+    return None
+
+def remove_temp_audio_files(narration_audio_files):
     for audio_f in narration_audio_files:
         if os.path.exists(audio_f):
             try: 
@@ -745,54 +1018,265 @@ def main(channel_name_arg):
             except Exception as e: 
                 logging.warning(f"Falha ao remover áudio temp {audio_f}: {e}")
 
-    if not video_output_path: 
-        logging.error("Falha criar vídeo.")
-        sys.exit(1)
+def render_with_streaming_upload(youtube_service, facts, narration_audio_files, config, channel_name,
+                                 title, description, tags, narration_offsets=None):
+    """Renderiza em uma thread enquanto o upload resumable envia o arquivo à medida que ele cresce."""
+    from streaming_upload import GrowingFileUpload, STREAM_CHUNK_SIZE
+    render_mode = config.get("render_mode", "still")
+    if render_mode not in STREAMING_RENDER_MODES:
+        # "still" e "parallel" só criam o arquivo final na concatenação, depois de codificar tudo: não haveria sobreposição
+        logging.warning(f"render_mode '{render_mode}' não escreve o vídeo durante a codificação; usando 'pipe' no upload em streaming.")
+        config = dict(config, render_mode="pipe")
+    video_output_path = build_video_output_path(channel_name)
+    render_done = threading.Event()
+    render_result = {}
 
-    video_title = generate_video_title(actual_facts_with_audio, chosen_topic, channel_name=channel_name_arg)
-    video_description = generate_video_description(actual_facts_with_audio, config, channel_name_arg, chosen_topic) 
-    
-    # Prepara a lista de tags final
-    final_tags = list(config.get("video_tags_list", [])) 
-    topic_hashtag_clean = "".join(c for c in chosen_topic if c.isalnum()).lower()
-    if topic_hashtag_clean and topic_hashtag_clean not in final_tags:
-        final_tags.append(topic_hashtag_clean)
-    # Adiciona tags baseadas nos primeiros fatos, se desejar (exemplo)
-    # for fact in actual_facts_with_audio[:2]: # Pega palavras dos 2 primeiros fatos
-    #     words = fact.lower().split()
-    #     for word in words:
-    #         if len(word) > 4 and word.isalnum() and word not in final_tags and word not in ['sobre', 'fatos', 'curiosidades', topic_hashtag_clean]:
-    #             final_tags.append(word)
-    #             if len(final_tags) > 15: break # Limita o número de tags
-    #     if len(final_tags) > 15: break
+    def _render():
+        try:
+            render_result["path"] = create_video_from_content(
+                facts=facts, narration_audio_files=narration_audio_files, channel_config=config,
+                channel_title=channel_name, video_output_path=video_output_path, fragmented_output=True,
+                narration_offsets=narration_offsets
+            )
+        except Exception as e_render:
+            logging.error(f"Erro no render durante upload em streaming: {e_render}", exc_info=True)
+        finally:
+            render_done.set()
+
+    render_thread = threading.Thread(target=_render, name="render", daemon=True)
+    render_thread.start()
+    media = GrowingFileUpload(video_output_path, render_done, producer_ok=lambda: bool(render_result.get("path")),
+                              chunksize=config.get("upload_chunk_size", STREAM_CHUNK_SIZE))
+    logging.info(f"==> Upload em streaming iniciado para '{title}' a partir de {video_output_path}")
+    video_id = upload_video(youtube_service, video_output_path, title, description, tags,
+                            config.get("category_id"), config.get("youtube_privacy_status", "public"), media=media,
+                            max_retries=config.get("upload_max_retries", 10))
+    render_thread.join()
+    return render_result.get("path"), video_id
+
+def record_cache_stats(cache):
+    st = cache.stats()
+    for key in ("hits", "misses", "evictions"):
+        METRICS.incr(f"cache.{st['name']}.{key}", st[key])
+
+def plan_video(channel_name_arg):
+    """
+    Pré-visualiza o vídeo de um canal (tema, fatos, título, descrição e tags) sem autenticar,
+    sintetizar nem renderizar. topics.db, facts.db e cache/dedup.db são abertos somente leitura:
+    nada é criado, sincronizado ou gravado (o tema não entra no histórico).
+    """
+    config = CHANNEL_CONFIGS.get(channel_name_arg)
+    if not config:
+        logging.error(f"Configuração para o canal '{channel_name_arg}' não encontrada."); return None
+    chosen_topic = choose_topic(channel_name_arg, config.get("topic_history_length", HISTORY_LENGTH),
+                                strategy=config.get("topic_selection", "weighted"), record_history=False)
+    facts = get_facts_for_video(chosen_topic, config["gtts_language"], config.get("num_facts_per_video", 15),
+                                channel=channel_name_arg, read_only=True)
+    return {
+        "channel": channel_name_arg,
+        "topic": chosen_topic,
+        "title": generate_unpublished_title(facts, chosen_topic, channel_name_arg, read_only=True),
+        "description": generate_video_description(facts, config, channel_name_arg, chosen_topic),
+        "tags": build_video_tags(config, chosen_topic),
+        "facts": facts,
+    }
+
+def fail_stage(manifest, stage_name, message):
+    logging.error(message)
+    manifest.fail(stage_name, message)
+    sys.exit(1)
+
+def main(channel_name_arg, resume_run_id=None):
+    # Spans e contadores da execução vão para logs/metrics_<run_id>.json (também em caso de falha)
+    METRICS.reset(channel=channel_name_arg)
+    # Temporários da execução num workspace (tmpfs quando disponível), apagado também em falha ou sys.exit
+    from workspace import RunWorkspace
+    try:
+        with RunWorkspace(channel_name_arg):
+            run_pipeline(channel_name_arg, resume_run_id)
+    finally:
+        export_run_metrics(channel_name_arg)
+
+def export_run_metrics(channel_name_arg):
+    config = CHANNEL_CONFIGS.get(channel_name_arg) or {}
+    run_id = METRICS.labels.get("run_id") or f"{channel_name_arg}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    try:
+        METRICS.export(config.get("metrics_dir", LOGS_DIR), f"metrics_{run_id}",
+                       prometheus=config.get("metrics_prometheus", False))
+    except Exception as e:
+        logging.warning(f"Falha ao exportar métricas da execução: {e}")
+
+def run_pipeline(channel_name_arg, resume_run_id=None):
+    logging.info(f"--- Iniciando para canal: {channel_name_arg} ---")
+    config = CHANNEL_CONFIGS.get(channel_name_arg)
+    if not config:
+        logging.error(f"Configuração para o canal '{channel_name_arg}' não encontrada."); sys.exit(1)
+
+    os.makedirs(GENERATED_VIDEOS_DIR, exist_ok=True)
+    os.makedirs(ASSETS_DIR, exist_ok=True)
+    os.makedirs(os.path.join(ASSETS_DIR, "fonts"), exist_ok=True)
+    os.makedirs(os.path.join(ASSETS_DIR, "music"), exist_ok=True)
+
+    # Cada estágio grava seus artefatos em runs/<run_id>/manifest.json; --resume pula os já concluídos
+    if resume_run_id:
+        try:
+            manifest = RunManifest.load(RUNS_DIR, resume_run_id)
+        except FileNotFoundError as e:
+            logging.error(str(e)); sys.exit(1)
+        if manifest.data.get("channel") != channel_name_arg:
+            logging.error(f"A execução '{resume_run_id}' pertence ao canal '{manifest.data.get('channel')}', não a '{channel_name_arg}'."); sys.exit(1)
+    else:
+        manifest = RunManifest.create(RUNS_DIR, channel_name_arg)
+    logging.info(f"ID da execução: {manifest.run_id}")
+    METRICS.set_label("run_id", manifest.run_id)
+
+    # --- Estágio: tema (e música) ---
+    if not manifest.is_done("topic"):
+        with METRICS.span("topic.choose"):
+            chosen_topic = choose_topic(channel_name_arg, config.get("topic_history_length", HISTORY_LENGTH),
+                                        strategy=config.get("topic_selection", "weighted"))
+        logging.info(f"Tema selecionado para o vídeo: {chosen_topic}")
+        if not chosen_topic or "Gerais" in chosen_topic or "Aleatórias" in chosen_topic: # Se o fallback foi usado
+            logging.warning(f"Usando tema de fallback '{chosen_topic}'. Certifique-se que 'topics.txt' existe e tem conteúdo.")
+
+        selected_music_path = None
+        music_choices = config.get("music_options", [])
+        if music_choices: 
+            music_file_name = random.choice(music_choices)
+            potential_music_path = os.path.join(ASSETS_DIR, "music", music_file_name) 
+            if os.path.exists(potential_music_path):
+                selected_music_path = potential_music_path
+                logging.info(f"Música selecionada: {selected_music_path}")
+            else:
+                logging.warning(f"Arquivo de música '{music_file_name}' não encontrado em '{os.path.join(ASSETS_DIR, 'music')}'. Prosseguindo sem música.")
+                selected_music_path = None 
+        manifest.complete("topic", topic=chosen_topic, music_path=selected_music_path)
+    chosen_topic = manifest.get("topic")["topic"]
+    config["selected_music_path"] = manifest.get("topic")["music_path"]
+
+    youtube_service = None
+    captions_pending = config.get("upload_captions", False) and not manifest.get("upload").get("captions_uploaded")
+    if not manifest.is_done("upload") or captions_pending:
+        # Cada canal pode ter suas próprias credenciais (necessário no modo batch com vários canais)
+        client_secrets_path = config.get("client_secret_path", CLIENT_SECRET_FILE)
+        token_path = config.get("token_path", TOKEN_FILE)
+        scopes = SCOPES + CAPTION_SCOPES if config.get("upload_captions", False) else SCOPES
+        
+        with METRICS.span("youtube.auth"):
+            youtube_service = get_authenticated_service(client_secrets_path, token_path, scopes=scopes)
+        if not youtube_service: fail_stage(manifest, "auth", "Falha YouTube auth.")
+
+    # --- Estágio: fatos ---
+    if not manifest.is_done("facts"):
+        num_facts = config.get("num_facts_per_video", 15) # Aumentado para vídeos mais longos
+        with METRICS.span("facts.fetch", requested=num_facts):
+            facts_list = get_facts_for_video(chosen_topic, config["gtts_language"], num_facts, channel=channel_name_arg)
+        if not facts_list: fail_stage(manifest, "facts", f"Nenhum fato obtido para o tema '{chosen_topic}'. Encerrando.")
+        manifest.complete("facts", facts=facts_list)
+    facts_list = manifest.get("facts")["facts"]
+
+    # --- Estágio: narração (os áudios ficam no diretório da execução até o render terminar) ---
+    if not manifest.is_done("narration"):
+        audio_dir = manifest.stage_dir("narration")
+        with METRICS.span("stage.narration", facts=len(facts_list), mode=config.get("narration_mode", "per_fact")) as narration_span:
+            actual_facts_with_audio, narration_audio_files, narration_offsets = narrate_facts(
+                facts_list, config, audio_dir, channel_name_arg, narration_span)
+
+        narration_count = len(narration_offsets) if narration_offsets else len(narration_audio_files)
+        if not narration_audio_files or narration_count != len(actual_facts_with_audio) or not actual_facts_with_audio :
+             remove_temp_audio_files(narration_audio_files)
+             fail_stage(manifest, "narration", f"Geração de áudio inconsistente ou falhou. Fatos válidos: {len(actual_facts_with_audio)}, Áudios: {narration_count}. Abortando.")
+        manifest.complete("narration", facts=actual_facts_with_audio, audio_files=narration_audio_files,
+                          offsets=narration_offsets)
+    actual_facts_with_audio = manifest.get("narration")["facts"]
+    narration_audio_files = manifest.get("narration")["audio_files"]
+    narration_offsets = manifest.get("narration").get("offsets")
+
+    # --- Estágio: metadados do vídeo ---
+    if not manifest.is_done("metadata"):
+        video_title = generate_unpublished_title(actual_facts_with_audio, chosen_topic, channel_name_arg)
+        video_description = generate_video_description(actual_facts_with_audio, config, channel_name_arg, chosen_topic) 
+        
+        final_tags = build_video_tags(config, chosen_topic)
+        manifest.complete("metadata", title=video_title, description=video_description, tags=final_tags)
+    video_title = manifest.get("metadata")["title"]
+    video_description = manifest.get("metadata")["description"]
+    final_tags = manifest.get("metadata")["tags"]
     
-    logging.info(f"==> Preparando para fazer upload do vídeo: '{video_title}' para o arquivo: {video_output_path}")
-    print(f"PRINT: Iniciando chamada para upload_video com título: {video_title}")
-    sys.stdout.flush()
+    video_id_uploaded = manifest.get("upload").get("video_id")
+    # --- Estágios: render e upload ---
+    if not manifest.is_done("render") and config.get("stream_upload", False):
+        # Codificação e upload sobrepostos: o encoder escreve MP4 fragmentado e o upload envia os chunks já prontos
+        with METRICS.span("stage.render_upload", streaming=True):
+            video_output_path, video_id_uploaded = render_with_streaming_upload(
+                youtube_service, actual_facts_with_audio, narration_audio_files, config, channel_name_arg,
+                video_title, video_description, final_tags, narration_offsets=narration_offsets
+            )
+        if not video_output_path:
+            fail_stage(manifest, "render", "Falha criar vídeo.")
+        manifest.complete("render", video_path=video_output_path)
+        remove_temp_audio_files(narration_audio_files)
+        if video_id_uploaded:
+            manifest.complete("upload", video_id=video_id_uploaded)
+    elif not manifest.is_done("render"):
+        with METRICS.span("stage.render"):
+            video_output_path = create_video_from_content(
+                facts=actual_facts_with_audio, 
+                narration_audio_files=narration_audio_files, 
+                channel_config=config, 
+                channel_title=channel_name_arg,
+                narration_offsets=narration_offsets
+            )
+        if not video_output_path: 
+            fail_stage(manifest, "render", "Falha criar vídeo.")
+        manifest.complete("render", video_path=video_output_path)
+        remove_temp_audio_files(narration_audio_files)
+    video_output_path = manifest.get("render")["video_path"]
 
-    video_id_uploaded = upload_video(
-        youtube_service, 
-        video_output_path, 
-        video_title,
-        video_description, 
-        final_tags,       
-        config.get("category_id"),               
-        config.get("youtube_privacy_status", "public")
-    )
+    if not manifest.is_done("upload"):
+        if not os.path.exists(video_output_path):
+            fail_stage(manifest, "upload", f"Vídeo renderizado não encontrado em {video_output_path}.")
+        logging.info(f"==> Preparando para fazer upload do vídeo: '{video_title}' para o arquivo: {video_output_path}")
+        print(f"PRINT: Iniciando chamada para upload_video com título: {video_title}")
+        sys.stdout.flush()
+
+        with METRICS.span("stage.upload", video_mb=round(os.path.getsize(video_output_path) / 1024 / 1024, 2)):
+            video_id_uploaded = upload_video(
+                youtube_service, 
+                video_output_path, 
+                video_title,
+                video_description, 
+                final_tags,       
+                config.get("category_id"),               
+                config.get("youtube_privacy_status", "public"),
+                chunksize=config.get("upload_chunk_size", UPLOAD_CHUNK_SIZE),
+                max_retries=config.get("upload_max_retries", 10)
+            )
+        if video_id_uploaded:
+            manifest.complete("upload", video_id=video_id_uploaded)
+    if video_id_uploaded and not manifest.get("upload").get("facts_recorded"):
+        record_used_facts(channel_name_arg, actual_facts_with_audio, config["gtts_language"], title=video_title)
+        manifest.complete("upload", **dict(manifest.get("upload"), video_id=video_id_uploaded, facts_recorded=True))
+    if video_id_uploaded and captions_pending:
+        from captions import caption_path
+        caption_id = upload_captions(youtube_service, video_id_uploaded, caption_path(LEGENDAS_DIR, video_output_path, "srt"),
+                                     config["gtts_language"])
+        if caption_id:
+            manifest.complete("upload", **dict(manifest.get("upload"), captions_uploaded=True))
     logging.info(f"==> Resultado do upload_video (video_id_uploaded): {video_id_uploaded}")
     print(f"PRINT: Resultado do upload_video (video_id_uploaded): {video_id_uploaded}")
     sys.stdout.flush()
 
     if video_id_uploaded:
+        manifest.finish()
         logging.info(f"--- SUCESSO! Canal '{channel_name_arg}'. VÍDEO PÚBLICO ID: {video_id_uploaded} ---")
         print(f"PRINT SUCCESS: --- SUCESSO! Canal '{channel_name_arg}'. VÍDEO PÚBLICO ID: {video_id_uploaded} ---")
         if os.path.exists(video_output_path): 
             logging.info(f"Vídeo local {video_output_path} mantido para inspeção.")
     else:
-        logging.error(f"--- FALHA no upload para o canal '{channel_name_arg}'. Script terminando com erro. ---")
         print(f"PRINT ERROR: --- FALHA no upload para o canal '{channel_name_arg}'. ---")
         sys.stderr.flush()
-        sys.exit(1)
+        fail_stage(manifest, "upload", f"--- FALHA no upload para o canal '{channel_name_arg}'. Script terminando com erro. ---")
     
     logging.info(f"--- Fim do processo para o canal '{channel_name_arg}' ---")
     print(f"PRINT: --- Fim do processo para o canal '{channel_name_arg}' ---")
@@ -801,22 +1285,48 @@ def main(channel_name_arg):
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Automatiza a criação e upload de vídeos de curiosidades para o YouTube.")
-    parser.add_argument("--channel", required=True, help="Nome do canal (chave em CHANNEL_CONFIGS).")
+    target_group = parser.add_mutually_exclusive_group(required=True)
+    target_group.add_argument("--channel", help="Nome do canal (chave em CHANNEL_CONFIGS).")
+    target_group.add_argument("--channels", help="Lista de canais separados por vírgula, executados em paralelo (batch).")
+    target_group.add_argument("--all-channels", action="store_true", help="Executa todos os canais de CHANNEL_CONFIGS em paralelo (batch).")
+    parser.add_argument("--workers", type=int, default=None, help="Processos do batch (padrão: número de núcleos).")
+    parser.add_argument("--resume", metavar="RUN_ID", default=None, help="Retoma uma execução anterior (runs/<RUN_ID>), pulando os estágios já concluídos.")
+    parser.add_argument("--plan", "--dry-run", dest="plan", action="store_true", help="Só mostra o vídeo planejado (tema, fatos, título, descrição), sem autenticar, renderizar ou enviar.")
     args = None
+    run_label = 'N/A'
     try:
         args = parser.parse_args()
-        main(args.channel)
+        if args.plan:
+            if args.resume: parser.error("--resume não pode ser usado com --plan.")
+            plan_channels = [args.channel] if args.channel else (list(CHANNEL_CONFIGS.keys()) if args.all_channels else [c.strip() for c in args.channels.split(",") if c.strip()])
+            run_label = f"plan ({', '.join(plan_channels)})"
+            plans = [plan_video(name) for name in plan_channels]
+            print(json.dumps([p for p in plans if p], indent=2, ensure_ascii=False))
+            sys.exit(0 if all(plans) else 1)
+        if args.channel:
+            run_label = args.channel
+            main(args.channel, resume_run_id=args.resume)
+        else:
+            if args.resume: parser.error("--resume só pode ser usado com --channel.")
+            batch_channels = list(CHANNEL_CONFIGS.keys()) if args.all_channels else [c.strip() for c in args.channels.split(",") if c.strip()]
+            unknown_channels = [c for c in batch_channels if c not in CHANNEL_CONFIGS]
+            if unknown_channels:
+                logging.error(f"Canais sem configuração em CHANNEL_CONFIGS: {', '.join(unknown_channels)}"); sys.exit(1)
+            run_label = f"batch ({', '.join(batch_channels)})"
+            batch_report = run_batch(batch_channels, max_workers=args.workers,
+                                     report_path=os.path.join(LOGS_DIR, f"batch_report_{int(time.time())}.json"))
+            sys.exit(0 if batch_report["failed"] == 0 else 1)
     except SystemExit as e:
         if e.code is None or e.code == 0: 
-             logging.info(f"Script para '{args.channel if args else 'N/A'}' concluído (código de saída {e.code}).")
-             print(f"PRINT: Script para '{args.channel if args else 'N/A'}' concluído (código de saída {e.code}).")
+             logging.info(f"Script para '{run_label}' concluído (código de saída {e.code}).")
+             print(f"PRINT: Script para '{run_label}' concluído (código de saída {e.code}).")
         else: 
-             logging.error(f"Script para '{args.channel if args else 'N/A'}' encerrado com erro (código {e.code}).")
-             print(f"PRINT ERROR: Script para '{args.channel if args else 'N/A'}' encerrado com erro (código {e.code}).")
+             logging.error(f"Script para '{run_label}' encerrado com erro (código {e.code}).")
+             print(f"PRINT ERROR: Script para '{run_label}' encerrado com erro (código {e.code}).")
              if e.code != 0: raise 
     except Exception as e_main_block:
-        logging.error(f"ERRO INESPERADO NO BLOCO PRINCIPAL para '{args.channel if args else 'N/A'}': {e_main_block}", exc_info=True)
-        print(f"PRINT CRITICAL ERROR: ERRO INESPERADO NO BLOCO PRINCIPAL para '{args.channel if args else 'N/A'}': {e_main_block}")
+        logging.error(f"ERRO INESPERADO NO BLOCO PRINCIPAL para '{run_label}': {e_main_block}", exc_info=True)
+        print(f"PRINT CRITICAL ERROR: ERRO INESPERADO NO BLOCO PRINCIPAL para '{run_label}': {e_main_block}")
         sys.exit(2)
     finally:
         print("PRINT: Bloco finally do __main__ alcançado.")
@@ -0,0 +1,132 @@
+import os
+import re
+import json
+import time
+import logging
+import datetime
+import threading
+from contextlib import contextmanager
+
+
+class RunMetrics:
+    """
+    Spans de tempo e contadores de uma execução do pipeline (thread-safe).
+    Ao final da execução tudo é exportado em JSON e, opcionalmente, no formato texto do Prometheus.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self, **labels):
+        with self._lock:
+            self.labels = dict(labels)
+            self.started_at = time.time()
+            self.spans = []
+            self.counters = {}
+
+    def set_label(self, key, value):
+        with self._lock:
+            self.labels[key] = value
+
+    @contextmanager
+    def span(self, name, **attrs):
+        start = time.perf_counter()
+        started_at = time.time()
+        status = "ok"
+        try:
+            yield attrs
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            with self._lock:
+                self.spans.append({"name": name, "start": round(started_at - self.started_at, 4),
+                                   "duration": round(duration, 4), "status": status,
+                                   "thread": threading.current_thread().name, **attrs})
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self):
+        """Agrega os spans por nome: contagem, total, média e máximo (em segundos)."""
+        by_name = {}
+        with self._lock:
+            spans = list(self.spans)
+        for sp in spans:
+            agg = by_name.setdefault(sp["name"], {"count": 0, "total": 0.0, "max": 0.0, "errors": 0})
+            agg["count"] += 1
+            agg["total"] += sp["duration"]
+            agg["max"] = max(agg["max"], sp["duration"])
+            agg["errors"] += sp["status"] != "ok"
+        for agg in by_name.values():
+            agg["total"] = round(agg["total"], 4)
+            agg["mean"] = round(agg["total"] / agg["count"], 4)
+        return by_name
+
+    def to_dict(self):
+        with self._lock:
+            counters = dict(self.counters)
+            spans = list(self.spans)
+            labels = dict(self.labels)
+        return {
+            "labels": labels,
+            "started_at": datetime.datetime.fromtimestamp(self.started_at).isoformat(timespec="seconds"),
+            "wall_seconds": round(time.time() - self.started_at, 3),
+            "summary": self.summary(),
+            "counters": counters,
+            "spans": spans,
+        }
+
+    def to_prometheus(self):
+        label_str = ",".join(f'{_prom_name(k)}="{_prom_label_value(v)}"' for k, v in sorted(self.to_dict()["labels"].items()))
+        def labels(extra=""):
+            parts = [p for p in (label_str, extra) if p]
+            return "{" + ",".join(parts) + "}" if parts else ""
+        lines = ["# TYPE pipeline_span_seconds_total counter", "# TYPE pipeline_span_count counter"]
+        for name, agg in sorted(self.summary().items()):
+            span_label = f'span="{_prom_label_value(name)}"'
+            lines.append(f'pipeline_span_seconds_total{labels(span_label)} {agg["total"]}')
+            lines.append(f'pipeline_span_count{labels(span_label)} {agg["count"]}')
+        for name, value in sorted(self.to_dict()["counters"].items()):
+            metric = f"pipeline_{_prom_name(name)}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{labels()} {value}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, directory, basename, prometheus=False):
+        """
+        Grava <basename>.json (e .prom). Uma execução retomada com --resume reaproveita o run_id:
+        as tentativas seguintes ganham o sufixo _attempt<N> em vez de sobrescrever as da tentativa que falhou.
+        """
+        os.makedirs(directory, exist_ok=True)
+        first_name, attempt = basename, 1
+        while any(os.path.exists(os.path.join(directory, f"{basename}{ext}")) for ext in (".json", ".prom")):
+            attempt += 1
+            basename = f"{first_name}_attempt{attempt}"
+        json_path = os.path.join(directory, f"{basename}.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+        logging.info(f"Métricas da execução salvas em {json_path}")
+        if prometheus:
+            prom_path = os.path.join(directory, f"{basename}.prom")
+            with open(prom_path, "w", encoding="utf-8") as f:
+                f.write(self.to_prometheus())
+            logging.info(f"Métricas (formato Prometheus) salvas em {prom_path}")
+        for name, agg in sorted(self.summary().items(), key=lambda kv: -kv[1]["total"]):
+            logging.info(f"Tempo em '{name}': {agg['total']:.2f}s ({agg['count']}x, máx {agg['max']:.2f}s)")
+        return json_path
+
+
+def _prom_name(name):
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _prom_label_value(value):
+    # Formato de texto do Prometheus: barra invertida, aspas e quebra de linha precisam de escape
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+METRICS = RunMetrics()
@@ -0,0 +1,65 @@
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class RateLimiter:
+    """Limita o número de requisições por segundo compartilhado entre as threads."""
+
+    def __init__(self, requests_per_second):
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _synthesize_with_retry(index, text, synth_fn, path_for_index, limiter, max_retries, retry_backoff):
+    attempts = max_retries + 1
+    for attempt in range(1, attempts + 1):
+        limiter.wait()
+        path = synth_fn(text, path_for_index(index))
+        if path:
+            return path
+        if attempt < attempts:
+            delay = retry_backoff * (2 ** (attempt - 1)) + random.uniform(0, 0.5)
+            logging.warning(f"Falha TTS no fato #{index + 1} (tentativa {attempt}/{attempts}). Nova tentativa em {delay:.1f}s.")
+            time.sleep(delay)
+    return None
+
+
+def synthesize_narrations(facts, synth_fn, path_for_index, max_workers=4, requests_per_second=None,
+                          max_retries=2, retry_backoff=1.0):
+    """
+    Sintetiza a narração de todos os fatos em paralelo (pool de threads limitado).
+    synth_fn(text, path) deve retornar o caminho do áudio ou None em caso de falha.
+    Retorna uma lista na mesma ordem de `facts`, com None para os fatos que falharam.
+    """
+    if not facts:
+        return []
+    limiter = RateLimiter(requests_per_second)
+    workers = max(1, min(max_workers or 1, len(facts)))
+    logging.info(f"Sintetizando {len(facts)} narrações com {workers} worker(s) (limite: {requests_per_second or 'sem limite'} req/s, retries: {max_retries}).")
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts") as executor:
+        futures = [
+            executor.submit(_synthesize_with_retry, i, text, synth_fn, path_for_index, limiter, max_retries, retry_backoff)
+            for i, text in enumerate(facts)
+        ]
+        results = []
+        for i, future in enumerate(futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logging.error(f"Erro inesperado na síntese do fato #{i + 1}: {e}", exc_info=True)
+                results.append(None)
+    return results
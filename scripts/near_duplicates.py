@@ -0,0 +1,226 @@
+import os
+import time
+import zlib
+import sqlite3
+import hashlib
+import logging
+import unicodedata
+
+import numpy as np
+
+from sqlite_util import attach, connect, immediate_transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lsh_items (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    signature BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS lsh_buckets (
+    bucket INTEGER NOT NULL,
+    item_id INTEGER NOT NULL REFERENCES lsh_items(id),
+    PRIMARY KEY (bucket, item_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS lsh_meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+# Histórico compacto (só os textos publicados); o id de cada texto é o mesmo do item no índice
+HISTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {schema}.published_texts (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    channel TEXT,
+    text TEXT NOT NULL,
+    added_at REAL NOT NULL
+);
+"""
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64(0xFFFFFFFF)
+SHINGLE_SIZE = 5
+
+
+def normalize_text(text):
+    """Minúsculas, sem acentos e sem pontuação: variações triviais não mudam a assinatura."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    cleaned = "".join(c if c.isalnum() else " " for c in decomposed if not unicodedata.combining(c))
+    return " ".join(cleaned.split())
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    normalized = normalize_text(text)
+    if len(normalized) <= size:
+        return {normalized}
+    return {normalized[i:i + size] for i in range(len(normalized) - size + 1)}
+
+
+class NearDuplicateIndex:
+    """
+    Índice MinHash + LSH de textos já publicados (fatos e títulos), persistido em SQLite.
+    Cada assinatura é dividida em `bands` faixas; a busca consulta só os buckets dessas faixas
+    (índice da chave primária), então o custo não cresce com o tamanho do acervo. Os candidatos
+    são confirmados pela similaridade de Jaccard estimada pelas assinaturas.
+    Com 128 permutações em 32 faixas de 4, um par com Jaccard 0,7 vira candidato com ~99% de chance.
+    Os textos publicados ficam em `published_texts`, que pode morar em outro banco (history_db_path,
+    anexado com ATTACH); assinaturas e buckets são só cache e são refeitos a partir dele quando faltam.
+    """
+
+    def __init__(self, db_path, history_db_path=None, num_perm=128, bands=32, threshold=0.7, seed=1, timeout=30.0,
+                 read_only=False):
+        if num_perm % bands:
+            raise ValueError("num_perm deve ser múltiplo de bands")
+        self.num_perm, self.bands, self.rows = num_perm, bands, num_perm // bands
+        self.threshold = threshold
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64).astype(np.uint64) % MERSENNE_PRIME
+        self._b = rng.randint(0, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64).astype(np.uint64) % MERSENNE_PRIME
+
+        params = f"{self.num_perm}:{self.bands}:{seed}:{SHINGLE_SIZE}"
+        self.history_schema = "history" if history_db_path else "main"
+        if read_only:
+            self._open_read_only(db_path, history_db_path, params, timeout)
+            return
+        self.conn = connect(db_path, timeout)
+        if history_db_path:
+            attach(self.conn, history_db_path, "history")
+        self.conn.executescript(HISTORY_SCHEMA.format(schema=self.history_schema))
+        self.conn.executescript(SCHEMA)
+        self._sync(params)
+
+    def _open_read_only(self, db_path, history_db_path, params, timeout):
+        """
+        Modo --plan: usa o cache só se ele existir e estiver em dia com o histórico; senão monta o índice
+        em memória a partir do histórico. Nenhum arquivo é criado ou alterado.
+        """
+        if os.path.exists(db_path) or not history_db_path:
+            self.conn = connect(db_path, timeout, read_only=True)
+            if not history_db_path:
+                return
+            attach(self.conn, history_db_path, "history", read_only=True)
+            try:
+                if self._pending(params) is None:
+                    return
+            except sqlite3.OperationalError:
+                pass # Cache sem as tabelas do índice
+            self.conn.close()
+        self.conn = connect(":memory:", timeout)
+        attach(self.conn, history_db_path, "history", read_only=True)
+        self.conn.executescript(SCHEMA)
+        self._sync(params)
+
+    def _pending(self, params):
+        """(refazer tudo?, último id já indexado) ou None se o índice está em dia com o histórico."""
+        row = self.conn.execute("SELECT value FROM lsh_meta WHERE key = 'params'").fetchone()
+        indexed = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM lsh_items").fetchone()[0]
+        published = self.conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {self.history_schema}.published_texts").fetchone()[0]
+        rebuild = row is None or row[0] != params or indexed > published
+        if not rebuild and indexed == published:
+            return None
+        return rebuild, 0 if rebuild else indexed
+
+    def _sync(self, params):
+        """
+        Indexa os textos do histórico que ainda não estão no índice (cache novo, perdido ou desatualizado).
+        Se os parâmetros mudaram ou o índice tem itens que o histórico não tem mais, refaz tudo.
+        """
+        pending = self._pending(params)
+        if pending is None:
+            return
+        rebuild, indexed = pending
+        with immediate_transaction(self.conn):
+            if rebuild:
+                self.conn.execute("DELETE FROM lsh_buckets")
+                self.conn.execute("DELETE FROM lsh_items")
+                self.conn.execute("INSERT OR REPLACE INTO lsh_meta(key, value) VALUES ('params', ?)", (params,))
+            rows = self.conn.execute(f"SELECT id, kind, text FROM {self.history_schema}.published_texts WHERE id > ?",
+                                     (indexed,)).fetchall()
+            for item_id, kind, text in rows:
+                self._index(item_id, kind, text)
+        if rows:
+            logging.info(f"Índice de quase-duplicatas {'reconstruído' if rebuild else 'atualizado'}: {len(rows)} texto(s) do histórico.")
+
+    def _index(self, item_id, kind, text):
+        sig = self.signature(text)
+        self.conn.execute("INSERT INTO lsh_items(id, kind, signature) VALUES (?, ?, ?)", (item_id, kind, sig.tobytes()))
+        self.conn.executemany("INSERT OR IGNORE INTO lsh_buckets(bucket, item_id) VALUES (?, ?)",
+                              ((bucket, item_id) for bucket in self._bucket_keys(sig, kind)))
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def signature(self, text):
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles(text)), dtype=np.uint64)
+        # (a*x + b) mod p para todas as permutações e shingles de uma vez; mínimo por permutação
+        permuted = ((hashes[:, None] * self._a + self._b) % MERSENNE_PRIME) & MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def _bucket_keys(self, signature, kind):
+        """Um bucket por faixa; tipo e número da faixa entram no hash, então uma única coluna indexada basta."""
+        keys = []
+        for band in range(self.bands):
+            chunk = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            digest = hashlib.blake2b(chunk, digest_size=8, person=f"{kind}:{band}".encode("utf-8")[:16]).digest()
+            keys.append(int.from_bytes(digest, "little", signed=True))
+        return keys
+
+    @staticmethod
+    def similarity(sig_a, sig_b):
+        """Jaccard estimada: fração de permutações com o mesmo mínimo."""
+        return float(np.count_nonzero(sig_a == sig_b)) / len(sig_a)
+
+    def find(self, text, kind, signature=None):
+        """Itens já indexados do mesmo tipo com similaridade >= threshold: lista de (texto, similaridade, canal)."""
+        signature = self.signature(text) if signature is None else signature
+        keys = self._bucket_keys(signature, kind)
+        rows = self.conn.execute(f"""
+            SELECT p.text, i.signature, p.channel FROM lsh_items i
+            JOIN {self.history_schema}.published_texts p ON p.id = i.id
+            WHERE i.id IN (SELECT item_id FROM lsh_buckets WHERE bucket IN ({",".join("?" * len(keys))}))""",
+            keys).fetchall()
+        matches = []
+        for other_text, blob, channel in rows:
+            sim = self.similarity(signature, np.frombuffer(blob, dtype=np.uint32))
+            if sim >= self.threshold:
+                matches.append((other_text, sim, channel))
+        return sorted(matches, key=lambda m: -m[1])
+
+    def is_duplicate(self, text, kind):
+        return bool(self.find(text, kind))
+
+    def filter_new(self, texts, kind, limit=None):
+        """
+        Mantém, na ordem, os textos sem quase-duplicata no índice nem entre os já aceitos da própria lista.
+        """
+        accepted, accepted_sigs = [], []
+        for text in texts:
+            sig = self.signature(text)
+            if self.find(text, kind, signature=sig):
+                continue
+            if any(self.similarity(sig, other) >= self.threshold for other in accepted_sigs):
+                continue
+            accepted.append(text); accepted_sigs.append(sig)
+            if limit and len(accepted) >= limit:
+                break
+        return accepted
+
+    def add(self, texts, kind, channel=None):
+        """Registra textos publicados no histórico e no índice (incremental, numa única transação)."""
+        now = time.time()
+        with immediate_transaction(self.conn) as conn:
+            for text in texts:
+                item_id = conn.execute(
+                    f"INSERT INTO {self.history_schema}.published_texts(kind, channel, text, added_at) VALUES (?, ?, ?, ?)",
+                    (kind, channel, text, now)).lastrowid
+                self._index(item_id, kind, text)
+        logging.info(f"{len(texts)} texto(s) do tipo '{kind}' adicionados ao índice de quase-duplicatas.")
+
+    def count(self, kind=None):
+        if kind:
+            return self.conn.execute("SELECT COUNT(*) FROM lsh_items WHERE kind = ?", (kind,)).fetchone()[0]
+        return self.conn.execute("SELECT COUNT(*) FROM lsh_items").fetchone()[0]
@@ -0,0 +1,117 @@
+import os
+import shutil
+import logging
+import subprocess
+
+import numpy as np
+
+from audio_mix import AUDIO_FPS, write_pcm_audio
+from still_encoder import DEFAULT_STILL_PRESET, ffmpeg_binary, is_static_clip
+from workspace import temp_dir
+
+
+class SlideSource:
+    """
+    Quadros de um slide: o quadro estático fica em cache (RGB contíguo); slides com movimento vêm do clip,
+    já como array novo e contíguo, pronto para ir ao pipe sem cópia.
+    """
+
+    def __init__(self, clip, fps):
+        self.clip = clip
+        self.n_frames = max(1, int(round(clip.duration * fps)))
+        self.fps = fps
+        self.static = np.ascontiguousarray(clip.img[:, :, :3]) if is_static_clip(clip) else None
+
+    def frame(self, index):
+        if self.static is not None:
+            return self.static
+        return np.ascontiguousarray(self.clip.get_frame(min(index, self.n_frames - 1) / self.fps)[:, :, :3])
+
+
+class FrameBlender:
+    """Crossfade em buffers pré-alocados: (a*(256-w) + b*w) >> 8 em uint16, sem arrays novos por quadro."""
+
+    def __init__(self, height, width):
+        self.frame = np.empty((height, width, 3), dtype=np.uint8)
+        self._acc = np.empty((height, width, 3), dtype=np.uint16)
+        self._tmp = np.empty((height, width, 3), dtype=np.uint16)
+
+    def blend(self, a, b, alpha):
+        weight = int(round(min(1.0, max(0.0, alpha)) * 256))
+        np.multiply(a, 256 - weight, out=self._acc, dtype=np.uint16)
+        np.multiply(b, weight, out=self._tmp, dtype=np.uint16)
+        np.add(self._acc, self._tmp, out=self._acc)
+        np.right_shift(self._acc, 8, out=self._acc)
+        np.copyto(self.frame, self._acc, casting="unsafe")
+        return self.frame
+
+
+def transition_frames(n_frames, next_exists, transition_seconds, fps):
+    """Quadros finais do slide que entram no crossfade para o próximo (no máximo metade do slide)."""
+    if not next_exists or transition_seconds <= 0:
+        return 0
+    return min(int(round(transition_seconds * fps)), n_frames // 2)
+
+
+def render_piped(slide_clips, audio_pcm, output_path, fps, transition=0.0, preset=DEFAULT_STILL_PRESET,
+                 audio_fps=AUDIO_FPS, movflags="+faststart"):
+    """
+    Renderiza os slides escrevendo quadros RGB crus direto no stdin de um único ffmpeg.
+    Fora das transições o quadro estático em cache é enviado como está; só os quadros dentro da janela
+    de crossfade (os últimos `transition` segundos de cada slide) são compostos, num buffer pré-alocado.
+    Cada SlideSource é criado quando o slide anterior começa (o primeiro quadro dele entra no crossfade)
+    e solto ao fim do próprio slide: a memória fica limitada a poucos quadros, independente do número
+    de slides e da duração do vídeo, e a linha do tempo (e portanto áudio e legendas) não muda com a transição.
+    """
+    height, width = slide_clips[0].h, slide_clips[0].w
+    work_dir = temp_dir("pipe_render_")
+    try:
+        audio_path = None
+        if audio_pcm is not None:
+            audio_path = os.path.join(work_dir, "audio.m4a")
+            write_pcm_audio(audio_pcm, audio_path, fps=audio_fps)
+
+        cmd = [ffmpeg_binary(), "-hide_banner", "-loglevel", "error", "-y",
+               "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(fps), "-i", "-"]
+        if audio_path:
+            cmd += ["-i", audio_path, "-map", "0:v:0", "-map", "1:a:0", "-c:a", "copy"]
+        cmd += ["-c:v", "libx264", "-preset", preset, "-pix_fmt", "yuv420p", "-movflags", movflags, output_path]
+
+        blender = FrameBlender(height, width)
+        composed = total = 0
+        stderr_path = os.path.join(work_dir, "ffmpeg.log")
+        with open(stderr_path, "wb") as stderr_file:
+            process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=stderr_file)
+            try:
+                # Só o slide atual e o próximo ficam vivos
+                next_source = SlideSource(slide_clips[0], fps)
+                for i in range(len(slide_clips)):
+                    source = next_source
+                    next_source = SlideSource(slide_clips[i + 1], fps) if i + 1 < len(slide_clips) else None
+                    n_transition = transition_frames(source.n_frames, next_source is not None, transition, fps)
+                    first_blend = source.n_frames - n_transition
+                    next_frame = next_source.frame(0) if n_transition else None
+                    for index in range(source.n_frames):
+                        frame = source.frame(index)
+                        if index >= first_blend:
+                            alpha = (index - first_blend + 1) / (n_transition + 1)
+                            frame = blender.blend(frame, next_frame, alpha)
+                            composed += 1
+                        process.stdin.write(memoryview(frame).cast("B"))
+                    total += source.n_frames
+                    del source, next_frame
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+            except BaseException:
+                process.kill(); process.wait()
+                raise
+            returncode = process.wait()
+        if returncode != 0:
+            with open(stderr_path, "rb") as f:
+                stderr = f.read().decode("utf-8", errors="replace").strip()
+            raise RuntimeError(f"ffmpeg falhou (render por pipe): {stderr[-1000:]}")
+        logging.info(f"Render por pipe: {total} quadros enviados ao ffmpeg, {composed} compostos em transições.")
+        return output_path
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
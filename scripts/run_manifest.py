@@ -0,0 +1,98 @@
+import os
+import json
+import logging
+import datetime
+
+MANIFEST_NAME = "manifest.json"
+
+
+class RunManifest:
+    """
+    Estado persistente de uma execução do pipeline (runs/<run_id>/manifest.json).
+    Cada estágio concluído grava seus artefatos aqui; com --resume <run_id> os estágios
+    já concluídos são pulados e seus resultados são reaproveitados.
+    """
+
+    def __init__(self, run_dir, data):
+        self.run_dir = run_dir
+        self.data = data
+
+    @property
+    def run_id(self):
+        return self.data["run_id"]
+
+    @property
+    def path(self):
+        return os.path.join(self.run_dir, MANIFEST_NAME)
+
+    @classmethod
+    def create(cls, runs_dir, channel_name):
+        run_id = f"{channel_name}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        run_dir = os.path.join(runs_dir, run_id)
+        suffix = 1
+        while os.path.exists(run_dir):
+            suffix += 1
+            run_dir = os.path.join(runs_dir, f"{run_id}_{suffix}")
+        os.makedirs(run_dir)
+        manifest = cls(run_dir, {
+            "run_id": os.path.basename(run_dir),
+            "channel": channel_name,
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "status": "running",
+            "stages": {},
+        })
+        manifest.save()
+        logging.info(f"Execução {manifest.run_id} criada em {run_dir}")
+        return manifest
+
+    @classmethod
+    def load(cls, runs_dir, run_id):
+        run_dir = os.path.join(runs_dir, run_id)
+        path = os.path.join(run_dir, MANIFEST_NAME)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Manifesto da execução '{run_id}' não encontrado em {path}")
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = cls(run_dir, json.load(f))
+        done = [name for name, st in manifest.data["stages"].items() if st.get("status") == "done"]
+        logging.info(f"Retomando execução {run_id}. Estágios já concluídos: {', '.join(done) or 'nenhum'}")
+        return manifest
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def stage_dir(self, name):
+        path = os.path.join(self.run_dir, name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def is_done(self, name):
+        return self.data["stages"].get(name, {}).get("status") == "done"
+
+    def get(self, name):
+        return self.data["stages"].get(name, {}).get("artifacts", {})
+
+    def complete(self, name, **artifacts):
+        self.data["stages"][name] = {
+            "status": "done",
+            "finished_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "artifacts": artifacts,
+        }
+        self.save()
+        logging.info(f"Estágio '{name}' concluído e registrado em {self.path}")
+
+    def fail(self, name, error):
+        self.data["stages"][name] = {
+            "status": "failed",
+            "finished_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "error": str(error),
+        }
+        self.data["status"] = "failed"
+        self.save()
+        logging.error(f"Estágio '{name}' falhou. Para continuar desta etapa: --channel {self.data['channel']} --resume {self.run_id}")
+
+    def finish(self):
+        self.data["status"] = "done"
+        self.save()
@@ -0,0 +1,129 @@
+import os
+import re
+import logging
+
+import numpy as np
+
+from narration import RateLimiter, _synthesize_with_retry
+from audio_mix import AUDIO_FPS, decode_audio
+
+SENTENCE_END = (".", "!", "?", "…")
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?…])\s+")
+
+
+def build_script(facts):
+    """Junta os fatos num único roteiro; cada fato termina em pontuação final, o que força a pausa do motor entre eles."""
+    parts = []
+    for fact in facts:
+        fact = " ".join(fact.split())
+        parts.append(fact if fact.endswith(SENTENCE_END) else fact + ".")
+    return " ".join(parts)
+
+
+def frame_energy(pcm, fps=AUDIO_FPS, frame_ms=10):
+    """RMS por janela de frame_ms (todos os canais juntos), calculado de uma vez sobre o buffer inteiro, sem cópias."""
+    frame = max(1, int(fps * frame_ms / 1000))
+    n_frames = len(pcm) // frame
+    frames = pcm[:n_frames * frame].reshape(n_frames, -1)
+    return np.sqrt(np.einsum("ij,ij->i", frames, frames) / frames.shape[1]), frame
+
+
+def silent_runs(silent):
+    """Trechos contíguos de frames silenciosos: arrays (início, fim exclusivo) em frames."""
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], silent.astype(np.int8), [0]))))
+    return edges[0::2], edges[1::2]
+
+
+def split_sentences(text):
+    return [part for part in SENTENCE_SPLIT.split(" ".join(text.split())) if part]
+
+
+def split_at_pauses(pcm, facts, fps=AUDIO_FPS, min_pause=0.15, threshold_db=-40.0, length_weight=1.0, max_deviation=1.5):
+    """
+    Recupera o trecho de cada fato no áudio do roteiro inteiro pelas pausas do motor entre frases.
+    Todas as fronteiras de frase são alinhadas de uma vez (programação dinâmica) às pausas detectadas:
+    a posição esperada de cada fronteira vem da proporção de caracteres, medida só no tempo com voz
+    (a duração das pausas não desloca a estimativa), e pausas mais longas são preferidas.
+    Retorna [(início, fim)] em amostras, sem o silêncio das bordas, ou None se o alinhamento não for confiável.
+    """
+    energy, frame = frame_energy(pcm, fps)
+    if not len(energy) or energy.max() <= 0:
+        return None
+    silent = energy < energy.max() * 10 ** (threshold_db / 20)
+    voiced = np.flatnonzero(~silent)
+    first, last = voiced[0], voiced[-1] + 1
+    starts, ends = silent_runs(silent)
+    internal = (starts > first) & (ends < last) & ((ends - starts) * frame >= min_pause * fps)
+    starts, ends = starts[internal], ends[internal]
+
+    sentences = [(i, len(s)) for i, fact in enumerate(facts) for s in (split_sentences(fact) or [fact])]
+    if len(facts) == 1:
+        return [(int(first * frame), int(min(last * frame, len(pcm))))]
+    if len(starts) < len(sentences) - 1:
+        logging.warning(f"Pausas insuficientes no áudio do roteiro ({len(starts)} para {len(sentences) - 1} fronteiras de frase).")
+        return None
+
+    # Tempo com voz antes de cada pausa x tempo com voz esperado antes de cada fronteira de frase
+    voiced_before = np.concatenate(([0], np.cumsum(~silent)))[starts].astype(np.float64)
+    chars = np.array([n for _, n in sentences], dtype=np.float64)
+    total_voiced = float(len(voiced))
+    expected = total_voiced * np.cumsum(chars)[:-1] / chars.sum()
+    scale = total_voiced / len(sentences)
+    lengths = (ends - starts).astype(np.float64)
+    deviation = (voiced_before[None, :] - expected[:, None]) / scale
+    cost = deviation ** 2 + length_weight * (1.0 - lengths / lengths.max())[None, :]
+
+    # Viterbi monotônico: a fronteira k usa uma pausa posterior à da fronteira k-1 (mínimo de prefixo, O(frases x pausas))
+    n_bounds, n_pauses = cost.shape
+    index = np.arange(n_pauses)
+    acc = cost[0].copy()
+    back = np.zeros((n_bounds, n_pauses), dtype=np.int64)
+    for k in range(1, n_bounds):
+        best_prev = np.minimum.accumulate(acc)
+        best_prev_at = np.maximum.accumulate(np.where(acc <= best_prev, index, 0))
+        acc = np.concatenate(([np.inf], cost[k, 1:] + best_prev[:-1]))
+        back[k, 1:] = best_prev_at[:-1]
+    if not np.isfinite(acc.min()):
+        return None
+    chosen = [int(np.argmin(acc))]
+    for k in range(n_bounds - 1, 0, -1):
+        chosen.append(int(back[k, chosen[-1]]))
+    chosen.reverse()
+
+    seg_starts, seg_ends = [first], []
+    for k, pause in enumerate(chosen):
+        if sentences[k][0] == sentences[k + 1][0]:
+            continue # fronteira entre frases do mesmo fato
+        if abs(deviation[k, pause]) > max_deviation:
+            logging.warning(f"Pausa após o fato #{sentences[k][0] + 1} longe da posição esperada no áudio do roteiro.")
+            return None
+        seg_ends.append(starts[pause]); seg_starts.append(ends[pause])
+    seg_ends.append(last)
+    return [(int(s * frame), int(min(e * frame, len(pcm)))) for s, e in zip(seg_starts, seg_ends)]
+
+
+def narrate_script(facts, synth_fn, script_path, requests_per_second=None, max_retries=2, retry_backoff=1.0):
+    """
+    Narra todos os fatos numa única síntese (o motor pode dividir o texto em menos requisições que uma por fato)
+    e devolve (pcm, offsets): o áudio inteiro decodificado uma vez e o trecho (início, fim) de cada fato.
+    Retorna None se a síntese falhar ou os limites não puderem ser recuperados; o chamador volta à síntese por fato.
+    """
+    if not facts:
+        return None
+    script = build_script(facts)
+    logging.info(f"Sintetizando roteiro único com {len(facts)} fatos ({len(script)} caracteres).")
+    path = _synthesize_with_retry(0, script, synth_fn, lambda _i: script_path, RateLimiter(requests_per_second),
+                                  max_retries, retry_backoff)
+    if not path:
+        return None
+    try:
+        pcm = decode_audio(path)
+    except Exception as e:
+        logging.error(f"Falha ao decodificar o áudio do roteiro: {e}")
+        return None
+    offsets = split_at_pauses(pcm, facts)
+    if offsets is None:
+        if os.path.exists(path): os.remove(path)
+        return None
+    logging.info(f"Roteiro narrado ({len(pcm) / AUDIO_FPS:.1f}s); limites dos {len(offsets)} fatos recuperados pelas pausas.")
+    return pcm, offsets
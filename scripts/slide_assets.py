@@ -0,0 +1,138 @@
+import io
+import hashlib
+import logging
+from functools import lru_cache
+from collections import namedtuple
+
+import numpy as np
+from PIL import Image as PILImage
+
+from disk_cache import DiskCache
+
+SLIDE_WIDTH, SLIDE_HEIGHT = 1080, 1920
+DEFAULT_KEN_BURNS_ZOOM = 1.12
+# Direções de pan alternadas entre os slides (dx, dy em frações da folga disponível)
+PAN_DIRECTIONS = ((0, -1), (1, 0), (0, 1), (-1, 0), (1, -1), (-1, 1))
+
+# Imagem de um slide mantida em memória: source = "vertex", "cache" ou "placeholder";
+# data = bytes codificados (PNG/JPEG do Imagen), PIL.Image (placeholder) ou None (fundo de cor sólida)
+SlideImage = namedtuple("SlideImage", ["source", "data"])
+
+
+def image_digest(image):
+    """Chave de conteúdo da imagem (caminho ou bytes); None para PIL.Image, que não entra no cache."""
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(image).hexdigest()
+    if isinstance(image, str):
+        return DiskCache.file_digest(image)
+    return None
+
+
+def open_image(image):
+    """Abre como RGB uma imagem dada por caminho, bytes codificados ou PIL.Image."""
+    if isinstance(image, PILImage.Image):
+        return image.convert("RGB")
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        image = io.BytesIO(image)
+    with PILImage.open(image) as img:
+        return img.convert("RGB")
+
+
+def cover_resize(img, width, height):
+    """Cobre width x height mantendo a proporção e corta o centro, numa única reamostragem LANCZOS."""
+    src_w, src_h = img.size
+    scale = max(width / src_w, height / src_h)
+    crop_w, crop_h = width / scale, height / scale
+    left, top = (src_w - crop_w) / 2, (src_h - crop_h) / 2
+    return img.convert("RGB").resize((width, height), PILImage.LANCZOS, box=(left, top, left + crop_w, top + crop_h))
+
+
+def _cache_key(image, width, height, cache):
+    digest = image_digest(image) if cache else None
+    return DiskCache.make_key(digest, width=width, height=height, fit="cover") if digest else None
+
+
+def _normalize(image, width, height, cache):
+    """Retorna (imagem normalizada, caminho no cache ou None). Imagens já no tamanho certo não são reamostradas."""
+    key = _cache_key(image, width, height, cache)
+    if key:
+        data = cache.read_bytes(key)
+        if data:
+            return open_image(data), cache.path_for(key)
+    img = open_image(image)
+    normalized = img if img.size == (width, height) else cover_resize(img, width, height)
+    cached = None
+    if key:
+        buffer = io.BytesIO()
+        normalized.save(buffer, "PNG", compress_level=1)
+        try: cached = cache.put_bytes(key, buffer.getvalue())
+        except Exception as e_cache: logging.warning(f"Falha ao gravar slide normalizado no cache: {e_cache}")
+    return normalized, cached
+
+
+def normalize_slide(image, width=SLIDE_WIDTH, height=SLIDE_HEIGHT, cache=None):
+    """
+    Array RGB uint8 (height x width x 3) da imagem (caminho, bytes ou PIL.Image) já redimensionada e cortada
+    para o slide. Com cache, a normalização acontece uma vez por conteúdo de imagem, não a cada quadro nem a cada execução.
+    """
+    normalized, _ = _normalize(image, width, height, cache)
+    return np.asarray(normalized)
+
+
+def normalize_slide_file(image, dest_path, width, height, cache=None):
+    """Grava em dest_path a imagem normalizada (ex.: a fonte maior usada pelo Ken Burns)."""
+    key = _cache_key(image, width, height, cache)
+    if key and cache.fetch_to(key, dest_path):
+        return dest_path
+    normalized, _ = _normalize(image, width, height, cache)
+    normalized.save(dest_path, "PNG", compress_level=1)
+    return dest_path
+
+
+def ken_burns_boxes(n_frames, width, height, src_w, src_h, zoom_in=True, pan=(0, 0)):
+    """
+    Caixas de recorte (left, top, right, bottom) na fonte para todos os quadros de uma vez.
+    A janela vai da fonte inteira até o recorte 1:1 (ou o contrário), com easing suave, e o centro
+    desloca na direção `pan` só dentro da folga que a janela deixa, então nunca sai da imagem.
+    """
+    t = np.linspace(0.0, 1.0, n_frames) if n_frames > 1 else np.zeros(1)
+    ease = (t * t * (3.0 - 2.0 * t))[:, None]
+    full = np.array([src_w, src_h], dtype=np.float64)
+    tight = np.array([width, height], dtype=np.float64)
+    start, end = (full, tight) if zoom_in else (tight, full)
+    size = start + (end - start) * ease
+    slack = (full - size) / 2
+    pan_amount = ease if zoom_in else 1.0 - ease
+    center = full / 2 + np.asarray(pan, dtype=np.float64) * slack * pan_amount
+    return np.concatenate([center - size / 2, center + size / 2], axis=1)
+
+
+@lru_cache(maxsize=2)
+def _motion_source(path):
+    # Os slides são codificados um após o outro: só a fonte do slide atual (e a anterior) fica em memória
+    with PILImage.open(path) as img:
+        return img.convert("RGB")
+
+
+def ken_burns_clip(source_path, duration, fps, slide_index=0, width=SLIDE_WIDTH, height=SLIDE_HEIGHT, caption=None):
+    """
+    Slide com zoom/pan lento a partir de uma fonte normalizada um pouco maior que o quadro.
+    Cada quadro é um único recorte + reamostragem bilinear da fonte (em C, pelo Pillow) na caixa pré-calculada;
+    `caption` = (texto, fonte) compõe a legenda queimada por cima, sem movimento.
+    """
+    from moviepy.editor import VideoClip
+    with PILImage.open(source_path) as img:
+        src_w, src_h = img.size
+    n_frames = max(1, int(round(duration * fps)))
+    boxes = ken_burns_boxes(n_frames, width, height, src_w, src_h, zoom_in=slide_index % 2 == 0,
+                            pan=PAN_DIRECTIONS[slide_index % len(PAN_DIRECTIONS)])
+
+    def make_frame(t):
+        box = tuple(boxes[min(n_frames - 1, int(t * fps + 1e-6))])
+        frame = np.asarray(_motion_source(source_path).resize((width, height), PILImage.BILINEAR, box=box))
+        if caption:
+            from captions import burn_caption
+            frame = burn_caption(frame, *caption)
+        return frame
+
+    return VideoClip(make_frame, duration=duration).set_fps(fps)
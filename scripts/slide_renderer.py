@@ -0,0 +1,58 @@
+import os
+import logging
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image as PILImage, ImageDraw as PILImageDraw
+
+from text_layout import fit_text, draw_layout
+
+TEXT_COLOR = (255, 255, 255)
+STROKE_COLOR = (0, 0, 0)
+# Área segura do texto, em frações do slide (fora dela a interface do Shorts pode cobrir o texto)
+SAFE_MARGIN_X = 0.08
+SAFE_MARGIN_Y = 0.12
+
+
+def resolve_font_path(font_path_config, fallback_font_path):
+    """Escolhe a fonte configurada do canal ou, na falta dela, o fallback (ex.: assets/fonts/arial.ttf)."""
+    if font_path_config and os.path.exists(font_path_config):
+        return font_path_config
+    if font_path_config:
+        logging.warning(f"Fonte '{font_path_config}' não encontrada.")
+    if fallback_font_path and os.path.exists(fallback_font_path):
+        return fallback_font_path
+    return None
+
+
+@lru_cache(maxsize=64)
+def gradient_palette(height, top_color, bottom_color):
+    """Uma cor por linha (height x 3, uint8), interpolada linearmente entre top_color e bottom_color."""
+    steps = np.arange(height, dtype=np.float32)[:, None] / height
+    top = np.asarray(top_color, dtype=np.float32)
+    bottom = np.asarray(bottom_color, dtype=np.float32)
+    palette = (top + (bottom - top) * steps).astype(np.uint8)
+    palette.setflags(write=False)
+    return palette
+
+
+def render_gradient(width, height, top_color, bottom_color):
+    """Gera o fundo em gradiente vertical numa única operação de array."""
+    palette = gradient_palette(height, tuple(top_color), tuple(bottom_color))
+    pixels = np.ascontiguousarray(np.broadcast_to(palette[:, None, :], (height, width, 3)))
+    return PILImage.fromarray(pixels, "RGB")
+
+
+def render_fact_slide(fact_text, width, height, font_path, top_color, bottom_color):
+    """
+    Renderiza o slide de um fato: gradiente + texto centralizado com contorno.
+    O tamanho da fonte é o maior (até height/17) em que o texto cabe na área segura (ver text_layout.py).
+    """
+    img = render_gradient(width, height, top_color, bottom_color)
+    draw = PILImageDraw.Draw(img)
+
+    margin_x, margin_y = int(width * SAFE_MARGIN_X), int(height * SAFE_MARGIN_Y)
+    layout = fit_text(fact_text, font_path, width - 2 * margin_x, height - 2 * margin_y,
+                      max_size=int(height / 17), min_size=int(height / 48))
+    draw_layout(draw, layout, (margin_x, margin_y, width - margin_x, height - margin_y), TEXT_COLOR, STROKE_COLOR)
+    return img
@@ -0,0 +1,44 @@
+import os
+import sqlite3
+from contextlib import contextmanager
+from urllib.parse import quote
+
+
+def read_only_uri(path):
+    """URI mode=ro do banco: nada é criado nem alterado. FileNotFoundError se o arquivo não existir."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Banco '{path}' não existe (não é criado em modo somente leitura).")
+    return f"file:{quote(os.path.abspath(path))}?mode=ro"
+
+
+def connect(path, timeout=30.0, read_only=False):
+    """
+    Conexão SQLite usada pelos bancos do projeto (topics.db, facts.db, dedup.db): autocommit
+    (transações explícitas), WAL, synchronous=NORMAL e espera de até `timeout` segundos por lock.
+    Com read_only, abre o arquivo existente sem criar nem alterar nada (modo --plan).
+    """
+    if read_only:
+        return sqlite3.connect(read_only_uri(path), uri=True, timeout=timeout, isolation_level=None)
+    if path != ":memory:":
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    # uri=True para que attach() aceite bancos somente leitura
+    conn = sqlite3.connect(path, uri=True, timeout=timeout, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def attach(conn, path, schema, read_only=False):
+    conn.execute(f"ATTACH DATABASE ? AS {schema}", (read_only_uri(path) if read_only else path,))
+
+
+@contextmanager
+def immediate_transaction(conn):
+    """BEGIN IMMEDIATE: pega o lock de escrita já no início, então leituras e escritas do bloco não disputam com outro processo."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
@@ -0,0 +1,100 @@
+import os
+import shutil
+import logging
+import subprocess
+
+from PIL import Image as PILImage
+from moviepy.config import get_setting
+from moviepy.editor import ImageClip
+
+from audio_mix import AUDIO_FPS, write_pcm_audio
+from workspace import temp_dir
+
+DEFAULT_STILL_PRESET = "ultrafast"
+
+
+def ffmpeg_binary():
+    return get_setting("FFMPEG_BINARY")
+
+
+def run_ffmpeg(args, description):
+    cmd = [ffmpeg_binary(), "-hide_banner", "-loglevel", "error", "-y"] + args
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        stderr = result.stderr.decode("utf-8", errors="replace").strip()
+        raise RuntimeError(f"ffmpeg falhou ({description}): {stderr[-1000:]}")
+
+
+def is_static_clip(clip):
+    """Um slide é estático quando é um ImageClip (inclui ColorClip) sem máscara animada."""
+    return isinstance(clip, ImageClip) and getattr(clip, "img", None) is not None and clip.mask is None
+
+
+def encode_still_segment(image_path, duration, output_path, fps, preset=DEFAULT_STILL_PRESET):
+    """Codifica um único quadro repetido por `duration` segundos, com tuning de imagem parada do x264."""
+    n_frames = max(1, int(round(duration * fps)))
+    # A imagem é lida 1x por segundo e convertida para yuv420p antes de ser duplicada até `fps`,
+    # então decodificação PNG e conversão de cor não acontecem para cada quadro de saída.
+    run_ffmpeg([
+        "-loop", "1", "-framerate", "1", "-i", image_path,
+        "-vf", f"format=yuv420p,fps={fps}",
+        "-frames:v", str(n_frames),
+        "-c:v", "libx264", "-preset", preset, "-tune", "stillimage",
+        output_path
+    ], f"segmento {os.path.basename(output_path)}")
+    return n_frames
+
+
+def encode_moving_segment(clip, output_path, fps, preset=DEFAULT_STILL_PRESET):
+    """Slides não estáticos continuam passando pelo moviepy, com os mesmos parâmetros de codificação."""
+    clip.without_audio().write_videofile(
+        output_path, codec="libx264", fps=fps, preset=preset, audio=False,
+        ffmpeg_params=["-pix_fmt", "yuv420p"], logger=None
+    )
+
+
+def concat_and_mux(segment_paths, audio_path, output_path, work_dir, movflags="+faststart"):
+    """Une os segmentos com cópia de stream e, se houver, multiplexa a trilha de áudio na mesma passada."""
+    list_path = os.path.join(work_dir, "segments.txt")
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path in segment_paths:
+            f.write(f"file '{os.path.abspath(path)}'\n")
+    args = ["-f", "concat", "-safe", "0", "-i", list_path]
+    if audio_path:
+        args += ["-i", audio_path, "-map", "0:v:0", "-map", "1:a:0"]
+    args += ["-c", "copy", "-movflags", movflags, output_path]
+    run_ffmpeg(args, "concatenação/mux")
+
+
+def render_still_slides(slide_clips, audio_pcm, output_path, fps, preset=DEFAULT_STILL_PRESET, audio_fps=AUDIO_FPS,
+                        movflags="+faststart"):
+    """
+    Renderiza os slides sem compor quadro a quadro: cada slide estático vira um segmento curto
+    gerado a partir de uma única imagem, os segmentos são unidos com cópia de stream e a trilha
+    de áudio (buffer PCM de narração + música) é codificada e multiplexada no final.
+    Com movflags de MP4 fragmentado o arquivo final é escrito só para frente (upload em streaming).
+    """
+    work_dir = temp_dir("still_render_")
+    try:
+        segment_paths = []
+        static_count = 0
+        for i, clip in enumerate(slide_clips):
+            segment_path = os.path.join(work_dir, f"segment_{i:04d}.mp4")
+            if is_static_clip(clip):
+                frame_path = os.path.join(work_dir, f"slide_{i:04d}.png")
+                PILImage.fromarray(clip.img[:, :, :3]).save(frame_path, compress_level=1)
+                encode_still_segment(frame_path, clip.duration, segment_path, fps, preset)
+                static_count += 1
+            else:
+                encode_moving_segment(clip, segment_path, fps, preset)
+            segment_paths.append(segment_path)
+        logging.info(f"{static_count}/{len(slide_clips)} slides codificados como imagem estática.")
+
+        audio_path = None
+        if audio_pcm is not None:
+            audio_path = os.path.join(work_dir, "audio.m4a")
+            write_pcm_audio(audio_pcm, audio_path, fps=audio_fps)
+        concat_and_mux(segment_paths, audio_path, output_path, work_dir, movflags=movflags)
+        return output_path
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
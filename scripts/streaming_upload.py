@@ -0,0 +1,80 @@
+import os
+import time
+import logging
+import threading
+
+from googleapiclient.http import MediaUpload
+
+STREAM_CHUNK_SIZE = 8 * 1024 * 1024 # Precisa ser múltiplo de 256 KiB para o upload resumable
+FRAGMENTED_MP4_MOVFLAGS = "frag_keyframe+empty_moov+default_base_moof"
+
+
+class StreamProducerError(RuntimeError):
+    """O encoder falhou ou parou de escrever; o upload em streaming não pode ser concluído."""
+
+
+class GrowingFileUpload(MediaUpload):
+    """
+    Fonte de mídia de tamanho desconhecido para o upload resumable: lê um arquivo que ainda
+    está sendo escrito pelo encoder (MP4 fragmentado, escrito só para frente) e entrega cada
+    chunk assim que ele existe no disco. Uma leitura curta só acontece quando o encoder terminou,
+    o que sinaliza ao googleapiclient o fim do upload.
+    """
+
+    def __init__(self, path, producer_done, producer_ok=lambda: True, mimetype="video/mp4",
+                 chunksize=STREAM_CHUNK_SIZE, poll_interval=0.25, stall_timeout=1800):
+        super().__init__()
+        self._path = path
+        self._producer_done = producer_done
+        self._producer_ok = producer_ok
+        self._mimetype = mimetype
+        self._chunksize = chunksize
+        self._poll_interval = poll_interval
+        self._stall_timeout = stall_timeout
+        self._lock = threading.Lock()
+
+    def chunksize(self):
+        return self._chunksize
+
+    def mimetype(self):
+        return self._mimetype
+
+    def size(self):
+        # Desconhecido até o encoder terminar; depois disso o total é informado na última leitura curta.
+        return None
+
+    def resumable(self):
+        return True
+
+    def has_stream(self):
+        return False
+
+    def _current_size(self):
+        try:
+            return os.path.getsize(self._path)
+        except OSError:
+            return 0
+
+    def getbytes(self, begin, length):
+        waited_since = time.monotonic()
+        last_size = -1
+        while True:
+            finished = self._producer_done.is_set()
+            if finished and not self._producer_ok():
+                raise StreamProducerError(f"Encoder falhou; upload em streaming de '{self._path}' abortado.")
+            size = self._current_size()
+            if size - begin >= length or finished:
+                break
+            if size != last_size:
+                last_size = size; waited_since = time.monotonic()
+            elif time.monotonic() - waited_since > self._stall_timeout:
+                raise StreamProducerError(f"Arquivo '{self._path}' parou de crescer há {self._stall_timeout}s; abortando upload em streaming.")
+            time.sleep(self._poll_interval)
+        with self._lock, open(self._path, "rb") as f:
+            f.seek(begin)
+            data = f.read(length)
+        logging.info(f"Streaming upload: chunk {begin}-{begin + len(data) - 1} lido ({'final' if len(data) < length else 'parcial'}).")
+        return data
+
+    def to_json(self):
+        raise NotImplementedError("GrowingFileUpload não pode ser serializado.")
@@ -0,0 +1,116 @@
+import os
+import logging
+from functools import lru_cache
+
+from PIL import ImageFont as PILImageFont
+
+
+@lru_cache(maxsize=128)
+def load_font(font_path, size):
+    """
+    Carrega (uma única vez por caminho/tamanho) a fonte TrueType usada nos slides.
+    Se o caminho não existir ou falhar, usa a fonte padrão do Pillow no mesmo tamanho.
+    """
+    if font_path and os.path.exists(font_path):
+        try:
+            font = PILImageFont.truetype(font_path, size)
+            logging.debug(f"Fonte carregada: {font_path} (tamanho {size})")
+            return font
+        except (IOError, OSError) as e:
+            logging.warning(f"Erro ao carregar fonte '{font_path}': {e}. Usando fonte padrão Pillow.")
+    elif font_path:
+        logging.warning(f"Fonte '{font_path}' não encontrada. Usando fonte padrão Pillow.")
+    return PILImageFont.load_default(size=size)
+
+
+class FontMetrics:
+    """Avanços horizontais de uma fonte/tamanho, medidos uma vez por palavra e reaproveitados entre slides."""
+
+    def __init__(self, font_path, size):
+        self.font = load_font(font_path, size)
+        self.size = size
+        ascent, descent = self.font.getmetrics()
+        self.line_height = ascent + descent
+        self.space_width = self.font.getlength(" ")
+        self._advances = {}
+
+    def advance(self, word):
+        width = self._advances.get(word)
+        if width is None:
+            width = self._advances[word] = self.font.getlength(word)
+        return width
+
+
+@lru_cache(maxsize=256)
+def font_metrics(font_path, size):
+    return FontMetrics(font_path, size)
+
+
+class TextLayout:
+    """Resultado do layout: linhas já quebradas, largura de cada uma e dimensões do bloco."""
+
+    def __init__(self, lines, line_widths, metrics, spacing, stroke_width):
+        self.lines = lines
+        self.line_widths = line_widths
+        self.metrics = metrics
+        self.font = metrics.font
+        self.font_size = metrics.size
+        self.spacing = spacing
+        self.stroke_width = stroke_width
+        self.width = (max(line_widths) if line_widths else 0) + 2 * stroke_width
+        self.height = len(lines) * metrics.line_height + max(0, len(lines) - 1) * spacing + 2 * stroke_width
+
+    def fits(self, max_width, max_height):
+        return self.width <= max_width and self.height <= max_height
+
+
+def wrap_words(words, metrics, max_width):
+    """Quebra gulosa em uma única passada, somando os avanços em cache (sem medir a linha inteira a cada palavra)."""
+    lines, widths = [], []
+    current, current_width = [], 0.0
+    for word in words:
+        word_width = metrics.advance(word)
+        candidate_width = current_width + metrics.space_width + word_width if current else word_width
+        if current and candidate_width > max_width:
+            lines.append(" ".join(current)); widths.append(current_width)
+            current, current_width = [word], word_width
+        else:
+            current.append(word); current_width = candidate_width
+    if current:
+        lines.append(" ".join(current)); widths.append(current_width)
+    return lines, widths
+
+
+def layout_text(text, font_path, font_size, max_width, line_spacing=0.2, stroke_ratio=0.05):
+    metrics = font_metrics(font_path, font_size)
+    stroke_width = max(1, int(font_size * stroke_ratio)) if stroke_ratio else 0
+    lines, widths = wrap_words(text.split(), metrics, max_width - 2 * stroke_width)
+    return TextLayout(lines, widths, metrics, int(font_size * line_spacing), stroke_width)
+
+
+def fit_text(text, font_path, max_width, max_height, max_size, min_size=12, line_spacing=0.2, stroke_ratio=0.05):
+    """
+    Busca binária pelo maior tamanho de fonte cujo layout cabe em max_width x max_height.
+    Se nem min_size couber, devolve o layout em min_size.
+    """
+    low, high = min_size, max(min_size, max_size)
+    best = None
+    while low <= high:
+        size = (low + high) // 2
+        layout = layout_text(text, font_path, size, max_width, line_spacing, stroke_ratio)
+        if layout.fits(max_width, max_height):
+            best, low = layout, size + 1
+        else:
+            high = size - 1
+    return best or layout_text(text, font_path, min_size, max_width, line_spacing, stroke_ratio)
+
+
+def draw_layout(draw, layout, box, fill, stroke_fill):
+    """Desenha o layout centralizado (horizontal e verticalmente) na caixa (left, top, right, bottom)."""
+    left, top, right, bottom = box
+    y = top + (bottom - top - layout.height) / 2 + layout.stroke_width
+    for line, line_width in zip(layout.lines, layout.line_widths):
+        x = left + (right - left - line_width) / 2
+        draw.text((x, y), line, font=layout.font, fill=fill,
+                  stroke_width=layout.stroke_width, stroke_fill=stroke_fill)
+        y += layout.metrics.line_height + layout.spacing
@@ -0,0 +1,282 @@
+import os
+import sys
+import time
+import random
+import logging
+import argparse
+
+from sqlite_util import connect, immediate_transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS topics (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL UNIQUE,
+    weight REAL NOT NULL DEFAULT 1.0,
+    active INTEGER NOT NULL DEFAULT 1,
+    created_at REAL NOT NULL,
+    cum_weight REAL -- Peso acumulado (ordem do id) dos temas sorteáveis; NULL = inativo ou peso 0
+);
+CREATE INDEX IF NOT EXISTS idx_topics_active ON topics(active);
+CREATE INDEX IF NOT EXISTS idx_topics_cum_weight ON topics(cum_weight);
+CREATE TABLE IF NOT EXISTS topic_usage (
+    id INTEGER PRIMARY KEY,
+    channel TEXT NOT NULL,
+    topic_id INTEGER NOT NULL REFERENCES topics(id),
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_usage_channel_time ON topic_usage(channel, used_at);
+CREATE TABLE IF NOT EXISTS topic_last_used (
+    channel TEXT NOT NULL,
+    topic_id INTEGER NOT NULL REFERENCES topics(id),
+    last_used_at REAL NOT NULL,
+    uses INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (channel, topic_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_last_used_channel_time ON topic_last_used(channel, last_used_at);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+STRATEGIES = ("weighted", "lru")
+WEIGHTED_ATTEMPTS = 32 # Sorteios rejeitados (tema em quarentena) antes de cair na varredura completa
+
+
+class TopicStore:
+    """
+    Temas e histórico por canal num SQLite embutido (topics.db).
+    A escolha e o registro de um tema acontecem na mesma transação (BEGIN IMMEDIATE),
+    então canais rodando em paralelo não escolhem com base num histórico desatualizado.
+    O sorteio usa só buscas em índice: 'weighted' sorteia um ponto no peso acumulado (coluna
+    cum_weight, refeita quando os temas mudam) e 'lru' percorre o índice (canal, last_used_at).
+    """
+
+    def __init__(self, db_path, timeout=30.0, read_only=False):
+        self.db_path = db_path
+        self.conn = connect(db_path, timeout, read_only=read_only)
+        if not read_only: # Somente leitura (--plan): só choose(record=False), recent e stats
+            self.conn.execute("PRAGMA foreign_keys=ON")
+            self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute("INSERT INTO meta(key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                          (key, str(value)))
+
+    def add_topics(self, titles, weight=1.0):
+        """Insere temas novos (os já existentes mantêm seu peso). Retorna quantos foram inseridos."""
+        now = time.time()
+        with immediate_transaction(self.conn) as conn:
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO topics(title, weight, created_at) VALUES (?, ?, ?)",
+                             ((t, weight, now) for t in titles))
+            inserted = conn.total_changes - before
+            if inserted:
+                self._rebuild_cumulative(conn)
+            return inserted
+
+    def set_weight(self, title, weight):
+        with immediate_transaction(self.conn) as conn:
+            conn.execute("UPDATE topics SET weight = ? WHERE title = ?", (weight, title))
+            self._rebuild_cumulative(conn)
+
+    @staticmethod
+    def _rebuild_cumulative(conn):
+        """Refaz o peso acumulado dos temas sorteáveis (O(temas), só quando temas ou pesos mudam)."""
+        rows = conn.execute("SELECT id, weight FROM topics WHERE active = 1 AND weight > 0 ORDER BY id").fetchall()
+        conn.execute("UPDATE topics SET cum_weight = NULL WHERE cum_weight IS NOT NULL")
+        total, updates = 0.0, []
+        for topic_id, weight in rows:
+            total += weight
+            updates.append((total, topic_id))
+        conn.executemany("UPDATE topics SET cum_weight = ? WHERE id = ?", updates)
+
+    def sync_active(self, titles):
+        """Ativa exatamente os temas de `titles` (os removidos do arquivo deixam de ser sorteados). Retorna quantos foram desativados."""
+        with immediate_transaction(self.conn) as conn:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS wanted_titles (title TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM wanted_titles")
+            conn.executemany("INSERT OR IGNORE INTO wanted_titles(title) VALUES (?)", ((t,) for t in titles))
+            before = conn.total_changes
+            conn.execute("UPDATE topics SET active = 0 WHERE active = 1 AND title NOT IN (SELECT title FROM wanted_titles)")
+            deactivated = conn.total_changes - before
+            conn.execute("UPDATE topics SET active = 1 WHERE active = 0 AND title IN (SELECT title FROM wanted_titles)")
+            conn.execute("DELETE FROM wanted_titles")
+            self._rebuild_cumulative(conn)
+        return deactivated
+
+    def sync_topics_file(self, topic_file):
+        """Importa topics.txt quando ele muda (tamanho/mtime): acrescenta os temas novos e desativa os removidos."""
+        if not os.path.exists(topic_file):
+            return 0
+        st = os.stat(topic_file)
+        fingerprint = f"{st.st_size}:{int(st.st_mtime)}"
+        meta_key = f"topics_file:{os.path.abspath(topic_file)}"
+        if self._get_meta(meta_key) == fingerprint:
+            return 0
+        with open(topic_file, "r", encoding="utf-8") as f:
+            titles = [line.strip() for line in f if line.strip()]
+        inserted = self.add_topics(titles)
+        deactivated = self.sync_active(titles) if titles else 0
+        with immediate_transaction(self.conn):
+            self._set_meta(meta_key, fingerprint)
+        if inserted:
+            logging.info(f"{inserted} tema(s) novo(s) importado(s) de {topic_file}.")
+        if deactivated:
+            logging.info(f"{deactivated} tema(s) removido(s) de {topic_file} desativado(s).")
+        return inserted
+
+    def import_history_file(self, history_file, channel):
+        """Importa uma única vez o topic_history.txt legado (sem canal) como histórico de `channel`."""
+        if not os.path.exists(history_file) or self._get_meta("legacy_history_imported"):
+            return 0
+        with open(history_file, "r", encoding="utf-8") as f:
+            titles = [line.strip() for line in f if line.strip()]
+        base = time.time() - len(titles) - 1 # Preserva a ordem do arquivo (mais antigo primeiro)
+        imported = 0
+        with immediate_transaction(self.conn) as conn:
+            for offset, title in enumerate(titles):
+                row = conn.execute("SELECT id FROM topics WHERE title = ?", (title,)).fetchone()
+                if row:
+                    self._record_use(conn, channel, row[0], base + offset)
+                    imported += 1
+            self._set_meta("legacy_history_imported", f"{channel}:{imported}")
+        logging.info(f"{imported} entrada(s) de {history_file} importada(s) como histórico do canal '{channel}'.")
+        return imported
+
+    @staticmethod
+    def _record_use(conn, channel, topic_id, used_at):
+        conn.execute("INSERT INTO topic_usage(channel, topic_id, used_at) VALUES (?, ?, ?)", (channel, topic_id, used_at))
+        conn.execute("""INSERT INTO topic_last_used(channel, topic_id, last_used_at) VALUES (?, ?, ?)
+                        ON CONFLICT(channel, topic_id) DO UPDATE SET last_used_at = excluded.last_used_at, uses = uses + 1""",
+                     (channel, topic_id, used_at))
+
+    @staticmethod
+    def _quarantined(conn, channel, history_len):
+        """Temas dos últimos `history_len` usos do canal (busca no índice (channel, used_at))."""
+        if history_len <= 0:
+            return set()
+        return {row[0] for row in conn.execute(
+            "SELECT topic_id FROM topic_usage WHERE channel = ? ORDER BY used_at DESC LIMIT ?", (channel, history_len))}
+
+    @staticmethod
+    def _pick_weighted(conn, quarantined):
+        """
+        Sorteio proporcional ao peso: um ponto aleatório em [0, peso total) cai no tema cujo intervalo
+        de peso acumulado o contém (busca no índice de cum_weight). Sorteios em quarentena são rejeitados,
+        o que mantém a proporção entre os elegíveis; None se a quarentena rejeitar todas as tentativas.
+        """
+        total = conn.execute("SELECT MAX(cum_weight) FROM topics").fetchone()[0]
+        if not total:
+            return None
+        for _ in range(WEIGHTED_ATTEMPTS):
+            row = conn.execute("SELECT id, title FROM topics WHERE cum_weight > ? ORDER BY cum_weight LIMIT 1",
+                               (random.random() * total,)).fetchone()
+            if row and row[0] not in quarantined:
+                return row
+        return None
+
+    @staticmethod
+    def _pick_weighted_scan(conn, quarantined):
+        # Quarentena cobrindo quase todo o peso: sorteio exato entre os elegíveis, varrendo a tabela (raro)
+        rows = conn.execute("SELECT id, title, weight FROM topics WHERE cum_weight IS NOT NULL").fetchall()
+        eligible = [row for row in rows if row[0] not in quarantined]
+        if not eligible:
+            return None
+        chosen = random.choices(eligible, weights=[row[2] for row in eligible])[0]
+        return chosen[0], chosen[1]
+
+    @staticmethod
+    def _pick_lru(conn, channel, quarantined):
+        """Um tema nunca usado pelo canal (a partir de um id aleatório); senão o usado há mais tempo fora da quarentena."""
+        max_id = conn.execute("SELECT MAX(id) FROM topics").fetchone()[0]
+        if max_id is None:
+            return None
+        start = random.randint(1, max_id)
+        for low, high in ((start, max_id), (1, start - 1)):
+            row = conn.execute("""
+                SELECT t.id, t.title FROM topics t
+                WHERE t.id BETWEEN ? AND ? AND t.active = 1 AND t.weight > 0
+                  AND NOT EXISTS (SELECT 1 FROM topic_last_used lu WHERE lu.channel = ? AND lu.topic_id = t.id)
+                ORDER BY t.id LIMIT 1""", (low, high, channel)).fetchone()
+            if row:
+                return row
+        for topic_id, title in conn.execute("""
+                SELECT t.id, t.title FROM topic_last_used lu JOIN topics t ON t.id = lu.topic_id
+                WHERE lu.channel = ? AND t.active = 1 AND t.weight > 0
+                ORDER BY lu.last_used_at""", (channel,)):
+            if topic_id not in quarantined:
+                return topic_id, title
+        return None
+
+    def choose(self, channel, history_len=10, strategy="weighted", record=True):
+        """
+        Escolhe um tema ativo não usado pelo canal nos seus últimos `history_len` vídeos
+        ('weighted' = sorteio proporcional ao peso; 'lru' = nunca usado ou usado há mais tempo).
+        Se todos estiverem em quarentena, recicla o menos recente. Retorna o título ou None.
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Estratégia de tema desconhecida: {strategy} (use {', '.join(STRATEGIES)})")
+        with immediate_transaction(self.conn) as conn:
+            quarantined = self._quarantined(conn, channel, history_len)
+            if strategy == "weighted":
+                row = self._pick_weighted(conn, quarantined) or self._pick_weighted_scan(conn, quarantined)
+            else:
+                row = self._pick_lru(conn, channel, quarantined)
+            if row is None:
+                row = self._pick_lru(conn, channel, set())
+                if row:
+                    logging.warning(f"Todos os temas foram usados nos últimos {history_len} vídeos de '{channel}'. Reciclando o menos recente.")
+            if row and record:
+                self._record_use(conn, channel, row[0], time.time())
+        return row[1] if row else None
+
+    def recent(self, channel, limit=10):
+        return [r[0] for r in self.conn.execute("""
+            SELECT t.title FROM topic_usage u JOIN topics t ON t.id = u.topic_id
+            WHERE u.channel = ? ORDER BY u.used_at DESC LIMIT ?""", (channel, limit))]
+
+    def stats(self):
+        topics, active = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(active), 0) FROM topics").fetchone()
+        channels = dict(self.conn.execute("SELECT channel, COUNT(*) FROM topic_usage GROUP BY channel"))
+        return {"topics": topics, "active": active, "uses_by_channel": channels}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, stream=sys.stdout, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Manutenção do banco de temas (topics.db).")
+    parser.add_argument("--db", default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "topics.db"))
+    sub = parser.add_subparsers(dest="command", required=True)
+    import_parser = sub.add_parser("import", help="Importa temas de um arquivo texto (um por linha).")
+    import_parser.add_argument("file")
+    import_parser.add_argument("--weight", type=float, default=1.0)
+    weight_parser = sub.add_parser("weight", help="Altera o peso de um tema (0 = nunca sorteado).")
+    weight_parser.add_argument("title")
+    weight_parser.add_argument("weight", type=float)
+    recent_parser = sub.add_parser("recent", help="Últimos temas usados por um canal.")
+    recent_parser.add_argument("channel")
+    recent_parser.add_argument("--limit", type=int, default=10)
+    sub.add_parser("stats")
+    args = parser.parse_args()
+
+    with TopicStore(args.db) as store:
+        if args.command == "import":
+            with open(args.file, "r", encoding="utf-8") as f:
+                count = store.add_topics([line.strip() for line in f if line.strip()], weight=args.weight)
+            print(f"{count} tema(s) novo(s) importado(s).")
+        elif args.command == "weight":
+            store.set_weight(args.title, args.weight)
+        elif args.command == "recent":
+            print("\n".join(store.recent(args.channel, args.limit)))
+        else:
+            print(store.stats())
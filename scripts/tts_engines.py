@@ -0,0 +1,170 @@
+import io
+import os
+import wave
+import shutil
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from audio_mix import AUDIO_FPS, convert_pcm
+from workspace import active_root
+
+ENGINES = ("gtts", "espeak", "piper")
+
+
+class TTSEngine:
+    """
+    Interface dos motores de narração usados por generate_audio_from_text.
+    save() grava o áudio de um texto num arquivo; motores locais também implementam
+    synthesize_batch(), que sintetiza todos os fatos de uma vez direto para PCM.
+    """
+
+    name = "base"
+    extension = ".mp3"
+    supports_batch = False
+
+    def cache_params(self):
+        """Parâmetros que mudam o áudio gerado e por isso entram na chave do cache de TTS."""
+        return {}
+
+    def save(self, text, lang, path):
+        raise NotImplementedError
+
+    def synthesize_batch(self, texts, lang):
+        """Retorna (pcm, offsets): um buffer float32 (AUDIO_FPS, estéreo) e o trecho (início, fim) de cada texto."""
+        raise NotImplementedError(f"O motor '{self.name}' não sintetiza em lote.")
+
+
+class GTTSEngine(TTSEngine):
+    """Google Translate TTS (rede). `load` devolve a classe gTTS, carregada sob demanda."""
+
+    name = "gtts"
+
+    def __init__(self, load):
+        self.load = load
+
+    def save(self, text, lang, path):
+        self.load()(text=text, lang=lang, slow=False).save(path)
+
+
+def wavs_to_pcm(wavs):
+    """
+    Junta vários WAV (mesma taxa e canais) e converte tudo numa única chamada ao ffmpeg.
+    Os offsets de cada trecho são reescalados para AUDIO_FPS.
+    """
+    chunks, bounds, params = [], [], None
+    position = 0
+    for data in wavs:
+        with wave.open(io.BytesIO(data), "rb") as w:
+            current = (w.getframerate(), w.getnchannels(), w.getsampwidth())
+            if params and current != params:
+                raise ValueError(f"WAVs com formatos diferentes no lote: {params} x {current}")
+            params = current
+            frames = w.readframes(w.getnframes())
+        n_frames = len(frames) // (current[1] * current[2])
+        chunks.append(frames); bounds.append((position, position + n_frames))
+        position += n_frames
+    if params[2] != 2:
+        raise ValueError(f"Esperado PCM de 16 bits, recebido {params[2] * 8} bits.")
+    pcm = convert_pcm(b"".join(chunks), params[0], params[1])
+    ratio = AUDIO_FPS / params[0]
+    offsets = [(min(len(pcm), int(round(start * ratio))), min(len(pcm), int(round(end * ratio)))) for start, end in bounds]
+    return pcm, offsets
+
+
+class EspeakEngine(TTSEngine):
+    """espeak-ng local (offline). Em lote, um processo por texto em paralelo, com o WAV lido direto do stdout."""
+
+    name = "espeak"
+    extension = ".wav"
+    supports_batch = True
+
+    def __init__(self, voice=None, words_per_minute=None, binary=None, max_workers=4):
+        self.binary = binary or shutil.which("espeak-ng") or shutil.which("espeak")
+        if not self.binary:
+            raise RuntimeError("espeak-ng não encontrado no PATH (ex.: apt-get install espeak-ng).")
+        self.voice = voice
+        self.words_per_minute = words_per_minute
+        self.max_workers = max_workers
+
+    def cache_params(self):
+        return {"voice": self.voice, "wpm": self.words_per_minute}
+
+    def _wav_bytes(self, text, lang):
+        cmd = [self.binary, "-v", self.voice or lang, "--stdout"]
+        if self.words_per_minute:
+            cmd += ["-s", str(self.words_per_minute)]
+        result = subprocess.run(cmd, input=text.encode("utf-8"), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if result.returncode != 0 or not result.stdout:
+            raise RuntimeError(f"espeak-ng falhou: {result.stderr.decode('utf-8', errors='replace')[-300:]}")
+        return result.stdout
+
+    def save(self, text, lang, path):
+        with open(path, "wb") as f:
+            f.write(self._wav_bytes(text, lang))
+
+    def synthesize_batch(self, texts, lang):
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(texts))), thread_name_prefix="espeak") as executor:
+            wavs = list(executor.map(lambda text: self._wav_bytes(text, lang), texts))
+        return wavs_to_pcm(wavs)
+
+
+class PiperEngine(TTSEngine):
+    """Piper local (offline, voz neural). Em lote, um único processo carrega o modelo e sintetiza um texto por linha."""
+
+    name = "piper"
+    extension = ".wav"
+    supports_batch = True
+
+    def __init__(self, model_path, speaker=None, binary=None):
+        self.binary = binary or shutil.which("piper")
+        if not self.binary:
+            raise RuntimeError("piper não encontrado no PATH (ex.: pip install piper-tts).")
+        if not model_path or not os.path.exists(model_path):
+            raise RuntimeError(f"Modelo do Piper não encontrado: {model_path}")
+        self.model_path = model_path
+        self.speaker = speaker
+
+    def cache_params(self):
+        return {"model": os.path.basename(self.model_path), "speaker": self.speaker}
+
+    def _command(self):
+        cmd = [self.binary, "--model", self.model_path]
+        if self.speaker is not None:
+            cmd += ["--speaker", str(self.speaker)]
+        return cmd
+
+    def _run(self, cmd, text):
+        result = subprocess.run(cmd, input=text.encode("utf-8"), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            raise RuntimeError(f"piper falhou: {result.stderr.decode('utf-8', errors='replace')[-300:]}")
+        return result.stdout.decode("utf-8", errors="replace")
+
+    def save(self, text, lang, path):
+        self._run(self._command() + ["--output_file", path], " ".join(text.split()))
+
+    def synthesize_batch(self, texts, lang):
+        with tempfile.TemporaryDirectory(prefix="piper_", dir=active_root()) as out_dir:
+            # Um texto por linha; o Piper imprime o caminho do WAV de cada linha, na ordem
+            stdout = self._run(self._command() + ["--output_dir", out_dir], "\n".join(" ".join(t.split()) for t in texts) + "\n")
+            paths = [line.strip() for line in stdout.splitlines() if line.strip().endswith(".wav")]
+            if len(paths) != len(texts):
+                raise RuntimeError(f"piper gerou {len(paths)} áudio(s) para {len(texts)} texto(s).")
+            wavs = []
+            for path in paths:
+                with open(path, "rb") as f:
+                    wavs.append(f.read())
+        return wavs_to_pcm(wavs)
+
+
+def build_engine(config, load_gtts):
+    """Motor de TTS do canal (chave tts_engine em CHANNEL_CONFIGS)."""
+    engine = config.get("tts_engine", "gtts")
+    if engine == "gtts":
+        return GTTSEngine(load_gtts)
+    if engine == "espeak":
+        return EspeakEngine(voice=config.get("tts_voice"), words_per_minute=config.get("tts_words_per_minute"),
+                            max_workers=config.get("tts_max_workers", 4))
+    if engine == "piper":
+        return PiperEngine(config.get("piper_model_path"), speaker=config.get("tts_voice"))
+    raise ValueError(f"Motor de TTS desconhecido: {engine} (use {', '.join(ENGINES)})")
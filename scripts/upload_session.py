@@ -0,0 +1,82 @@
+import os
+import json
+import time
+import random
+import logging
+
+SESSION_SUFFIX = ".upload_session.json"
+SESSION_MAX_AGE_SECONDS = 6 * 24 * 3600 # URIs de sessão resumable do YouTube expiram em ~1 semana
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+SESSION_GONE_STATUS = {404, 410}
+
+
+def session_file_for(video_path):
+    return video_path + SESSION_SUFFIX
+
+
+def _fingerprint(video_path, title):
+    st = os.stat(video_path)
+    return {"size": st.st_size, "mtime": int(st.st_mtime), "title": title}
+
+
+def load_session(video_path, title):
+    """Retorna (resumable_uri, offset_confirmado) de uma execução anterior para o mesmo arquivo, ou (None, 0)."""
+    path = session_file_for(video_path)
+    if not os.path.exists(path):
+        return None, 0
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        if saved.get("fingerprint") != _fingerprint(video_path, title):
+            logging.warning(f"Sessão de upload salva em {path} não corresponde ao arquivo atual. Ignorando.")
+            clear_session(video_path)
+            return None, 0
+        if time.time() - saved.get("created_at", 0) > SESSION_MAX_AGE_SECONDS:
+            logging.warning(f"Sessão de upload salva em {path} expirou. Iniciando nova sessão.")
+            clear_session(video_path)
+            return None, 0
+        return saved.get("resumable_uri"), int(saved.get("offset", 0))
+    except (OSError, ValueError) as e:
+        logging.warning(f"Falha ao ler sessão de upload {path}: {e}. Iniciando nova sessão.")
+        return None, 0
+
+
+def save_session(video_path, title, resumable_uri, offset, created_at=None):
+    """Grava atomicamente a URI da sessão e o último offset confirmado pelo servidor."""
+    path = session_file_for(video_path)
+    payload = {
+        "resumable_uri": resumable_uri,
+        "offset": offset,
+        "fingerprint": _fingerprint(video_path, title),
+        "created_at": created_at or time.time(),
+        "updated_at": time.time(),
+    }
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logging.warning(f"Falha ao salvar sessão de upload em {path}: {e}")
+
+
+def clear_session(video_path):
+    try:
+        os.remove(session_file_for(video_path))
+    except OSError:
+        pass
+
+
+def backoff_delay(attempt, base=2.0, cap=64.0):
+    """Backoff exponencial com jitter completo ("full jitter")."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def classify_status(status):
+    """'retry' (5xx/429/408), 'restart' (sessão expirada: 404/410) ou 'fatal' (demais 4xx)."""
+    if status in RETRYABLE_STATUS or (status and status >= 500):
+        return "retry"
+    if status in SESSION_GONE_STATUS:
+        return "restart"
+    return "fatal"
@@ -0,0 +1,106 @@
+import os
+import time
+import shutil
+import logging
+import tempfile
+from contextlib import contextmanager
+
+TMPFS_DIR = "/dev/shm"
+WORKSPACE_PREFIX = "automacao_run_"
+DEFAULT_MIN_FREE_BYTES = 1024 * 1024 * 1024
+DEFAULT_STALE_SECONDS = 12 * 3600
+
+_ACTIVE = None
+
+
+def pick_base_dir(min_free_bytes=DEFAULT_MIN_FREE_BYTES):
+    """
+    Diretório base dos temporários da execução: PIPELINE_WORKSPACE_DIR, se definido; senão o tmpfs
+    (/dev/shm) quando existe, é gravável e tem espaço livre suficiente; senão o temp do sistema.
+    """
+    override = os.environ.get("PIPELINE_WORKSPACE_DIR")
+    if override:
+        os.makedirs(override, exist_ok=True)
+        return override
+    if os.path.isdir(TMPFS_DIR) and os.access(TMPFS_DIR, os.W_OK):
+        try:
+            if shutil.disk_usage(TMPFS_DIR).free >= min_free_bytes:
+                return TMPFS_DIR
+            logging.info(f"Pouco espaço livre em {TMPFS_DIR}; temporários da execução vão para o disco.")
+        except OSError:
+            pass
+    return tempfile.gettempdir()
+
+
+def remove_stale(base_dir, max_age=DEFAULT_STALE_SECONDS):
+    """Apaga workspaces antigos deixados por execuções encerradas à força (SIGKILL, runner cancelado)."""
+    cutoff = time.time() - max_age
+    try:
+        entries = list(os.scandir(base_dir))
+    except OSError:
+        return 0
+    removed = 0
+    for entry in entries:
+        try:
+            if entry.name.startswith(WORKSPACE_PREFIX) and entry.is_dir() and entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+        except OSError:
+            continue
+    if removed:
+        logging.info(f"{removed} workspace(s) abandonado(s) removido(s) de {base_dir}.")
+    return removed
+
+
+class RunWorkspace:
+    """
+    Diretório de trabalho de uma execução (de preferência em tmpfs) para todos os arquivos intermediários:
+    segmentos e áudio do render, fontes do Ken Burns, saída do Piper. É apagado ao sair do `with`,
+    inclusive em erro ou sys.exit, e os renderizadores criam seus temporários dentro dele (temp_dir).
+    """
+
+    def __init__(self, label, base_dir=None, min_free_bytes=DEFAULT_MIN_FREE_BYTES, stale_after=DEFAULT_STALE_SECONDS):
+        self.label = label
+        self.base_dir = base_dir
+        self.min_free_bytes = min_free_bytes
+        self.stale_after = stale_after
+        self.root = None
+        self._previous = None
+
+    def __enter__(self):
+        global _ACTIVE
+        base_dir = self.base_dir or pick_base_dir(self.min_free_bytes)
+        remove_stale(base_dir, self.stale_after)
+        self.root = tempfile.mkdtemp(prefix=f"{WORKSPACE_PREFIX}{self.label}_", dir=base_dir)
+        self._previous, _ACTIVE = _ACTIVE, self
+        logging.info(f"Workspace da execução: {self.root}")
+        return self
+
+    def __exit__(self, *exc):
+        global _ACTIVE
+        _ACTIVE = self._previous
+        shutil.rmtree(self.root, ignore_errors=True)
+        logging.info(f"Workspace da execução removido: {self.root}")
+
+    def path(self, name):
+        return os.path.join(self.root, name)
+
+
+def active_root():
+    """Raiz do workspace ativo, ou None (os temporários vão para o temp do sistema)."""
+    return _ACTIVE.root if _ACTIVE else None
+
+
+def temp_dir(prefix):
+    """Cria um diretório temporário dentro do workspace ativo (o chamador continua responsável por apagá-lo)."""
+    return tempfile.mkdtemp(prefix=prefix, dir=active_root())
+
+
+@contextmanager
+def scratch_dir(prefix):
+    """Diretório temporário no workspace ativo, apagado ao sair do `with` mesmo em caso de erro."""
+    path = temp_dir(prefix)
+    try:
+        yield path
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,139 @@
+import re
+import json
+import uuid
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+UPLOAD_PATH = "/upload/youtube/v3/videos"
+CAPTIONS_PATH = "/upload/youtube/v3/captions"
+SESSION_PREFIX = "/upload/session/"
+
+
+class _UploadSession:
+    def __init__(self, metadata):
+        self.metadata = metadata
+        self.received = bytearray()
+        self.total = None
+        self.video_id = None
+
+
+class YouTubeStubServer:
+    """
+    Servidor HTTP local que se comporta como o endpoint de upload resumable do YouTube
+    (início de sessão, PUTs com Content-Range, 308 + Range, consulta de status "bytes */N")
+    e o de envio de legendas (captions.insert multipart, guardado em `captions`).
+    Serve para testar/benchmarkar upload_video sem rede nem credenciais.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.sessions = {}
+        self.captions = []
+        self.lock = threading.Lock()
+        self.fail_next_puts = 0 # Permite simular falhas transitórias (503) nos próximos PUTs
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="youtube-stub", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, fmt, *args):
+                logging.debug("youtube-stub: " + fmt % args)
+
+            def _read_body(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                return self.rfile.read(length) if length else b""
+
+            def _reply(self, code, body=None, headers=None):
+                payload = json.dumps(body).encode("utf-8") if body is not None else b""
+                self.send_response(code)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                if payload: self.wfile.write(payload)
+
+            def do_POST(self):
+                path = urlparse(self.path).path
+                if path == CAPTIONS_PATH:
+                    body = self._read_body()
+                    caption_id = uuid.uuid4().hex[:16]
+                    with server.lock:
+                        server.captions.append({"id": caption_id, "body": body})
+                    return self._reply(200, {"id": caption_id, "kind": "youtube#caption"})
+                if path != UPLOAD_PATH:
+                    return self._reply(404, {"error": "not found"})
+                body = self._read_body()
+                session_id = uuid.uuid4().hex
+                with server.lock:
+                    server.sessions[session_id] = _UploadSession(json.loads(body or b"{}"))
+                self._reply(200, headers={"Location": f"{server.base_url}{SESSION_PREFIX}{session_id}"})
+
+            def do_PUT(self):
+                path = urlparse(self.path).path
+                if not path.startswith(SESSION_PREFIX):
+                    return self._reply(404, {"error": "not found"})
+                data = self._read_body()
+                with server.lock:
+                    session = server.sessions.get(path[len(SESSION_PREFIX):])
+                    if session is None:
+                        return self._reply(404, {"error": "session not found"})
+                    if server.fail_next_puts > 0 and data:
+                        server.fail_next_puts -= 1
+                        return self._reply(503, {"error": "backend error"})
+                    content_range = self.headers.get("Content-Range", "")
+                    match = re.match(r"bytes (\d+)-(\d+)/(\d+|\*)", content_range)
+                    status_query = re.match(r"bytes \*/(\d+|\*)", content_range)
+                    if match:
+                        start, total = int(match.group(1)), match.group(3)
+                        if start == len(session.received):
+                            session.received.extend(data)
+                        elif start < len(session.received):
+                            session.received[start:] = data
+                        if total != "*":
+                            session.total = int(total)
+                    elif status_query and status_query.group(1) != "*":
+                        session.total = int(status_query.group(1))
+                    received = len(session.received)
+                    if session.total is not None and received >= session.total:
+                        session.video_id = session.video_id or uuid.uuid4().hex[:11]
+                        return self._reply(200, {"id": session.video_id, "kind": "youtube#video",
+                                                 "snippet": session.metadata.get("snippet", {})})
+                headers = {"Range": f"bytes=0-{received - 1}"} if received else {}
+                self._reply(308, headers=headers)
+
+        return Handler
+
+
+def build_stub_youtube_service(base_url):
+    """Cliente googleapiclient do YouTube apontando para o servidor local (sem credenciais)."""
+    from googleapiclient.discovery import build_from_document
+    from googleapiclient.http import build_http
+    from googleapiclient.discovery_cache import get_static_doc
+    # Troca o rootUrl no próprio documento de discovery para que as URLs de upload também usem http://
+    discovery = json.loads(get_static_doc("youtube", "v3"))
+    discovery["rootUrl"] = base_url.rstrip("/") + "/"
+    return build_from_document(discovery, http=build_http())
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os módulos do pipeline ficam em scripts/ e se importam pelo nome (ex.: "from disk_cache import DiskCache")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from audio_mix import INT16_SCALE, ducking_envelope, loop_to_length, mix_music, to_float32, to_int16
+
+FPS = 1000 # grade de controle de 100 Hz: uma amostra de controle a cada 10 amostras
+
+
+def envelope(spans, n_samples=10000, **kwargs):
+    return ducking_envelope(n_samples, spans, duck_gain=0.5, attack=0.08, release=0.4, fps=FPS, **kwargs)
+
+
+def test_no_speech_keeps_full_volume():
+    assert np.array_equal(envelope([]), np.ones(10000, dtype=np.float32))
+
+
+def test_ducks_under_speech_with_attack_and_release_ramps():
+    env = envelope([(3000, 5000)])
+    assert env.dtype == np.float32 and env.shape == (10000,)
+    assert np.all(env[:2900] == 1.0) and np.all(env[5420:] == 1.0)
+    assert np.allclose(env[3000:5000], 0.5)
+    # Ataque de 80 ms antes da fala e release de 400 ms depois, sempre monotônicos
+    attack, release = env[2900:3000], env[5000:5420]
+    assert np.all(np.diff(attack) <= 0) and np.all(np.diff(release) >= 0)
+    assert env[2960] == pytest.approx(0.75, abs=0.07)
+    assert env[5200] == pytest.approx(0.75, abs=0.02)
+
+
+def test_short_gap_between_spans_does_not_return_to_full_volume():
+    env = envelope([(2000, 3000), (3200, 4000)])
+    gap = env[3000:3200]
+    assert gap.max() < 1.0
+    assert np.allclose(env[3200:4000], 0.5)
+
+
+def test_loop_to_length_repeats_and_cuts():
+    pcm = np.arange(6, dtype=np.float32).reshape(3, 2)
+    looped = loop_to_length(pcm, 7)
+    assert looped.shape == (7, 2)
+    assert looped[:, 0].tolist() == [0, 2, 4, 0, 2, 4, 0]
+    assert np.array_equal(loop_to_length(pcm, 2), pcm[:2])
+    assert np.array_equal(loop_to_length(np.zeros((0, 2), np.float32), 4), np.zeros((4, 2), np.float32))
+
+
+def test_mix_music_scales_int16_applies_envelope_and_clips():
+    track = np.zeros((4, 2), dtype=np.float32)
+    track[3] = 0.9
+    music = np.full((2, 2), INT16_SCALE, dtype=np.int16)
+    env = np.array([1.0, 0.5, 0.5, 1.0], dtype=np.float32)
+    mixed = mix_music(track, music, volume=0.2, envelope=env)
+    assert mixed is track
+    assert np.allclose(track[:3, 0], [0.2, 0.1, 0.1])
+    assert np.allclose(track[3], 1.0) # 0.9 + 0.2 cortado em 1.0
+
+
+def test_int16_roundtrip_clips_and_keeps_float32_untouched():
+    pcm = np.array([[0.0, 1.5], [-0.5, -2.0]], dtype=np.float32)
+    packed = to_int16(pcm)
+    assert packed.dtype == np.int16 and packed.tolist() == [[0, 32767], [-16384, -32767]]
+    assert np.allclose(to_float32(packed), np.clip(pcm, -1, 1), atol=1 / INT16_SCALE)
+    assert to_float32(pcm) is pcm
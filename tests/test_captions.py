@@ -0,0 +1,68 @@
+import pytest
+
+from captions import balance_lines, build_cues, format_timestamp, split_caption, to_srt, to_vtt, write_captions
+
+LONG_FACT = ("Os polvos têm três corações e sangue azul; dois dos corações bombeiam sangue para as brânquias "
+             "e o terceiro para o resto do corpo, e este para de bater quando o polvo nada.")
+
+
+def test_split_caption_keeps_words_and_limits_length():
+    chunks = split_caption(LONG_FACT, max_chars=84)
+    assert " ".join(chunks) == LONG_FACT
+    assert all(len(c) <= 84 for c in chunks)
+    assert len(chunks) >= 2
+
+
+def test_split_caption_does_not_leave_a_short_tail():
+    # 90 caracteres: em vez de 84 + 6, dois trechos de tamanho parecido
+    text = " ".join(["palavra"] * 11) + " fim!"
+    chunks = split_caption(text, max_chars=84)
+    assert len(chunks) == 2
+    assert min(len(c) for c in chunks) >= 30
+
+
+def test_short_text_is_a_single_chunk():
+    assert split_caption("Curto e direto.", max_chars=84) == ["Curto e direto."]
+
+
+def test_balance_lines_breaks_near_the_middle():
+    assert balance_lines("curto") == "curto"
+    top, bottom = balance_lines("uma linha longa demais para caber inteira na tela", max_line=20).split("\n")
+    assert abs(len(top) - len(bottom)) <= 6
+
+
+def test_build_cues_cover_each_narration_span():
+    facts = ["Fato curto.", LONG_FACT]
+    cues = build_cues(facts, slide_starts=[0.0, 5.0], narration_durations=[3.0, 8.0])
+    assert cues[0] == (0.0, 3.0, "Fato curto.")
+    rest = cues[1:]
+    assert [text.replace("\n", " ") for _, _, text in rest] == split_caption(LONG_FACT)
+    assert rest[0][0] == 5.0 and rest[-1][1] == pytest.approx(13.0)
+    # Trechos contíguos, com duração proporcional aos caracteres
+    chars = [len(text.replace("\n", " ")) for _, _, text in rest]
+    for (start, end, _), (next_start, _, _) in zip(rest, rest[1:]):
+        assert end == next_start
+    for (start, end, _), n in zip(rest, chars):
+        assert (end - start) / 8.0 == pytest.approx(n / sum(chars))
+
+
+def test_build_cues_normalizes_whitespace_and_balances_lines():
+    [(start, end, text)] = build_cues(["  Um   fato\ncom espaços   estranhos e quebras de linha no meio. "], [1.5], [2.0])
+    assert (start, end) == (1.5, 3.5)
+    assert text.replace("\n", " ") == "Um fato com espaços estranhos e quebras de linha no meio."
+    assert text.count("\n") == 1
+
+
+def test_srt_and_vtt_timestamps():
+    cues = [(0.0, 1.2346, "Olá"), (3661.5, 3662.0, "Fim")]
+    assert format_timestamp(3661.5) == "01:01:01,500"
+    assert to_srt(cues).splitlines()[:3] == ["1", "00:00:00,000 --> 00:00:01,235", "Olá"]
+    vtt = to_vtt(cues)
+    assert vtt.startswith("WEBVTT\n\n") and "01:01:01.500 --> 01:01:02.000\nFim" in vtt
+
+
+def test_write_captions_uses_the_video_basename(tmp_path):
+    paths = write_captions([(0.0, 1.0, "Olá")], str(tmp_path / "legendas"), "/videos/canal_123.mp4")
+    assert sorted(paths) == ["srt", "vtt"]
+    assert paths["srt"].endswith("canal_123.srt")
+    assert open(paths["vtt"], encoding="utf-8").read().startswith("WEBVTT")
@@ -0,0 +1,127 @@
+import os
+import time
+
+from disk_cache import DiskCache
+
+
+def _age(cache, key, seconds_ago):
+    path = cache.path_for(key)
+    stamp = time.time() - seconds_ago
+    os.utime(path, (stamp, stamp))
+
+
+def test_put_get_roundtrip_and_stats(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=1024, extension=".bin", name="t")
+    key = DiskCache.make_key("texto", lang="pt")
+    assert cache.get(key) is None
+    path = cache.put_bytes(key, b"abc")
+    assert cache.get(key) == path and path.endswith(".bin")
+    with open(path, "rb") as f:
+        assert f.read() == b"abc"
+    assert cache.stats() == {"name": "t", "hits": 1, "misses": 1, "evictions": 0}
+
+
+def test_make_key_depends_on_settings():
+    assert DiskCache.make_key("a", lang="pt") == DiskCache.make_key("a", lang="pt")
+    assert DiskCache.make_key("a", lang="pt") != DiskCache.make_key("a", lang="en")
+
+
+def test_lru_eviction_keeps_recently_used(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=250)
+    keys = [DiskCache.make_key(i) for i in range(3)]
+    for i, key in enumerate(keys[:2]):
+        cache.put_bytes(key, b"x" * 100)
+        _age(cache, key, 100 - i * 10)
+    assert cache.get(keys[0]) # acerto renova o mtime: keys[1] passa a ser a menos usada
+    cache.put_bytes(keys[2], b"x" * 100)
+    cache.evict()
+    assert cache.get(keys[0]) and cache.get(keys[2])
+    assert cache.get(keys[1]) is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_running_total_triggers_eviction_without_rescan(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=250)
+    for i in range(4):
+        cache.put_bytes(DiskCache.make_key(i), b"x" * 100)
+        _age(cache, DiskCache.make_key(i), 100 - i)
+    remaining = [i for i in range(4) if os.path.exists(cache.path_for(DiskCache.make_key(i)))]
+    assert remaining == [2, 3]
+    # Sobrescrever uma entrada não soma o tamanho antigo de novo
+    cache.put_bytes(DiskCache.make_key(3), b"y" * 100)
+    assert cache._total_bytes == 200
+
+
+def test_ttl_expires_entries(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=None, ttl_seconds=60)
+    key = DiskCache.make_key("img")
+    path = cache.put_bytes(key, b"png")
+    assert cache.get(key)
+    with open(path + ".ctime", "w", encoding="utf-8") as f:
+        f.write(str(time.time() - 120))
+    assert cache.get(key) is None
+    assert not os.path.exists(path)
+
+
+def test_ttl_counts_from_creation_even_for_hot_entries(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=None, ttl_seconds=60)
+    key = DiskCache.make_key("img")
+    path = cache.put_bytes(key, b"png")
+    with open(path + ".ctime", "w", encoding="utf-8") as f:
+        f.write(str(time.time() - 50))
+    # Acertos seguidos renovam o mtime (LRU), mas não adiam a expiração
+    for _ in range(3):
+        assert cache.read_bytes(key) == b"png"
+    assert time.time() - os.stat(path).st_mtime < 5
+    with open(path + ".ctime", "w", encoding="utf-8") as f:
+        f.write(str(time.time() - 61))
+    assert cache.read_bytes(key) is None
+    assert cache.stats()["hits"] == 3 and cache.stats()["misses"] == 1
+    assert not os.path.exists(path) and not os.path.exists(path + ".ctime")
+
+
+def test_ttl_starts_for_entries_written_without_ttl(tmp_path):
+    key = DiskCache.make_key("img")
+    path = DiskCache(str(tmp_path), max_bytes=None).put_bytes(key, b"png")
+    assert not os.path.exists(path + ".ctime")
+    cache = DiskCache(str(tmp_path), max_bytes=None, ttl_seconds=60)
+    assert cache.get(key) == path
+    # O primeiro acesso com TTL grava o marcador; a entrada expira 60s depois dele
+    with open(path + ".ctime", "r", encoding="utf-8") as f:
+        created = float(f.read())
+    assert abs(created - time.time()) < 5
+    with open(path + ".ctime", "w", encoding="utf-8") as f:
+        f.write(str(created - 61))
+    assert cache.get(key) is None
+
+
+def test_fetch_to_treats_vanished_entry_as_miss(tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path / "c"), max_bytes=None)
+    key = DiskCache.make_key("audio")
+    cache.put_bytes(key, b"mp3")
+    dest = str(tmp_path / "out" / "a.mp3")
+    assert cache.fetch_to(key, dest) == dest
+    # Despejo concorrente entre o stat do get() e a cópia
+    real_get = cache.get
+    def get_then_evict(k):
+        path = real_get(k)
+        os.remove(path)
+        return path
+    monkeypatch.setattr(cache, "get", get_then_evict)
+    assert cache.fetch_to(key, str(tmp_path / "out" / "b.mp3")) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_read_bytes_returns_none_when_entry_vanishes(tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path), max_bytes=None, extension=".png")
+    key = DiskCache.make_key("prompt", model="imagegeneration@006")
+    assert cache.read_bytes(key) is None
+    cache.put_bytes(key, b"\x89PNG")
+    assert cache.read_bytes(key) == b"\x89PNG"
+    real_get = cache.get
+    def get_then_evict(k):
+        path = real_get(k)
+        os.remove(path)
+        return path
+    monkeypatch.setattr(cache, "get", get_then_evict)
+    assert cache.read_bytes(key) is None
@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from fact_store import FactStore, fact_key
+
+
+@pytest.fixture
+def store(tmp_path):
+    with FactStore(str(tmp_path / "facts.db"), history_db_path=str(tmp_path / "history.db")) as s:
+        s.import_facts([
+            ("Oceanos", "pt", "O oceano Pacífico é o maior do mundo."),
+            ("Oceanos", "pt", "Mais de 80% do oceano nunca foi explorado."),
+            ("Oceanos", "pt", "A Fossa das Marianas tem quase 11 km de profundidade."),
+            ("Oceanos", "en", "The Pacific is the largest ocean."),
+            ("Vulcões da Islândia", "pt", "A Islândia tem mais de 30 vulcões ativos."),
+        ])
+        yield s
+
+
+def test_sample_unused_excludes_facts_used_by_the_channel(store):
+    used = ["O oceano Pacífico é o maior do mundo.", "Mais de 80% do oceano nunca foi explorado."]
+    store.mark_used("canal", used, "pt")
+    assert store.sample_unused("Oceanos", "pt", 5, channel="canal") == ["A Fossa das Marianas tem quase 11 km de profundidade."]
+    # O uso é por canal: outro canal ainda vê os três fatos, e sem canal não há exclusão
+    assert len(store.sample_unused("Oceanos", "pt", 5, channel="outro")) == 3
+    assert len(store.sample_unused("Oceanos", "pt", 5)) == 3
+
+
+def test_usage_matches_normalized_text_and_language(store):
+    # Caixa e espaços diferentes continuam sendo o mesmo fato; o mesmo texto em outro idioma não
+    store.mark_used("canal", ["  o OCEANO pacífico é o maior   do mundo."], "pt")
+    store.mark_used("canal", ["The Pacific is the largest ocean."], "pt")
+    assert "O oceano Pacífico é o maior do mundo." not in store.sample_unused("Oceanos", "pt", 5, channel="canal")
+    assert store.sample_unused("Oceanos", "en", 5, channel="canal") == ["The Pacific is the largest ocean."]
+    assert fact_key("A  b", "pt") == fact_key("a b", "pt") != fact_key("a b", "en")
+
+
+def test_sample_unused_respects_limit_and_returns_empty_when_exhausted(store):
+    assert len(store.sample_unused("Oceanos", "pt", 2, channel="canal")) == 2
+    store.mark_used("canal", store.sample_unused("Oceanos", "pt", 5), "pt")
+    assert store.sample_unused("Oceanos", "pt", 5, channel="canal") == []
+
+
+def test_falls_back_to_related_topics_without_reusing_facts(store):
+    facts = store.sample_unused("Vulcões ativos", "pt", 3, channel="canal")
+    assert facts == ["A Islândia tem mais de 30 vulcões ativos."]
+    store.mark_used("canal", facts, "pt")
+    assert store.sample_unused("Vulcões ativos", "pt", 3, channel="canal") == []
+
+
+def test_usage_lives_in_the_history_db(tmp_path, store):
+    store.mark_used("canal", ["A Islândia tem mais de 30 vulcões ativos."], "pt")
+    store.close()
+    # Acervo reconstruído do zero: o histórico anexado continua excluindo o fato
+    (tmp_path / "facts.db").unlink()
+    with FactStore(str(tmp_path / "facts.db"), history_db_path=str(tmp_path / "history.db")) as rebuilt:
+        rebuilt.import_facts([("Vulcões da Islândia", "pt", "A Islândia tem mais de 30 vulcões ativos.")])
+        assert rebuilt.sample_unused("Vulcões da Islândia", "pt", 3, channel="canal") == []
+        assert rebuilt.stats()["used_by_channel"] == {"canal": 1}
+
+
+def test_sampling_wraps_around_and_never_repeats(store, monkeypatch):
+    # Início sempre no fim da faixa: os demais fatos vêm da volta para o começo
+    monkeypatch.setattr(random, "randint", lambda low, high: high)
+    facts = store.sample_unused("Oceanos", "pt", 5, channel="canal")
+    assert len(facts) == 3 and len(set(facts)) == 3
+
+
+def test_sampling_uses_index_lookups_only(store):
+    plan = " | ".join(row[3] for row in store.conn.execute(
+        "EXPLAIN QUERY PLAN " + store._probe_query("canal"),
+        {"topic": "Oceanos", "language": "pt", "channel": "canal", "low": 1, "high": 10, "picked": "[]"}))
+    assert "SEARCH f USING INDEX idx_facts_topic_language (topic=? AND language=? AND rowid>" in plan
+    assert "SEARCH u USING PRIMARY KEY (channel=? AND fact_key=?)" in plan
+    assert "SCAN f" not in plan and "TEMP B-TREE" not in plan
@@ -0,0 +1,35 @@
+import json
+
+from metrics import RunMetrics
+
+
+def test_prometheus_label_values_are_escaped():
+    metrics = RunMetrics()
+    metrics.reset(channel='canal "novo"\\teste\nlinha')
+    with metrics.span("render.encode"):
+        pass
+    metrics.incr("images.placeholder", 2)
+    text = metrics.to_prometheus()
+    assert 'channel="canal \\"novo\\"\\\\teste\\nlinha"' in text
+    assert 'span="render.encode"' in text
+    assert "pipeline_images_placeholder_total" in text
+    # Cada amostra numa linha só: a quebra de linha do rótulo não vaza para o arquivo
+    for line in text.splitlines():
+        assert line.startswith(("#", "pipeline_"))
+
+
+def test_export_keeps_metrics_of_previous_attempts(tmp_path):
+    metrics = RunMetrics()
+    metrics.reset(channel="fizzquirk")
+    metrics.incr("tts.requests", 3)
+    first = metrics.export(str(tmp_path), "metrics_run1", prometheus=True)
+    metrics.reset(channel="fizzquirk")
+    metrics.incr("tts.requests", 1)
+    second = metrics.export(str(tmp_path), "metrics_run1", prometheus=True)
+    third = metrics.export(str(tmp_path), "metrics_run1")
+    assert first.endswith("metrics_run1.json")
+    assert second.endswith("metrics_run1_attempt2.json")
+    assert third.endswith("metrics_run1_attempt3.json")
+    with open(first, encoding="utf-8") as f:
+        assert json.load(f)["counters"]["tts.requests"] == 3
+    assert (tmp_path / "metrics_run1_attempt2.prom").exists()
@@ -0,0 +1,97 @@
+import sqlite3
+
+import pytest
+
+from near_duplicates import NearDuplicateIndex, normalize_text
+
+FACT = "The Great Wall of China is more than twenty thousand kilometers long and was built over many centuries."
+NEAR_FACT = "The Great Wall of China is more than twenty thousand kilometres long, and was built over many centuries!"
+OTHER_FACT = "Octopuses have three hearts and blue blood, and two of the hearts stop beating when they swim."
+
+
+def open_index(tmp_path, **kwargs):
+    return NearDuplicateIndex(str(tmp_path / "cache" / "dedup.db"), history_db_path=str(tmp_path / "topics.db"), **kwargs)
+
+
+@pytest.fixture
+def index(tmp_path):
+    with open_index(tmp_path) as idx:
+        yield idx
+
+
+def test_normalize_ignores_case_accents_and_punctuation():
+    assert normalize_text("Olá,   MUNDO! São Paulo.") == "ola mundo sao paulo"
+
+
+def test_filter_new_drops_near_duplicates_above_threshold(index):
+    index.add([FACT], "fact", channel="canal")
+    sim = index.similarity(index.signature(FACT), index.signature(NEAR_FACT))
+    assert index.threshold <= sim < 1.0
+    assert index.filter_new([NEAR_FACT, OTHER_FACT], "fact") == [OTHER_FACT]
+    # Títulos e fatos são indexados separadamente
+    assert index.filter_new([NEAR_FACT], "title") == [NEAR_FACT]
+
+
+def test_threshold_above_similarity_keeps_the_variant(tmp_path):
+    with open_index(tmp_path, threshold=0.99) as idx:
+        idx.add([FACT], "fact")
+        assert idx.filter_new([NEAR_FACT, FACT], "fact") == [NEAR_FACT]
+
+
+def test_filter_new_dedups_within_the_batch_and_respects_limit(index):
+    assert index.filter_new([FACT, NEAR_FACT, OTHER_FACT], "fact") == [FACT, OTHER_FACT]
+    assert index.filter_new([FACT, NEAR_FACT, OTHER_FACT], "fact", limit=1) == [FACT]
+
+
+def test_find_reports_text_similarity_and_channel(index):
+    index.add([FACT], "fact", channel="canal")
+    [(text, sim, channel)] = index.find(FACT, "fact")
+    assert (text, sim, channel) == (FACT, 1.0, "canal")
+
+
+def test_history_keeps_only_texts_and_cache_is_rebuilt(tmp_path):
+    with open_index(tmp_path) as idx:
+        idx.add([FACT, OTHER_FACT], "fact", channel="canal")
+    history = sqlite3.connect(str(tmp_path / "topics.db"))
+    tables = {r[0] for r in history.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert tables == {"published_texts"}
+    history.close()
+
+    # Cache perdido (ex.: runner novo): o índice é refeito a partir do histórico
+    for path in (tmp_path / "cache").iterdir():
+        path.unlink()
+    with open_index(tmp_path) as idx:
+        assert idx.count("fact") == 2
+        assert idx.filter_new([NEAR_FACT], "fact") == []
+
+
+def test_stale_cache_catches_up_and_changed_params_rebuild(tmp_path):
+    with open_index(tmp_path) as idx:
+        idx.add([FACT], "fact")
+    # Outro índice (cache separado) registra um texto novo no mesmo histórico
+    with NearDuplicateIndex(str(tmp_path / "other.db"), history_db_path=str(tmp_path / "topics.db")) as other:
+        other.add([OTHER_FACT], "fact")
+    with open_index(tmp_path) as idx:
+        assert idx.count() == 2
+        assert idx.filter_new([OTHER_FACT], "fact") == []
+    with open_index(tmp_path, num_perm=64, bands=16) as idx:
+        assert idx.count() == 2
+        assert idx.filter_new([NEAR_FACT], "fact") == []
+
+
+
+def test_read_only_uses_current_cache_or_rebuilds_in_memory(tmp_path):
+    with open_index(tmp_path) as idx:
+        idx.add([FACT], "fact")
+    cache_path = tmp_path / "cache" / "dedup.db"
+    with open_index(tmp_path, read_only=True) as idx:
+        assert idx.filter_new([NEAR_FACT], "fact") == []
+        with pytest.raises(sqlite3.OperationalError):
+            idx.add([OTHER_FACT], "fact")
+    # Cache desatualizado (texto novo no histórico): o modo somente leitura indexa em memória, sem gravar no cache
+    with NearDuplicateIndex(str(tmp_path / "other.db"), history_db_path=str(tmp_path / "topics.db")) as other:
+        other.add([OTHER_FACT], "fact")
+    before = cache_path.read_bytes()
+    with open_index(tmp_path, read_only=True) as idx:
+        assert idx.count() == 2
+    assert cache_path.read_bytes() == before
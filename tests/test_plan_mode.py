@@ -0,0 +1,61 @@
+import os
+import hashlib
+
+import pytest
+
+import main
+from fact_store import FactStore
+from near_duplicates import NearDuplicateIndex
+from topic_store import TopicStore
+
+
+@pytest.fixture
+def paths(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "TOPIC_DB_PATH", str(tmp_path / "topics.db"))
+    monkeypatch.setattr(main, "TOPIC_FILE_PATH", str(tmp_path / "topics.txt"))
+    monkeypatch.setattr(main, "HISTORY_FILE_PATH", str(tmp_path / "topic_history.txt"))
+    monkeypatch.setattr(main, "FACTS_DB_PATH", str(tmp_path / "cache" / "facts.db"))
+    monkeypatch.setattr(main, "FACTS_SOURCE_DIR", str(tmp_path / "facts"))
+    monkeypatch.setattr(main, "DEDUP_DB_PATH", str(tmp_path / "cache" / "dedup.db"))
+    (tmp_path / "topics.txt").write_text("Oceanos\nVulcões\n", encoding="utf-8")
+    (tmp_path / "topic_history.txt").write_text("Oceanos\n", encoding="utf-8")
+    return tmp_path
+
+
+FACTS = ["O oceano Pacífico é o maior e mais profundo do planeta.",
+         "Mais de oitenta por cento do fundo do mar nunca foi mapeado.",
+         "A Fossa das Marianas tem quase onze quilômetros de profundidade.",
+         "As baleias-azuis são os maiores animais que já existiram."]
+
+
+def snapshot(root):
+    # -wal/-shm vazios podem aparecer ao abrir um banco WAL só para leitura; o conteúdo dos bancos não muda
+    return {os.path.relpath(os.path.join(d, f), root): hashlib.sha256(open(os.path.join(d, f), "rb").read()).hexdigest()
+            for d, _dirs, files in os.walk(root) for f in files if not f.endswith(("-wal", "-shm"))}
+
+
+def test_plan_does_not_create_databases(paths):
+    before = snapshot(paths)
+    plan = main.plan_video("fizzquirk")
+    assert plan and plan["facts"]
+    assert snapshot(paths) == before
+
+
+def test_plan_reads_existing_databases_without_writing(paths):
+    with TopicStore(main.TOPIC_DB_PATH) as store:
+        store.add_topics(["Oceanos"])
+    with FactStore(main.FACTS_DB_PATH, history_db_path=main.TOPIC_DB_PATH) as store:
+        store.import_facts([("Oceanos", "pt-br", fact) for fact in FACTS])
+    with NearDuplicateIndex(main.DEDUP_DB_PATH, history_db_path=main.TOPIC_DB_PATH) as index:
+        index.add([FACTS[0]], "fact", channel="fizzquirk")
+    os.remove(main.DEDUP_DB_PATH) # cache perdido: o plano monta o índice em memória
+    before = snapshot(paths)
+
+    plan = main.plan_video("fizzquirk")
+    assert plan["topic"] == "Oceanos"
+    assert sorted(plan["facts"]) == sorted(FACTS[1:]) # o já publicado fica de fora
+    assert snapshot(paths) == before
+    # topics.txt e o histórico legado ficam para a primeira execução real, no canal certo
+    with TopicStore(main.TOPIC_DB_PATH) as store:
+        assert store.stats()["topics"] == 1
+        assert store.import_history_file(main.HISTORY_FILE_PATH, "outro_canal") == 1
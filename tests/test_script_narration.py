@@ -0,0 +1,80 @@
+import numpy as np
+
+from script_narration import build_script, split_at_pauses, split_sentences
+
+FPS = 8000
+EDGE = 0.2
+
+
+def speech(parts, fps=FPS):
+    """PCM estéreo sintético: trechos (segundos com voz, pausa depois), com silêncio nas bordas. Devolve (pcm, trechos)."""
+    t = np.arange(int(max(v for v, _ in parts) * fps)) / fps
+    tone = (0.5 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+    chunks, spans, pos = [np.zeros(int(EDGE * fps), np.float32)], [], int(EDGE * fps)
+    for voiced, pause in parts:
+        n = int(voiced * fps)
+        chunks += [tone[:n], np.zeros(int(pause * fps), np.float32)]
+        spans.append((pos, pos + n)); pos += n + int(pause * fps)
+    chunks.append(np.zeros(int(EDGE * fps), np.float32))
+    mono = np.concatenate(chunks)
+    return np.stack([mono, mono], axis=1), spans
+
+
+def assert_close(offsets, spans, tolerance=0.02):
+    assert len(offsets) == len(spans)
+    for (start, end), (s, e) in zip(offsets, spans):
+        assert abs(start - s) <= tolerance * FPS and abs(end - e) <= tolerance * FPS
+
+
+def test_build_script_ends_every_fact_with_punctuation():
+    assert build_script(["Um  fato", "Outro fato!"]) == "Um fato. Outro fato!"
+    assert split_sentences("Uma frase. Outra?  Mais uma…") == ["Uma frase.", "Outra?", "Mais uma…"]
+
+
+def test_boundaries_follow_the_pauses_between_facts():
+    facts = ["a" * 40, "b" * 80, "c" * 40]
+    pcm, spans = speech([(1.0, 0.3), (2.0, 0.3), (1.0, 0.0)])
+    assert_close(split_at_pauses(pcm, facts, fps=FPS), spans)
+
+
+def test_pauses_inside_a_fact_do_not_split_it():
+    # O segundo fato tem duas frases: a pausa entre elas fica dentro do trecho dele
+    facts = ["a" * 40, "Primeira frase aqui. Segunda frase aqui.", "c" * 40]
+    pcm, spans = speech([(1.0, 0.3), (0.5, 0.2), (0.5, 0.3), (1.0, 0.0)])
+    merged = [spans[0], (spans[1][0], spans[2][1]), spans[3]]
+    assert_close(split_at_pauses(pcm, facts, fps=FPS), merged)
+
+
+def test_longer_pause_wins_near_the_expected_position():
+    facts = ["a" * 50, "b" * 50]
+    pcm, spans = speech([(0.9, 0.16), (0.2, 0.4), (1.1, 0.0)])
+    offsets = split_at_pauses(pcm, facts, fps=FPS)
+    assert_close(offsets, [(spans[0][0], spans[1][1]), spans[2]])
+
+
+def test_single_fact_trims_edge_silence():
+    pcm, spans = speech([(1.5, 0.0)])
+    assert_close(split_at_pauses(pcm, ["um fato só"], fps=FPS), spans)
+
+
+def test_unreliable_alignment_returns_none():
+    facts = ["a" * 40, "b" * 40, "c" * 40]
+    # Pausas curtas demais (abaixo de min_pause) não contam como fronteira
+    pcm, _ = speech([(1.0, 0.05), (1.0, 0.05), (1.0, 0.0)])
+    assert split_at_pauses(pcm, facts, fps=FPS) is None
+    # Pausas muito longe da proporção de caracteres dos fatos
+    pcm, _ = speech([(1.0, 0.3), (1.0, 0.3), (1.0, 0.0)])
+    assert split_at_pauses(pcm, ["a" * 5, "b" * 5, "c" * 200], fps=FPS) is None
+    # Áudio mudo
+    assert split_at_pauses(np.zeros((FPS, 2), np.float32), facts, fps=FPS) is None
+
+
+def test_saved_narration_pcm_is_int16_and_loads_as_float32_segments(tmp_path):
+    import main
+    pcm, spans = speech([(0.5, 0.3), (0.5, 0.0)])
+    path = main.save_narration_pcm(pcm, str(tmp_path), "canal")
+    assert np.load(path).dtype == np.int16
+    segments = main.load_narration_segments([path], [list(span) for span in spans])
+    assert [s.dtype for s in segments] == [np.float32, np.float32]
+    for segment, (start, end) in zip(segments, spans):
+        assert np.allclose(segment, pcm[start:end], atol=1e-4)
@@ -0,0 +1,56 @@
+import os
+import time
+import threading
+
+import pytest
+
+pytest.importorskip("googleapiclient")
+
+import main
+from streaming_upload import GrowingFileUpload
+from youtube_stub_server import YouTubeStubServer, build_stub_youtube_service
+
+CHUNK = 256 * 1024
+
+
+def test_streamed_upload_of_growing_file_survives_a_retry(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "backoff_delay", lambda attempt: 0.0)
+    path = str(tmp_path / "video.mp4")
+    payload = os.urandom(5 * CHUNK + 1234)
+    done = threading.Event()
+    overlapped = threading.Event()
+
+    with YouTubeStubServer() as stub:
+        stub.fail_next_puts = 1 # o primeiro chunk recebe 503 e é reenviado
+
+        def encoder():
+            # Escreve dois chunks, espera o servidor receber algo (upload começou com o arquivo incompleto) e termina
+            try:
+                with open(path, "wb") as f:
+                    f.write(payload[:2 * CHUNK]); f.flush()
+                    deadline = time.monotonic() + 20
+                    while time.monotonic() < deadline:
+                        with stub.lock:
+                            if any(s.received for s in stub.sessions.values()):
+                                overlapped.set(); break
+                        time.sleep(0.01)
+                    for start in range(2 * CHUNK, len(payload), 100_000):
+                        f.write(payload[start:start + 100_000]); f.flush()
+                        time.sleep(0.01)
+            finally:
+                done.set()
+
+        open(path, "wb").close()
+        writer = threading.Thread(target=encoder)
+        writer.start()
+        media = GrowingFileUpload(path, done, chunksize=CHUNK, poll_interval=0.01, stall_timeout=30)
+        video_id = main.upload_video(build_stub_youtube_service(stub.base_url), path, "Título", "Descrição", ["tag"], "27",
+                                     media=media, max_retries=3)
+        writer.join()
+
+        assert video_id
+        assert overlapped.is_set()
+        assert stub.fail_next_puts == 0
+        [session] = stub.sessions.values()
+        assert session.video_id == video_id
+        assert bytes(session.received) == payload
@@ -0,0 +1,78 @@
+import os
+from collections import Counter
+
+import pytest
+
+from topic_store import TopicStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    with TopicStore(str(tmp_path / "topics.db")) as s:
+        yield s
+
+
+def test_quarantine_excludes_recent_topics(store):
+    store.add_topics([f"T{i}" for i in range(5)])
+    picked = [store.choose("canal", history_len=4) for _ in range(5)]
+    # Com quarentena de 4 e 5 temas, cada janela de 5 escolhas seguidas usa todos os temas
+    assert sorted(picked) == [f"T{i}" for i in range(5)]
+    window = store.recent("canal", limit=4)
+    assert store.choose("canal", history_len=4, record=False) not in window
+
+
+def test_recycles_least_recent_when_everything_is_quarantined(store):
+    store.add_topics(["A", "B", "C"])
+    first = [store.choose("canal", history_len=10, strategy="lru") for _ in range(3)]
+    assert sorted(first) == ["A", "B", "C"]
+    assert store.choose("canal", history_len=10, strategy="lru") == first[0]
+
+
+def test_history_is_per_channel(store):
+    store.add_topics(["A", "B"])
+    a = store.choose("um", history_len=1, strategy="lru")
+    b = store.choose("um", history_len=1, strategy="lru")
+    assert {a, b} == {"A", "B"}
+    assert store.choose("dois", history_len=1, strategy="lru") in {"A", "B"}
+    assert store.recent("dois") != [] and len(store.recent("um")) == 2
+
+
+def test_lru_prefers_never_used_then_oldest(store):
+    store.add_topics(["A", "B", "C"])
+    order = [store.choose("canal", history_len=0, strategy="lru") for _ in range(3)]
+    assert sorted(order) == ["A", "B", "C"] # nenhum repete enquanto houver tema nunca usado
+    assert [store.choose("canal", history_len=0, strategy="lru") for _ in range(3)] == order
+
+
+def test_weighted_selection_follows_weights(store):
+    store.add_topics(["leve"], weight=1.0)
+    store.add_topics(["pesado"], weight=9.0)
+    store.add_topics(["desligado"], weight=1.0)
+    store.set_weight("desligado", 0)
+    counts = Counter(store.choose("canal", history_len=0, record=False) for _ in range(4000))
+    assert counts["desligado"] == 0
+    assert 0.85 < counts["pesado"] / 4000 < 0.95
+
+
+def test_weighted_falls_back_when_quarantine_covers_most_weight(store):
+    store.add_topics(["dominante"], weight=1e6)
+    store.add_topics(["raro"], weight=1.0)
+    assert store.choose("canal", history_len=1) == "dominante"
+    assert store.choose("canal", history_len=1) == "raro"
+
+
+def test_sync_topics_file_deactivates_removed_titles(store, tmp_path):
+    topics_file = tmp_path / "topics.txt"
+    topics_file.write_text("A\nB\nC\n", encoding="utf-8")
+    assert store.sync_topics_file(str(topics_file)) == 3
+    topics_file.write_text("A\nD\n", encoding="utf-8")
+    os.utime(topics_file, (1, 1)) # garante fingerprint diferente mesmo no mesmo segundo
+    assert store.sync_topics_file(str(topics_file)) == 1
+    assert store.stats()["active"] == 2
+    picked = {store.choose("canal", history_len=0, record=False) for _ in range(200)}
+    assert picked == {"A", "D"}
+    topics_file.write_text("A\nB\nD\n", encoding="utf-8")
+    os.utime(topics_file, (2, 2))
+    store.sync_topics_file(str(topics_file))
+    assert store.stats()["active"] == 3
+
@@ -0,0 +1,60 @@
+import os
+import time
+
+import pytest
+
+from upload_session import (backoff_delay, classify_status, clear_session, load_session, save_session,
+                            session_file_for)
+
+
+@pytest.mark.parametrize("status, expected", [
+    (500, "retry"), (503, "retry"), (599, "retry"), (429, "retry"), (408, "retry"),
+    (404, "restart"), (410, "restart"),
+    (400, "fatal"), (401, "fatal"), (403, "fatal"), (None, "fatal"),
+])
+def test_classify_status(status, expected):
+    assert classify_status(status) == expected
+
+
+def test_backoff_delay_is_capped_full_jitter():
+    for attempt in range(12):
+        delay = backoff_delay(attempt, base=2.0, cap=64.0)
+        assert 0 <= delay <= min(64.0, 2.0 * 2 ** attempt)
+
+
+def _video(tmp_path, content=b"0" * 1024):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(content)
+    return str(path)
+
+
+def test_session_roundtrip_and_clear(tmp_path):
+    video = _video(tmp_path)
+    assert load_session(video, "Título") == (None, 0)
+    save_session(video, "Título", "https://upload/abc", 262144)
+    assert load_session(video, "Título") == ("https://upload/abc", 262144)
+    clear_session(video)
+    assert not os.path.exists(session_file_for(video))
+
+
+def test_session_ignored_when_file_or_title_changes(tmp_path):
+    video = _video(tmp_path)
+    save_session(video, "Título", "https://upload/abc", 262144)
+    assert load_session(video, "Outro título") == (None, 0)
+    assert not os.path.exists(session_file_for(video)) # sessão inconsistente é descartada
+    save_session(video, "Título", "https://upload/abc", 262144)
+    _video(tmp_path, b"1" * 2048)
+    assert load_session(video, "Título") == (None, 0)
+
+
+def test_expired_session_is_discarded(tmp_path):
+    video = _video(tmp_path)
+    save_session(video, "Título", "https://upload/abc", 0, created_at=time.time() - 7 * 24 * 3600)
+    assert load_session(video, "Título") == (None, 0)
+
+
+def test_corrupted_session_file_starts_new_session(tmp_path):
+    video = _video(tmp_path)
+    with open(session_file_for(video), "w", encoding="utf-8") as f:
+        f.write("{não é json")
+    assert load_session(video, "Título") == (None, 0)